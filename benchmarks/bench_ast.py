@@ -0,0 +1,70 @@
+""" Time parsing to the syntax tree, rendering it and its binary form, compared with pickle and the internal parser """
+import argparse
+import pickle
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_corpus import load_cases
+from pymarkview.markdown import parse, render_html
+from pymarkview.markdown.markdown import Markdown
+from pymarkview.markdown.tree import Document
+
+
+def best_of(repeat, function, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=100, help="copies of the corpus in the document")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    text = "\n\n".join(["\n\n".join(case for _, case in load_cases())] * args.copies)
+
+    internal, _ = best_of(args.repeat, Markdown().parse, text)
+    parsing, document = best_of(args.repeat, parse, text)
+    rendering, _ = best_of(args.repeat, render_html, document)
+    dumping, data = best_of(args.repeat, document.to_bytes)
+    loading, _ = best_of(args.repeat, Document.from_bytes, data)
+    raw = document.to_bytes(compress=False)
+
+    # A tree of one object per node for comparison, as a naive AST would be built
+    nodes = [{"type": node.type, "start": node.start, "end": node.end, "value": node.value,
+              "attribute": node.attribute, "children": []} for node in document.walk()]
+    for index, parent in enumerate(document.parents):
+        if parent >= 0:
+            nodes[parent]["children"].append(nodes[index])
+    pickled = pickle.dumps((text, nodes[0]), pickle.HIGHEST_PROTOCOL)
+
+    tracemalloc.start()
+    parse(text)
+    tree_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print("{chars} chars, {nodes} nodes".format(chars=len(text), nodes=len(document)))
+    print("internal parser:  {ms:8.1f} ms".format(ms=internal * 1000))
+    print("parse to tree:    {ms:8.1f} ms".format(ms=parsing * 1000))
+    print("render tree:      {ms:8.1f} ms".format(ms=rendering * 1000))
+    print("to_bytes:         {ms:8.1f} ms, {kb:.1f} KB ({raw:.1f} KB uncompressed)".format(
+        ms=dumping * 1000, kb=len(data) / 1e3, raw=len(raw) / 1e3))
+    print("from_bytes:       {ms:8.1f} ms".format(ms=loading * 1000))
+    print("pickled objects:  {kb:8.1f} KB".format(kb=len(pickled) / 1e3))
+    print("parse peak memory {kb:.1f} KB, {per_node:.1f} bytes per node".format(
+        kb=tree_peak / 1e3, per_node=tree_peak / len(document)))
+
+
+if __name__ == "__main__":
+    main()
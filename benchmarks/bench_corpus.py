@@ -0,0 +1,230 @@
+""" Conformance and performance corpus for the internal Markdown parser
+
+Each corpus case is rendered with the internal parser and compared byte for byte
+against its snapshot in corpus/expected, so parser changes cannot alter the
+output silently. The same cases are compared against markdown2 after HTML
+normalization, and timed with both parsers. A seeded fuzzer feeds random
+Markdown to the internal parser and flags inputs that raise or whose parse time
+grows faster than their length. With --seed 0 the 48th input, unclosed image
+brackets on one long line, is flagged, so it takes --fuzz 48 or more.
+
+--check only compares the snapshots and fails on any difference, see make check.
+"""
+import argparse
+import io
+import random
+import sys
+import time
+
+from html.parser import HTMLParser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymarkview.markdown import create_parser
+from pymarkview.resources.defaults import welcome_text
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+EXPECTED_DIR = CORPUS_DIR / "expected"
+
+# Attributes that carry meaning, styling and ids differ between the parsers
+KEPT_ATTRIBUTES = ("href", "src", "alt", "checked")
+
+
+def load_cases():
+    cases = [(path.stem, path.read_text(encoding="utf-8")) for path in sorted(CORPUS_DIR.glob("*.md"))]
+    cases.append(("welcome_text", welcome_text))
+    return cases
+
+
+class _Normalizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = sorted((name, value or "") for name, value in attrs if name in KEPT_ATTRIBUTES)
+        self.tokens.append("<{tag}{attrs}>".format(
+            tag=tag, attrs="".join(" {0}={1!r}".format(name, value) for name, value in attrs)))
+
+    def handle_endtag(self, tag):
+        self.tokens.append("</{tag}>".format(tag=tag))
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if text:
+            self.tokens.append(text)
+
+
+def normalize_html(source):
+    """ Token list of an HTML fragment that ignores whitespace, quoting and attribute order """
+    normalizer = _Normalizer()
+    normalizer.feed(source)
+    normalizer.close()
+
+    # Paragraph wrappers and code elements are where the parsers disagree most on style, not content
+    return [token for token in normalizer.tokens if token not in ("<p>", "</p>", "<code>", "</code>")]
+
+
+def first_difference(a, b):
+    for index, (left, right) in enumerate(zip(a, b)):
+        if left != right:
+            return index, left, right
+
+    if len(a) != len(b):
+        index = min(len(a), len(b))
+        return index, (a[index:index + 1] or ["<end>"])[0], (b[index:index + 1] or ["<end>"])[0]
+
+    return None
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_snapshots(cases, internal, update, create=True):
+    failures = 0
+    EXPECTED_DIR.mkdir(exist_ok=True)
+
+    for name, text in cases:
+        output = internal(text)
+        path = EXPECTED_DIR / (name + ".html")
+
+        if not create and not path.exists():
+            failures += 1
+            print("  {name}: NO SNAPSHOT".format(name=name))
+        elif update or not path.exists():
+            with io.open(str(path), "w", encoding="utf-8", newline="") as f:
+                f.write(output)
+            print("  {name}: snapshot written".format(name=name))
+        elif path.read_text(encoding="utf-8") != output:
+            failures += 1
+            print("  {name}: OUTPUT CHANGED".format(name=name))
+
+    return failures
+
+
+def compare_parsers(cases, internal, markdown2):
+    agree = 0
+
+    for name, text in cases:
+        difference = first_difference(normalize_html(internal(text)), normalize_html(markdown2(text)))
+
+        if difference is None:
+            agree += 1
+            print("  {name}: agree".format(name=name))
+        else:
+            index, left, right = difference
+            print("  {name}: differ at token {index}: internal {left!r}, markdown2 {right!r}".format(
+                name=name, index=index, left=left, right=right))
+
+    return agree
+
+
+def time_parsers(cases, parsers, repeat):
+    for name, text in cases:
+        timings = ", ".join("{parser} {ms:.3f} ms".format(parser=parser, ms=timed(lambda: md(text), repeat) * 1000)
+                            for parser, md in parsers)
+        print("  {name} ({size} chars): {timings}".format(name=name, size=len(text), timings=timings))
+
+
+FRAGMENTS = [
+    "# ", "## ", "#", "\n", "\n\n", " ", "  ", "text", "word ", "*", "**", "_", "__", "~~", "`", "```", "```py\n",
+    "[", "]", "(", ")", "![", "[[", "]]", "<", ">", "> ", "<http://x>", "|", " | ", "|---|", ":--", "--:",
+    "---", "===", "***", "* ", "- ", "1. ", "- [ ] ", "- [x] ", "\\|", ":", ",", "&", "\t"
+]
+
+
+def random_document(rnd, length):
+    return "".join(rnd.choice(FRAGMENTS) for _ in range(length))
+
+
+def fuzz(internal, iterations, seed, growth, limit, min_chars):
+    """ Random inputs must parse, and parse time of a repeated input may grow at most limit times its length """
+    rnd = random.Random(seed)
+    flagged = 0
+
+    for iteration in range(iterations):
+        unit = random_document(rnd, rnd.randint(1, 12))
+        separator = rnd.choice(("", "\n", "\n\n"))
+
+        try:
+            internal(unit)
+        except Exception as e:
+            flagged += 1
+            print("  raised {error!r} on {unit!r}".format(error=e, unit=unit))
+            continue
+
+        # Repeat the unit until timings are above the noise, then grow the input
+        count = max(1, min_chars // max(len(unit + separator), 1))
+        small = separator.join([unit] * count)
+        large = separator.join([unit] * (count * growth))
+
+        small_s = timed(lambda: internal(small), 3)
+        large_s = timed(lambda: internal(large), 3)
+        ratio = large_s / max(small_s, 1e-9)
+
+        if ratio > growth * limit:
+            flagged += 1
+            print("  super-linear: {unit!r} joined by {separator!r}, {growth}x input took {ratio:.1f}x time "
+                  "({small:.1f} ms -> {large:.1f} ms)".format(unit=unit, separator=separator, growth=growth,
+                                                               ratio=ratio, small=small_s * 1000,
+                                                               large=large_s * 1000))
+
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update", action="store_true", help="rewrite the snapshots from the current output")
+    parser.add_argument("--check", action="store_true", help="only compare the snapshots, fail on any difference")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fuzz", type=int, default=100, help="number of fuzzer inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--growth", type=int, default=4, help="input growth factor of the scaling check")
+    parser.add_argument("--limit", type=float, default=2.5, help="allowed time growth per input growth")
+    parser.add_argument("--min-chars", type=int, default=20000, help="size of the smaller scaling input")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    internal = create_parser("internal")
+
+    print("Snapshots:")
+    failures = check_snapshots(cases, internal, args.update and not args.check, create=not args.check)
+
+    if args.check:
+        print("  {failures} of {total} cases differ".format(failures=failures, total=len(cases)))
+        sys.exit(1 if failures else 0)
+
+    parsers = [("internal", internal)]
+    try:
+        markdown2 = create_parser("markdown2")
+    except ImportError:
+        print("markdown2 is not installed, skipping the differential check")
+    else:
+        parsers.append(("markdown2", markdown2))
+
+        print("Differential against markdown2:")
+        agree = compare_parsers(cases, internal, markdown2)
+        print("  {agree} of {total} cases agree".format(agree=agree, total=len(cases)))
+
+    print("Timings (best of {repeat}):".format(repeat=args.repeat))
+    time_parsers(cases, parsers, args.repeat)
+
+    print("Fuzzing {count} inputs:".format(count=args.fuzz))
+    flagged = fuzz(internal, args.fuzz, args.seed, args.growth, args.limit, args.min_chars)
+    print("  {flagged} flagged".format(flagged=flagged))
+
+    if failures or flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
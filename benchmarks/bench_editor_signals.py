@@ -0,0 +1,65 @@
+""" Count TabbedEditor handler invocations per keystroke after switching tabs back and forth """
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=3)
+    parser.add_argument("--switches", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=200)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    # Settings and journal files are written to the working directory
+    os.chdir(tempfile.mkdtemp())
+
+    from pymarkview.settings import Settings
+    from pymarkview.ui.editor import LineNumberEditor
+    from pymarkview.ui.tabbed_editor import TabbedEditor
+
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, Settings(watch=False), False)
+    for _ in range(args.tabs - 1):
+        tabbed_editor.new_tab()
+
+    for n in range(args.switches):
+        tabbed_editor.setCurrentIndex(n % args.tabs)
+
+    text_changes = []
+    tabbed_editor.text_changed.connect(lambda: text_changes.append(1))
+    titles = []
+    tabbed_editor.tab_title_changed.connect(titles.append)
+
+    editor = tabbed_editor.current_editor
+    tabbed_editor.handler_calls.clear()
+
+    start = time.perf_counter()
+    QTest.keyClicks(editor, "x" * args.keys)
+    elapsed = time.perf_counter() - start
+
+    calls = tabbed_editor.handler_calls
+    print("{keys} keystrokes after {switches} tab switches, {ms:.3f} ms per keystroke".format(
+        keys=args.keys, switches=args.switches, ms=elapsed * 1000 / args.keys))
+    print("text change handler: {calls:.2f} per keystroke, text_changed: {signals:.2f} per keystroke".format(
+        calls=calls["text_change"] / args.keys, signals=len(text_changes) / args.keys))
+    print("title updates: {updates} (tab_title_changed emitted {titles} times)".format(
+        updates=calls["title_update"], titles=len(titles)))
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+""" Measure process memory with many open tabs, with and without hibernation, and the cost of waking a tab """
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from helpers import make_document, resident_bytes, settle
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--budget", type=int, default=64, help="tab memory budget in MB, 0 disables hibernation")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    # Settings and journal files are written to the working directory
+    os.chdir(tempfile.mkdtemp())
+
+    from pymarkview.settings import Settings
+    from pymarkview.ui.editor import LineNumberEditor
+    from pymarkview.ui.tabbed_editor import TabbedEditor
+
+    settings = Settings(watch=False)
+    settings.set("tab_memory_budget_mb", args.budget)
+
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, settings, False)
+    tabbed_editor.resize(800, 600)
+
+    paths = []
+    directory = tempfile.mkdtemp()
+    for index in range(args.tabs):
+        path = os.path.join(directory, "doc{index}.md".format(index=index))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_document(index, args.lines))
+        paths.append(path)
+
+    settle(app)
+    before = resident_bytes()
+
+    start = time.perf_counter()
+    for path in paths:
+        tabbed_editor.open_file(path)
+        settle(app)
+    elapsed = time.perf_counter() - start
+
+    settle(app)
+    after = resident_bytes()
+    usage = tabbed_editor.memory_usage()
+
+    print("{tabs} tabs of {lines} lines opened in {s:.2f} s, budget {budget} MB".format(
+        tabs=args.tabs, lines=args.lines, s=elapsed, budget=args.budget))
+    print("resident memory grew by {mb:.1f} MB ({per_tab:.0f} KB per tab)".format(
+        mb=(after - before) / 1e6, per_tab=(after - before) / 1e3 / args.tabs))
+    print("{editors} live editors, estimated {estimate:.1f} MB; {hibernated} hibernated, {compressed:.2f} MB "
+          "compressed".format(editors=usage["editors"], estimate=usage["editor_bytes"] / 1e6,
+                              hibernated=usage["hibernated"], compressed=usage["hibernated_bytes"] / 1e6))
+
+    # Wake the least recently used tabs
+    wake_times = []
+    for tab_index in range(1, min(args.tabs, 20)):
+        was_hibernated = tabbed_editor.is_hibernated(tabbed_editor.get_uid(tab_index))
+
+        start = time.perf_counter()
+        tabbed_editor.setCurrentIndex(tab_index)
+        if was_hibernated:
+            wake_times.append(time.perf_counter() - start)
+
+    if wake_times:
+        print("waking a tab: {ms:.2f} ms on average over {count} tabs".format(
+            ms=sum(wake_times) * 1000 / len(wake_times), count=len(wake_times)))
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
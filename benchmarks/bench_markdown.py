@@ -0,0 +1,46 @@
+""" Time the internal parser and report its memory use per render with tracemalloc """
+import argparse
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_corpus import load_cases
+from pymarkview.markdown.markdown import Markdown
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=100, help="copies of the corpus in the document")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    text = "\n\n".join(["\n\n".join(case for _, case in load_cases())] * args.copies)
+    md = Markdown()
+    md.parse(text)
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        md.parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    md.parse(text)
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{chars} chars: best {ms:.1f} ms per render".format(chars=len(text), ms=best * 1000))
+    print("peak memory {peak:.2f} MB ({ratio:.1f}x the input), {retained} bytes retained".format(
+        peak=(peak - before) / 1e6, ratio=(peak - before) / len(text.encode("utf-8")), retained=current - before))
+
+
+if __name__ == "__main__":
+    main()
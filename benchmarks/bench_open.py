@@ -0,0 +1,83 @@
+""" Time opening many files one by one against open_files reading them in a thread pool """
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from helpers import make_document, settle
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    # Settings and journal files are written to the working directory
+    os.chdir(tempfile.mkdtemp())
+
+    from pymarkview.settings import Settings
+    from pymarkview.ui.editor import LineNumberEditor
+    from pymarkview.ui.tabbed_editor import TabbedEditor
+
+    settings = Settings(watch=False)
+
+    paths = []
+    directory = tempfile.mkdtemp()
+    for index in range(args.files):
+        path = os.path.join(directory, "doc{index}.md".format(index=index))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_document(index, args.lines))
+        paths.append(path)
+
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, settings, False)
+    settle(app)
+
+    start = time.perf_counter()
+    for path in paths:
+        tabbed_editor.open_file(path)
+        settle(app)
+    sequential = time.perf_counter() - start
+
+    print("open_file one by one: {s:.2f} s for {files} files of {lines} lines".format(
+        s=sequential, files=args.files, lines=args.lines))
+
+    executor = ThreadPoolExecutor(thread_name_prefix="bench")
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, settings, False, executor)
+    settle(app)
+
+    first_tab = None
+    longest_block = 0
+
+    start = time.perf_counter()
+    tabbed_editor.open_files(paths)
+    while tabbed_editor.count() <= args.files:
+        block_start = time.perf_counter()
+        settle(app)
+        longest_block = max(longest_block, time.perf_counter() - block_start)
+
+        if first_tab is None and tabbed_editor.count() > 1:
+            first_tab = time.perf_counter() - start
+    pooled = time.perf_counter() - start
+
+    print("open_files: {s:.2f} s, first tab after {first:.1f} ms, longest event loop pass {block:.1f} ms".format(
+        s=pooled, first=first_tab * 1000, block=longest_block * 1000))
+
+    executor.shutdown()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
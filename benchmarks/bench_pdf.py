@@ -0,0 +1,91 @@
+""" Generate a tree of notes and print it to PDF, reporting documents per second """
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from pymarkview.export import render_document_file, worker_pool
+from pymarkview.resources.defaults import welcome_text
+
+
+def make_tree(root, count, per_dir=100):
+    paths = []
+    for index in range(count):
+        directory = os.path.join(root, "dir{number}".format(number=index // per_dir))
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, "note{index}.md".format(index=index))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Note {index}\n\n{text}".format(index=index, text=welcome_text))
+        paths.append(path)
+
+    return paths
+
+
+def render_only(paths, parser_name, out_dir):
+    """ Throughput of the Markdown stage alone, the part running in worker processes """
+    start = time.perf_counter()
+
+    with worker_pool() as pool:
+        html_paths = [os.path.join(out_dir, "{index}.html".format(index=index)) for index in range(len(paths))]
+        list(pool.map(render_document_file, [parser_name] * len(paths), paths, html_paths, chunksize=16))
+
+    return time.perf_counter() - start
+
+
+def print_pdfs(root, out_dir, parser_name, pages):
+    from PyQt5.QtCore import QCoreApplication, QTimer, Qt
+    from PyQt5.QtWidgets import QApplication
+    from pymarkview.pdf import PdfExporter
+
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    result = {}
+
+    def finished(exported, failed, seconds):
+        result.update(exported=exported, failed=failed, seconds=seconds)
+        app.quit()
+
+    exporter = PdfExporter(root, out_dir, parser_name, pages=pages)
+    exporter.finished.connect(finished)
+    QTimer.singleShot(0, exporter.start)
+    app.exec_()
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 4, 8], help="page pool sizes to compare")
+    parser.add_argument("--parser", default="internal")
+    parser.add_argument("--render-only", action="store_true", help="only time the Markdown stage")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    paths = make_tree(os.path.join(root, "notes"), args.docs)
+
+    seconds = render_only(paths, args.parser, tempfile.mkdtemp())
+    print("render stage: {docs} docs in {seconds:.2f} s, {rate:.0f} docs/s".format(
+        docs=args.docs, seconds=seconds, rate=args.docs / seconds))
+
+    if args.render_only:
+        return
+
+    for pages in args.pages:
+        result = print_pdfs(os.path.join(root, "notes"), os.path.join(root, "pdf{pages}".format(pages=pages)),
+                            args.parser, pages)
+        print("{pages} pages: {exported} PDFs in {seconds:.2f} s, {rate:.1f} docs/s, {failed} failed".format(
+            pages=pages, rate=result["exported"] / result["seconds"], **result))
+
+
+if __name__ == "__main__":
+    main()
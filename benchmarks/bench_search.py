@@ -0,0 +1,99 @@
+""" Compare SearchIndex queries against a naive str.find scan over all documents """
+import argparse
+import random
+import string
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymarkview.index.search import SearchIndex
+
+
+def make_documents(count, words_per_doc, seed=0):
+    rnd = random.Random(seed)
+    vocabulary = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 10)))
+                  for _ in range(20000)]
+
+    # Zipf-like word frequencies, as in natural language
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    docs = {}
+    for n in range(count):
+        words = rnd.choices(vocabulary, weights=weights, k=words_per_doc)
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        docs["doc{n}.md".format(n=n)] = "\n".join(lines)
+
+    return docs, vocabulary
+
+
+def naive_search(docs, query):
+    query = query.lower()
+    results = []
+
+    for key, text in docs.items():
+        haystack = text.lower()
+        offset = haystack.find(query)
+        while offset != -1:
+            results.append((key, offset))
+            offset = haystack.find(query, offset + len(query))
+
+    return results
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    docs, vocabulary = make_documents(args.docs, args.words)
+    total = sum(len(text) for text in docs.values())
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for key, text in docs.items():
+        index.update(key, text)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print("{docs} documents, {mb:.1f} MB, index built in {ms:.0f} ms".format(
+        docs=len(docs), mb=total / 1e6, ms=build_ms))
+
+    # Incremental update of a single document, as done on every text change tick
+    key, text = next(iter(docs.items()))
+    docs[key] = text + " appended"
+    update_ms, _ = timed(lambda: index.update(key, docs[key]), 1)
+    print("single document update: {ms:.2f} ms".format(ms=update_ms))
+
+    rnd = random.Random(1)
+    queries = [rnd.choice(vocabulary[100:]) for _ in range(args.queries)]
+
+    index_total = naive_total = 0
+    for query in queries:
+        index_ms, index_results = timed(lambda: index.search(query, limit=10 ** 9), 3)
+        naive_ms, naive_results = timed(lambda: naive_search(docs, query), 3)
+
+        assert sorted((r.key, r.offset) for r in index_results) == sorted(naive_results)
+
+        index_total += index_ms
+        naive_total += naive_ms
+
+    print("avg query: index {index:.2f} ms, naive str.find {naive:.2f} ms ({speedup:.0f}x)".format(
+        index=index_total / len(queries),
+        naive=naive_total / len(queries),
+        speedup=naive_total / max(index_total, 1e-9)
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+""" Load test the preview server: cold renders, cached pages and conditional GETs """
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymarkview.markdown import create_parser
+from pymarkview.server import PreviewServer
+
+
+def make_notes(root, count, paragraphs, seed=0):
+    rnd = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "*emphasis*", "**strong**", "`code`", "[link](other.md)"]
+
+    for n in range(count):
+        blocks = ["# Note {n}".format(n=n)]
+        for _ in range(paragraphs):
+            blocks.append(" ".join(rnd.choice(words) for _ in range(60)))
+            blocks.append("\n".join("* item {i}".format(i=i) for i in range(5)))
+
+        (Path(root) / "note{n}.md".format(n=n)).write_text("\n\n".join(blocks), encoding="utf-8")
+
+
+def start_server(root, parser_name):
+    server = PreviewServer(root, lambda: create_parser(parser_name), port=0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server, loop
+
+
+async def fetch(reader, writer, path, etag=None):
+    request = "GET {path} HTTP/1.1\r\nHost: localhost\r\n".format(path=path)
+    if etag:
+        request += "If-None-Match: {etag}\r\n".format(etag=etag)
+
+    writer.write((request + "\r\n").encode("latin-1"))
+
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    headers = dict(line.split(": ", 1) for line in head.split("\r\n")[1:] if line)
+    await reader.readexactly(int(headers["Content-Length"]))
+
+    return int(head.split(" ", 2)[1]), headers.get("ETag")
+
+
+async def run_client(port, paths, requests, etags, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    for n in range(requests):
+        path = paths[n % len(paths)]
+
+        start = time.perf_counter()
+        status, etag = await fetch(reader, writer, path, etags.get(path) if etags is not None else None)
+        latencies.append(time.perf_counter() - start)
+
+        assert status == (304 if etags else 200), status
+
+    writer.close()
+
+
+async def load(port, paths, clients, requests, etags=None):
+    latencies = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(port, paths, requests, etags, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--parser", default="internal", choices=("internal", "markdown2"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_notes(root, args.notes, args.paragraphs)
+        server, loop = start_server(root, args.parser)
+        paths = ["/note{n}.md".format(n=n) for n in range(args.notes)]
+
+        async def cold():
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            etags = {}
+            for path in paths:
+                _, etags[path] = await fetch(reader, writer, path)
+            writer.close()
+            return etags
+
+        start = time.perf_counter()
+        etags = asyncio.run(cold())
+        print("{notes} cold renders: {ms:.1f} ms per page".format(
+            notes=args.notes, ms=(time.perf_counter() - start) * 1000 / args.notes))
+
+        for name, page_etags in (("cached 200", None), ("conditional 304", etags)):
+            rate, p50, p99 = asyncio.run(load(server.port, paths, args.clients, args.requests, page_etags))
+            print("{name}: {rate:.0f} req/s, p50 {p50:.2f} ms, p99 {p99:.2f} ms".format(
+                name=name, rate=rate, p50=p50, p99=p99))
+
+        print("cache hits {hits}, misses {misses}".format(hits=server.hits, misses=server.misses))
+
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+""" Check that pipe tables in the internal parser render in linear time """
+import argparse
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymarkview.markdown.markdown import Markdown
+
+
+def make_table(rows):
+    lines = ["| Name | Count | Note |", "|:-----|------:|:----:|"]
+    lines.extend("| row {n} | {n} | *cell* \\| with pipe |".format(n=n) for n in range(rows))
+    return "intro\n\n" + "\n".join(lines) + "\n\nafter\n"
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    md = Markdown()
+    base = None
+
+    for rows in (args.rows // 8, args.rows // 4, args.rows // 2, args.rows):
+        text = make_table(rows)
+
+        table_ms = timed(lambda: md._html_tables(text), args.repeat)
+        parse_ms = timed(lambda: md.parse(text), args.repeat)
+
+        if base is None:
+            base = (rows, parse_ms)
+
+        print("{rows:>7} rows: table pass {table:7.1f} ms, full parse {parse:7.1f} ms "
+              "({per_row:.2f} us/row, {scale:.1f}x time for {size:.0f}x rows)".format(
+                  rows=rows, table=table_ms, parse=parse_ms, per_row=parse_ms * 1000 / rows,
+                  scale=parse_ms / base[1], size=rows / base[0]))
+
+
+if __name__ == "__main__":
+    main()
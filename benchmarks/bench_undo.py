@@ -0,0 +1,86 @@
+""" Measure process memory of undo history after long edits in many tabs, with and without the undo budget """
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QApplication
+
+from helpers import resident_bytes, settle
+
+
+def edit(editor, rounds):
+    """ Rewrite lines, the way search and replace or reformatting does, each one a separate undo step """
+    document = editor.document()
+
+    for number in range(rounds):
+        block = document.findBlockByNumber(number % document.blockCount())
+
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText("{number}: rewritten line of text with *emphasis*".format(number=number))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--edits", type=int, default=20000, help="edits per tab")
+    parser.add_argument("--budget", type=int, default=16, help="undo memory budget in MB, 0 is unbounded")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    # Settings and journal files are written to the working directory
+    os.chdir(tempfile.mkdtemp())
+
+    from pymarkview.settings import Settings
+    from pymarkview.ui.editor import LineNumberEditor
+    from pymarkview.ui.tabbed_editor import TabbedEditor
+
+    settings = Settings(watch=False)
+    settings.set("undo_memory_budget_mb", args.budget)
+    settings.set("tab_memory_budget_mb", 0)
+
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, settings, False)
+    text = "\n".join("Line {line} of the document".format(line=line) for line in range(args.lines))
+
+    for _ in range(args.tabs):
+        tab_index = tabbed_editor.new_tab(append=True)
+        tabbed_editor.set_text(text, tab_index)
+
+    settle(app)
+    before = resident_bytes()
+
+    start = time.perf_counter()
+    for tab_index in range(1, tabbed_editor.count()):
+        tabbed_editor.setCurrentIndex(tab_index)
+        edit(tabbed_editor.current_editor, args.edits)
+        settle(app)
+    elapsed = time.perf_counter() - start
+
+    settle(app)
+    after = resident_bytes()
+    usage = tabbed_editor.memory_usage()
+
+    undo_steps = tabbed_editor.current_editor.document().availableUndoSteps()
+    print("{tabs} tabs, {edits} edits each in {s:.2f} s, undo budget {budget} MB".format(
+        tabs=args.tabs, edits=args.edits, s=elapsed, budget=args.budget))
+    print("resident memory grew by {mb:.1f} MB, undo history estimated at {estimate:.1f} MB".format(
+        mb=(after - before) / 2 ** 20, estimate=usage["undo_bytes"] / 2 ** 20))
+    print("{evicted} undo histories dropped, {steps} undo steps left in the current tab".format(
+        evicted=usage["undo_evicted"], steps=undo_steps))
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+""" Helpers shared by the benchmarks that drive the editor widgets """
+import os
+
+from PyQt5.QtCore import QCoreApplication, QEvent
+
+
+def resident_bytes():
+    """ Current resident set size, Linux only """
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def settle(app):
+    """ Process pending events, including the deletion of released editors """
+    app.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def make_document(index, lines):
+    return "\n".join("{line}. Line of *document {index}* with [a link](http://example.com/{line})".format(
+        index=index, line=line) for line in range(lines))
@@ -1,29 +1,116 @@
 if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+
+    import os
     import sys
     import argparse
-    from PyQt5.QtCore import *
-    from PyQt5.QtWidgets import *
-    from pymarkview.app import App
+    import multiprocessing
+
+    # Render workers are spawned, which re-runs this executable when frozen
+    multiprocessing.freeze_support()
 
     parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", help="files to open in tabs")
     parser.add_argument("-i", "--input", help="input file")
     parser.add_argument("-o", "--output", help="output file")
+    parser.add_argument("-f", "--format", choices=("html", "fragment"), default="fragment",
+                        help="output format: standalone HTML document or HTML fragment")
+    parser.add_argument("--serve", nargs="?", const=".", metavar="DIR",
+                        help="serve rendered Markdown from DIR over HTTP with live reload")
+    parser.add_argument("--host", default="127.0.0.1", help="host to serve on")
+    parser.add_argument("--port", type=int, default=8000, help="port to serve on")
+    parser.add_argument("--pdf", metavar="PATH", help="print a Markdown file or all notes below PATH to PDF")
+    parser.add_argument("--pdf-out", default="pdf", metavar="DIR", help="output folder of --pdf")
+    parser.add_argument("--pdf-pages", type=int, default=4, help="number of reused pages printing PDFs")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print the time taken by each startup phase")
     args = parser.parse_args()
 
     if len([x for x in (args.input, args.output) if x is not None]) == 1:
         parser.error('-i or --input and -o or --output must be given together.')
 
-    if args.input and args.output:
+    if args.serve:
+        # Preview server handling
+        from pymarkview.markdown import create_parser
+        from pymarkview.server import PreviewServer
+        from pymarkview.settings import Settings
+
+        settings = Settings(watch=False)
+        PreviewServer(args.serve, lambda: create_parser(settings.md_parser, settings.code_highlighting),
+                      args.host, args.port).serve_forever()
+    elif args.pdf:
+        # Headless PDF export
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+        from PyQt5.QtCore import QCoreApplication, QTimer, Qt
+        from PyQt5.QtWidgets import QApplication
+        from pymarkview.pdf import PdfExporter
+        from pymarkview.settings import Settings
+
+        QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+        app = QApplication(sys.argv)
+        settings = Settings(watch=False)
+
+        def pdf_finished(exported, failed, seconds):
+            print("Printed {exported} documents to PDF in {seconds:.1f} s, {rate:.1f} docs/s, {failed} failed".format(
+                exported=exported, seconds=seconds, rate=exported / max(seconds, 1e-9), failed=failed))
+            app.exit(1 if failed else 0)
+
+        exporter = PdfExporter(args.pdf, args.pdf_out, settings.md_parser, settings.code_highlighting,
+                               max(args.pdf_pages, 1))
+        exporter.document_exported.connect(lambda path, success: success or print("Failed: " + path))
+        exporter.finished.connect(pdf_finished)
+        QTimer.singleShot(0, exporter.start)
+
+        sys.exit(app.exec_())
+    elif args.input and args.output:
         # Console handling
-        App.convert_md_to_html(args.input, args.output)
+        from pymarkview.app import App
+
+        App.convert_md_to_html(args.input, args.output, args.format)
     else:
-        # GUI handling
+        # GUI handling, the web engine widgets are only imported once the editor is shown
+        from PyQt5.QtCore import *
+        from PyQt5.QtWidgets import *
+        from pymarkview.app import App
+        from pymarkview.instance import SingleInstance
+        from pymarkview.render import RenderService
+        from pymarkview.settings import Settings
+        from pymarkview.startup import StartupProfile
+        from pymarkview.ui.schemes import register_url_schemes
+
+        profile = StartupProfile(args.startup_profile, start)
+        profile.mark("imports")
+
         # Fix for HiDPI displays
         if hasattr(Qt, 'AA_EnableHighDpiScaling'):
             QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
         if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
             QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
+        # Required to load the web engine after the QApplication is created
+        QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+
+        register_url_schemes()
+
         app = QApplication(sys.argv)
-        App(app)
+        settings = Settings()
+
+        instance = SingleInstance()
+        files = [os.path.abspath(path) for path in args.files]
+
+        if settings.single_instance and instance.forward(files):
+            # A running instance opens the files
+            sys.exit(0)
+
+        profile.mark("application")
+
+        window = App(app, RenderService(settings), profile)
+        window.open_files(files)
+
+        if settings.single_instance:
+            instance.files_received.connect(lambda files: App.active_window().open_files(files))
+            instance.listen()
+
         sys.exit(app.exec_())
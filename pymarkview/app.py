@@ -1,34 +1,55 @@
 import io
+import os
 
 from PyQt5.QtCore import *
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 
+from pymarkview.export import HtmlExporter, SiteExporter
+from pymarkview.index.links import LinkIndex, LinkIndexBuilder
+from pymarkview.index.search import SearchIndex, SearchIndexBuilder
+from pymarkview.markdown import create_parser
+from pymarkview.markdown.outline import Outline
+from pymarkview.render import ProgressiveRenderer, RenderService
 from pymarkview.settings import Settings
-from pymarkview.ui.browser import Browser
+from pymarkview.startup import StartupProfile
 from pymarkview.ui.editor import LineNumberEditor
+from pymarkview.ui.outline_panel import OutlinePanel
+from pymarkview.ui.search_panel import SearchPanel
 from pymarkview.ui.tabbed_editor import TabbedEditor
 
 from pymarkview.resources.defaults import stylesheet, mathjax
-from pymarkview.util import resource_path
+from pymarkview.util import resource_path, utf16_position
 
 from html import escape
 
 
 class App(QMainWindow):
 
-    def __init__(self, app, *args):
+    # Open windows, the first one is the primary window owning the saved state
+    windows = []
+
+    # Deferred startup stages begin after the first paint, or after this many ms at the latest
+    STARTUP_STAGE_TIMEOUT = 500
+
+    def __init__(self, app, service=None, profile=None, *args):
         super().__init__(*args)
 
         self.app = app
+        self.primary = not App.windows
+        App.windows.append(self)
         self.app_title = "PyMarkView"
         self.app_icon = QIcon(resource_path("pymarkview/resources/icon.ico"))
 
         self.setWindowTitle(self.app_title)
         self.setWindowIcon(self.app_icon)
 
-        # Init settings
-        self.settings = Settings()
+        # Init settings and the render service shared by all windows
+        if service is None:
+            service = RenderService(Settings())
+
+        self.service = service
+        self.settings = service.settings
 
         # Init state
         self.state = {
@@ -37,21 +58,44 @@ class App(QMainWindow):
             "debug_mode": False
         }
 
-        # Select and inizialize MD parser
-        if self.settings.md_parser == "internal":
-            from pymarkview.markdown.markdown import Markdown
-            md = Markdown()
-            self.md = md.parse
-        elif self.settings.md_parser == "markdown2":
-            from markdown2 import Markdown
-            md = Markdown(extras=["fenced-code-blocks", "cuddled-lists", "code-friendly"])
-            self.md = md.convert
-        else:
-            raise Exception("No Markdown parser selected!")
+        # Rendering uses the parser selected in the settings
+        self.md = self.service.render
+
+        self.renderer = ProgressiveRenderer(self.settings, self)
+        self.renderer.started.connect(self.handle_render_started)
+        self.renderer.chunk_ready.connect(self.handle_render_chunk)
+        self.renderer.progress.connect(self.handle_render_progress)
+        self.renderer.finished.connect(self.handle_render_finished)
+
+        self.site_exporter = None
+
+        self.link_index = None
+        self.link_index_builder = None
+        self.link_index_pending = set()
+
+        self.search_index = SearchIndex()
+        self.search_index_builder = None
+        self.search_keys = {}
+        self.search_dirty = set()
+
+        self.outlines = {}
+        self.outline_uid = None
+
+        # The web engine, background tabs and indexes are brought up after the window is shown
+        self.profile = profile or StartupProfile()
+        self.preview = None
+        self.startup_stages = [
+            ("preview", self.init_preview),
+            ("background tabs", self.restore_background_tabs),
+            ("indexes", self.init_indexes)
+        ]
+        self.startup_started = False
 
         self.type_delay_tmr = QTimer()
         self.type_delay_tmr.setSingleShot(True)
         self.type_delay_tmr.timeout.connect(self.update_preview)
+        self.type_delay_tmr.timeout.connect(self.update_search_index)
+        self.type_delay_tmr.timeout.connect(self.update_outline)
 
         # Init UI
         self.init_ui()
@@ -85,6 +129,11 @@ class App(QMainWindow):
             shortcut=QKeySequence.New, function=self.tabbed_editor.new_tab
         )
 
+        new_window_action = self.add_action(
+            text="New &Window", tip="Open another window sharing the render cache",
+            shortcut="Ctrl+Shift+N", function=self.new_window
+        )
+
         load_action = self.add_action(
             text="&Open File", tip="Load any text file in Markdown format",
             shortcut=QKeySequence.Open, function=self.tabbed_editor.open_file
@@ -105,12 +154,17 @@ class App(QMainWindow):
             shortcut=QKeySequence.SaveAs, function=self.export_file
         )
 
+        export_site_action = self.add_action(
+            text="Export &Folder As Site...", tip="Render all notes of a folder into a static HTML site",
+            function=self.export_site
+        )
+
         quit_action = self.add_action(
             text="&Exit",
             shortcut=QKeySequence.Quit, function=self.close
         )
 
-        line_wrapping_action = self.add_action(
+        self.line_wrapping_action = self.add_action(
             "&Word Wrap",
             checkable=True, checked=self.settings.word_wrap,
             shortcut="Ctrl+W",
@@ -124,11 +178,11 @@ class App(QMainWindow):
             function=lambda state: self.menuBar().setVisible(state)
         )
 
-        show_prev_action = self.add_action(
+        self.show_preview_action = self.add_action(
             "&Show Preview",
             checkable=True, checked=True,
             shortcut="Ctrl+P",
-            function=lambda state: self.preview.setVisible(state)
+            function=lambda state: self.splitter.widget(1).setVisible(state)
         )
 
         debug_action = self.add_action(
@@ -148,12 +202,47 @@ class App(QMainWindow):
             function=self.use_css_action_toggled
         )
 
-        use_mathjax_action = self.add_action(
+        self.use_mathjax_action = self.add_action(
             "&Use MathJax",
             checkable=True, checked=self.state["use_mathjax"],
             function=self.use_mathjax_action_toggled
         )
 
+        links_action = self.add_action(
+            "&Show Links", tip="Show backlinks and broken links of the current file",
+            shortcut="Ctrl+Shift+B", function=self.show_links_menu
+        )
+
+        search_action = self.add_action(
+            "&Search", tip="Search open tabs and notes in the current folder",
+            shortcut="Ctrl+Shift+F", function=self.show_search_panel
+        )
+
+        toggle_list_action = self.add_action(
+            "Toggle &List", tip="Add or remove list markers on the selected lines",
+            shortcut="Ctrl+Shift+L", function=lambda: self.tabbed_editor.current_editor.toggle_list()
+        )
+
+        emphasis_action = self.add_action(
+            "Toggle &Emphasis", tip="Emphasize the selection",
+            shortcut="Ctrl+I", function=lambda: self.tabbed_editor.current_editor.toggle_emphasis("*")
+        )
+
+        strong_action = self.add_action(
+            "Toggle S&trong", tip="Make the selection strong",
+            shortcut="Ctrl+B", function=lambda: self.tabbed_editor.current_editor.toggle_emphasis("**")
+        )
+
+        column_action = self.add_action(
+            "&Insert at Column...", tip="Insert text in every selected line at the column of the cursor",
+            shortcut="Ctrl+Shift+I", function=self.insert_column
+        )
+
+        outline_action = self.add_action(
+            "&Outline", tip="Show the headings of the current document",
+            shortcut="Ctrl+Shift+O", function=self.show_outline_panel
+        )
+
         inst_action = self.add_action(
             "&Show instructions",
             function=self.tabbed_editor.load_instructions
@@ -162,20 +251,30 @@ class App(QMainWindow):
         menu_bar = self.menuBar()
         menu = menu_bar.addMenu("&File")
         menu.addAction(new_action)
+        menu.addAction(new_window_action)
         menu.addAction(load_action)
         menu.addAction(save_action)
         menu.addAction(save_as_action)
         menu.addAction(export_action)
+        menu.addAction(export_site_action)
+        menu.addAction(links_action)
         menu.addAction(quit_action)
 
         menu = menu_bar.addMenu("&Editor")
-        menu.addAction(line_wrapping_action)
+        menu.addAction(self.line_wrapping_action)
         menu.addAction(self.show_menu_action)
+        menu.addAction(search_action)
+        menu.addAction(outline_action)
+        menu.addSeparator()
+        menu.addAction(toggle_list_action)
+        menu.addAction(emphasis_action)
+        menu.addAction(strong_action)
+        menu.addAction(column_action)
 
         menu = menu_bar.addMenu("&Preview")
-        menu.addAction(show_prev_action)
+        menu.addAction(self.show_preview_action)
         menu.addAction(use_css_action)
-        menu.addAction(use_mathjax_action)
+        menu.addAction(self.use_mathjax_action)
         menu.addAction(debug_action)
 
         menu = menu_bar.addMenu("&Settings")
@@ -185,39 +284,118 @@ class App(QMainWindow):
         menu.addAction(inst_action)
 
     def init_status(self):
-        self.statusBar()
+        self.render_progress = QProgressBar()
+        self.render_progress.setMaximumWidth(150)
+        self.render_progress.setTextVisible(False)
+        self.render_progress.hide()
+
+        self.statusBar().addPermanentWidget(self.render_progress)
+
+        # Memory estimates of the tabs, shown in debug mode
+        self.memory_label = QLabel()
+        self.memory_label.hide()
+        self.statusBar().addPermanentWidget(self.memory_label)
+
+        self.memory_tmr = QTimer(self)
+        self.memory_tmr.timeout.connect(self.update_memory_status)
 
     def init_ui(self):
-        self.tabbed_editor = TabbedEditor(self, LineNumberEditor, self.settings)
+        self.tabbed_editor = TabbedEditor(self, LineNumberEditor, self.settings, self.primary, self.service.executor)
         self.tabbed_editor.text_changed.connect(self.handle_text_changed)
         self.tabbed_editor.tab_changed.connect(self.handle_tab_changed)
         self.tabbed_editor.tab_title_changed.connect(self.update_app_title)
         self.tabbed_editor.file_saved.connect(self.handle_file_saved)
+        self.tabbed_editor.save_failed.connect(self.handle_save_failed)
+        self.tabbed_editor.open_failed.connect(self.handle_open_failed)
+        self.tabbed_editor.text_read.connect(self.handle_text_read)
+        self.profile.mark("editor")
+
+        self.thumbnail_cache = self.service.thumbnail_cache
 
-        self.preview = Browser()
-        self.preview.pmv_link_clicked.connect(lambda file: self.tabbed_editor.open_file(file, True))
+        # Holds the place of the preview until the web engine is started
+        self.splitter = QSplitter(Qt.Horizontal)
+        self.splitter.addWidget(self.tabbed_editor)
+        self.splitter.addWidget(QWidget())
+        self.splitter.setSizes([500, 900 - 500])
 
-        splitter = QSplitter(Qt.Horizontal)
-        splitter.addWidget(self.tabbed_editor)
-        splitter.addWidget(self.preview)
-        splitter.setSizes([500, 900 - 500])
+        self.search_panel = SearchPanel(self.search_index)
+        self.search_panel.result_activated.connect(self.handle_search_result_activated)
+
+        self.search_dock = QDockWidget("Search", self)
+        self.search_dock.setObjectName("search_dock")
+        self.search_dock.setWidget(self.search_panel)
+        self.search_dock.hide()
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.search_dock)
+
+        self.outline_panel = OutlinePanel()
+        self.outline_panel.heading_activated.connect(self.handle_heading_activated)
+
+        self.outline_dock = QDockWidget("Outline", self)
+        self.outline_dock.setObjectName("outline_dock")
+        self.outline_dock.setWidget(self.outline_panel)
+        self.outline_dock.hide()
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.outline_dock)
 
         hbox = QHBoxLayout()
         hbox.setContentsMargins(0, 0, 0, 0)
-        hbox.addWidget(splitter)
+        hbox.addWidget(self.splitter)
 
         window = QWidget()
         window.setLayout(hbox)
         self.setCentralWidget(window)
 
+        # Checkable actions apply their initial state at once, which uses the status bar
+        self.init_status()
+
         self.init_menu()
 
-        self.init_status()
+        self.settings.changed.connect(self.handle_setting_changed)
 
         self.app.installEventFilter(self)
 
         self.show()
         self.center_screen()
+        self.profile.mark("window shown")
+
+        QTimer.singleShot(self.STARTUP_STAGE_TIMEOUT, self.__start_deferred_stages)
+
+    def init_preview(self):
+        # Importing the web engine widgets is deferred as well
+        from pymarkview.ui.browser import Browser
+
+        self.preview = Browser(self.thumbnail_cache, self.service.executor)
+        self.preview.pmv_link_clicked.connect(self.handle_pmv_link_clicked)
+        self.preview.enable_javascript(self.state["use_mathjax"])
+
+        self.splitter.replaceWidget(1, self.preview).deleteLater()
+        self.preview.setVisible(self.show_preview_action.isChecked())
+
+        self.update_preview()
+
+    def restore_background_tabs(self):
+        self.tabbed_editor.restore_pending_tabs()
+
+    def init_indexes(self):
+        self.update_search_index()
+        self.update_link_index()
+
+    def __start_deferred_stages(self):
+        if self.startup_started:
+            return
+
+        self.startup_started = True
+        QTimer.singleShot(0, self.__run_startup_stage)
+
+    def __run_startup_stage(self):
+        name, stage = self.startup_stages.pop(0)
+        stage()
+        self.profile.mark(name)
+
+        if self.startup_stages:
+            # Let the event loop paint and handle input between stages
+            QTimer.singleShot(0, self.__run_startup_stage)
+        else:
+            self.profile.report()
 
     def center_screen(self):
         fg = self.frameGeometry()
@@ -249,29 +427,121 @@ class App(QMainWindow):
         return out
 
     def update_preview(self):
-        html_md = self.html_markdown(include_stylesheet=self.state[
-                                     "use_css"], include_mathjax=self.state["use_mathjax"])
+        if self.preview is None:
+            return
 
         if not self.state["debug_mode"]:
-            self.preview.load_html(html_md)
+            self.renderer.md = self.md
+            self.renderer.render(self.tabbed_editor.get_text())
         else:
+            self.renderer.cancel()
+            html_md = self.html_markdown(include_stylesheet=self.state[
+                                         "use_css"], include_mathjax=self.state["use_mathjax"])
             self.preview.load_html(escape(html_md))
 
+    def __preview_html(self, html):
+        path = self.tabbed_editor.get_path()
+        base_dir = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+
+        return self.thumbnail_cache.rewrite(html, base_dir)
+
+    @pyqtSlot(str)
+    def handle_render_started(self, html):
+        if self.state["use_css"]:
+            html += stylesheet
+
+        if self.state["use_mathjax"]:
+            html += mathjax
+
+        self.preview.load_html(self.__preview_html(html))
+
+    @pyqtSlot(str)
+    def handle_render_chunk(self, html):
+        self.preview.append_html(self.__preview_html(html))
+
+    @pyqtSlot(int, int)
+    def handle_render_progress(self, done, total):
+        self.render_progress.setMaximum(total)
+        self.render_progress.setValue(done)
+        self.render_progress.setVisible(done < total)
+
+    @pyqtSlot(bool)
+    def handle_render_finished(self, progressive):
+        self.render_progress.hide()
+
+        # MathJax only typesets the document it was loaded with
+        if progressive and self.state["use_mathjax"]:
+            self.preview.typeset_math()
+
     def export_file(self):
+        formats = {
+            "HTML Document (*.html)": "html",
+            "HTML Fragment (*.html)": "fragment"
+        }
+
         filename, sel_filter = QFileDialog.getSaveFileName(
-            self, "Export as...", "", "HTML File (*.html)")
+            self, "Export as...", "", ";;".join(formats))
         if filename:
-            with io.open(filename, "w", encoding="utf-8") as f:
-                f.write(self.html_markdown())
+            path = self.tabbed_editor.get_path()
+            base_dir = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+
+            exporter = HtmlExporter(self.md, executor=self.service.executor)
+            exporter.export(
+                self.tabbed_editor.get_text(), filename, formats.get(sel_filter, "html"),
+                base_dir=base_dir, include_mathjax=self.state["use_mathjax"]
+            )
 
             self.statusBar().showMessage("Exported {filename}".format(filename=filename), 5000)
 
+    def export_site(self):
+        if self.site_exporter and self.site_exporter.isRunning():
+            self.statusBar().showMessage("Site export is still running", 5000)
+            return
+
+        root = QFileDialog.getExistingDirectory(
+            self, "Select notes folder", self.link_index.root if self.link_index else "")
+        if not root:
+            return
+
+        out_dir = QFileDialog.getExistingDirectory(self, "Select output folder")
+        if not out_dir:
+            return
+
+        self.site_exporter = SiteExporter(root, out_dir, self.settings.md_parser, self.settings.code_highlighting,
+                                          self)
+        self.site_exporter.export_finished.connect(
+            lambda count, out_dir: self.statusBar().showMessage(
+                "Exported {count} notes to {out_dir}".format(count=count, out_dir=out_dir), 5000)
+        )
+        self.site_exporter.export_failed.connect(
+            lambda message: QMessageBox.warning(self, "Export failed", message)
+        )
+        self.site_exporter.start()
+        self.statusBar().showMessage("Exporting {root}...".format(root=root))
+
+    @pyqtSlot(str, object)
+    def handle_setting_changed(self, key, value):
+        if key in ("md_parser", "code_highlighting"):
+            self.update_preview()
+        elif key == "mathjax":
+            self.use_mathjax_action.setChecked(value)
+        elif key == "word_wrap":
+            self.line_wrapping_action.setChecked(value)
+        elif key == "show_menu":
+            self.show_menu_action.setChecked(value)
+        elif key == "vault_root":
+            self.update_link_index()
+        elif key == "preview_image_width":
+            self.thumbnail_cache.max_width = value
+            self.update_preview()
+
     def use_css_action_toggled(self, state):
         self.state["use_css"] = state
         self.update_preview()
 
     def use_mathjax_action_toggled(self, state):
-        self.preview.enable_javascript(state)
+        if self.preview is not None:
+            self.preview.enable_javascript(state)
         self.state["use_mathjax"] = state
         self.update_preview()
 
@@ -279,19 +549,291 @@ class App(QMainWindow):
         self.state["debug_mode"] = state
         self.update_preview()
 
+        self.memory_label.setVisible(state)
+        if state:
+            self.update_memory_status()
+            self.memory_tmr.start(1000)
+        else:
+            self.memory_tmr.stop()
+
+    def update_memory_status(self):
+        usage = self.tabbed_editor.memory_usage()
+        mb = 1024 * 1024
+        budget = "{budget:.0f} MB".format(budget=usage["undo_budget"] / mb) if usage["undo_budget"] else "unbounded"
+
+        self.memory_label.setText(
+            "Editors: {editors} ({editor_mb:.1f} MB), hibernated: {hibernated} ({hibernated_mb:.1f} MB), "
+            "undo: {undo_mb:.1f} MB of {budget}, {evicted} cleared".format(
+                editors=usage["editors"], editor_mb=usage["editor_bytes"] / mb,
+                hibernated=usage["hibernated"], hibernated_mb=usage["hibernated_bytes"] / mb,
+                undo_mb=usage["undo_bytes"] / mb, budget=budget, evicted=usage["undo_evicted"]))
+
+    def update_link_index(self):
+        root = self.settings.vault_root
+
+        if not root:
+            path = self.tabbed_editor.get_path()
+            if not path:
+                return
+
+            if self.link_index and self.link_index.contains_path(path):
+                return
+
+            root = os.path.dirname(os.path.abspath(path))
+        elif self.link_index and self.link_index.root == os.path.abspath(root):
+            return
+
+        if not os.path.isdir(root):
+            return
+
+        if self.link_index_builder and self.link_index_builder.isRunning():
+            return
+
+        self.link_index = LinkIndex(root)
+        self.link_index_builder = LinkIndexBuilder(self.link_index, self)
+        self.link_index_builder.index_ready.connect(self.handle_link_index_ready)
+        self.link_index_builder.start()
+
+        if not (self.search_index_builder and self.search_index_builder.isRunning()):
+            self.search_panel.set_root(self.link_index.root)
+            self.search_index_builder = SearchIndexBuilder(self.search_index, self.link_index.root, self)
+            self.search_index_builder.index_ready.connect(lambda: self.search_panel.run_query())
+            self.search_index_builder.start()
+
+    def handle_link_index_ready(self, index):
+        for path in self.link_index_pending:
+            index.update_file(path)
+        self.link_index_pending.clear()
+
+        self.statusBar().showMessage("Indexed {count} notes in {root}".format(count=len(index), root=index.root), 5000)
+
+    @pyqtSlot(str)
+    def handle_pmv_link_clicked(self, link):
+        path = self.tabbed_editor.get_path()
+
+        if self.link_index is None or not path:
+            self.tabbed_editor.open_file(link, True)
+            return
+
+        target = self.link_index.resolve(path, link)
+        if target:
+            self.tabbed_editor.open_file(target)
+        else:
+            self.statusBar().showMessage("Broken link: {link}".format(link=link), 5000)
+
+    def show_links_menu(self):
+        path = self.tabbed_editor.get_path()
+        menu = QMenu(self)
+
+        if self.link_index is None or not path or path not in self.link_index:
+            action = menu.addAction("Current file is not indexed")
+            action.setEnabled(False)
+        else:
+            menu.addSection("Backlinks")
+            for source in sorted(self.link_index.backlinks(path)):
+                action = menu.addAction(os.path.relpath(source, self.link_index.root))
+                action.triggered.connect(lambda checked, source=source: self.tabbed_editor.open_file(source))
+
+            broken_links = self.link_index.broken_links(path)
+            if broken_links:
+                menu.addSection("Broken Links")
+                for target in sorted(broken_links):
+                    action = menu.addAction(os.path.relpath(target, self.link_index.root))
+                    action.setEnabled(False)
+
+        menu.exec_(QCursor.pos())
+
+    def show_search_panel(self):
+        self.update_search_index()
+        self.search_dock.show()
+        self.search_panel.focus_query()
+
+    def update_search_index(self):
+        uids = self.tabbed_editor.uids
+
+        for uid in set(self.search_keys).difference(uids):
+            self.__release_search_key(self.search_keys.pop(uid))
+
+        for tab_index, uid in enumerate(uids):
+            if uid in self.search_dirty or uid not in self.search_keys:
+                path = self.tabbed_editor.get_path(tab_index)
+                key = os.path.abspath(path) if path else "untitled:{uid}".format(uid=uid)
+
+                old_key = self.search_keys.get(uid)
+                if old_key is not None and old_key != key:
+                    self.__release_search_key(old_key)
+
+                self.search_index.update(key, self.tabbed_editor.get_text(tab_index))
+                self.search_keys[uid] = key
+
+        self.search_dirty.clear()
+
+        if self.search_dock.isVisible():
+            self.search_panel.run_query()
+
+    def __release_search_key(self, key):
+        if key in self.search_keys.values():
+            return
+
+        if self.link_index and self.link_index.contains_path(key):
+            # Still a note, searched with the text on disk once it is read
+            self.tabbed_editor.read_file_text(key)
+        else:
+            self.search_index.remove(key)
+
+    @pyqtSlot(str, object)
+    def handle_text_read(self, path, text):
+        # The file may have been opened again while it was read
+        if path in self.search_keys.values():
+            return
+
+        if text is None:
+            self.search_index.remove(path)
+        else:
+            self.search_index.update(path, text)
+
+        if self.search_dock.isVisible():
+            self.search_panel.run_query()
+
+    def insert_column(self):
+        text, ok = QInputDialog.getText(self, "Insert at Column", "Text to insert in every selected line:")
+        if ok and text:
+            self.tabbed_editor.current_editor.insert_column(text)
+
+    def show_outline_panel(self):
+        self.outline_dock.show()
+        self.update_outline()
+        self.outline_panel.tree.setFocus()
+
+    def update_outline(self):
+        uids = set(self.tabbed_editor.uids)
+        for uid in set(self.outlines).difference(uids):
+            del self.outlines[uid]
+
+        # Kept up to date lazily, the diff catches up on everything typed while hidden
+        if not self.outline_dock.isVisible():
+            return
+
+        uid = self.tabbed_editor.get_uid()
+        outline = self.outlines.setdefault(uid, Outline())
+
+        if outline.update(self.tabbed_editor.get_text()) or uid != self.outline_uid:
+            self.outline_panel.set_headings(outline.headings())
+            self.outline_uid = uid
+
+        self.outline_panel.set_current(outline.heading_at(self.tabbed_editor.current_editor.textCursor().blockNumber()))
+
+    @pyqtSlot(int)
+    def handle_heading_activated(self, index):
+        outline = self.outlines.get(self.tabbed_editor.get_uid())
+        if outline is None or index >= len(outline):
+            return
+
+        heading = outline.headings()[index]
+
+        editor = self.tabbed_editor.current_editor
+        block = editor.document().findBlockByNumber(heading.line)
+        if block.isValid():
+            editor.setTextCursor(QTextCursor(block))
+            editor.centerCursor()
+
+        if self.preview is not None:
+            self.preview.scroll_to_anchor(heading.anchor, index)
+
+    @pyqtSlot(str, int)
+    def handle_search_result_activated(self, key, offset):
+        for uid, tab_key in self.search_keys.items():
+            if tab_key == key:
+                self.tabbed_editor.show_tab(uid)
+                break
+        else:
+            if not self.tabbed_editor.open_file(key):
+                return
+
+        editor = self.tabbed_editor.current_editor
+        cursor = editor.textCursor()
+        position = utf16_position(editor.toPlainText(), offset)
+        cursor.setPosition(min(position, editor.document().characterCount() - 1))
+        editor.setTextCursor(cursor)
+        editor.centerCursor()
+        editor.setFocus()
+
     @pyqtSlot(str)
     def handle_file_saved(self, path):
         self.statusBar().showMessage("Saved {filename}".format(filename=path), 5000)
 
+        # Writes finish in the background, by then another tab may be current
+        uid = self.tabbed_editor.find_path(path)
+        if uid is not None:
+            self.search_dirty.add(uid)
+            self.update_search_index()
+
+        if self.link_index is not None:
+            if self.link_index_builder.isRunning():
+                self.link_index_pending.add(path)
+            else:
+                self.link_index.update_file(path)
+
+    @pyqtSlot(str, str)
+    def handle_save_failed(self, path, message):
+        QMessageBox.warning(self, "Save failed", "Could not save {filename}:\n{message}".format(
+            filename=path, message=message))
+
+    @pyqtSlot(str, str)
+    def handle_open_failed(self, path, message):
+        self.statusBar().showMessage("Could not open {filename}: {message}".format(
+            filename=path, message=message), 5000)
+
     def handle_text_changed(self):
+        self.search_dirty.add(self.tabbed_editor.get_uid())
         self.type_delay_tmr.start(500)
 
     def handle_tab_changed(self):
         self.update_preview()
         self.update_app_title(self.tabbed_editor.get_filename())
+        self.update_search_index()
+        self.update_outline()
+        self.update_link_index()
+
+    def new_window(self):
+        window = App(self.app, self.service)
+        window.setAttribute(Qt.WA_DeleteOnClose)
+        return window
+
+    def open_files(self, paths):
+        self.tabbed_editor.open_files([os.path.abspath(path) for path in paths])
+
+        self.setWindowState(self.windowState() & ~Qt.WindowMinimized)
+        self.raise_()
+        self.activateWindow()
+
+    @staticmethod
+    def active_window():
+        for window in reversed(App.windows):
+            if window.isActiveWindow():
+                return window
+
+        return App.windows[0]
 
     def closeEvent(self, event):
+        if not self.primary and self.tabbed_editor.has_unsaved_changes():
+            res = QMessageBox.question(
+                self, "Discard Changes?", "This window has unsaved changes. Close it anyway?")
+            if res != QMessageBox.Yes:
+                event.ignore()
+                return
+
         self.tabbed_editor.save_state()
+        self.settings.flush()
+
+        if self in App.windows:
+            App.windows.remove(self)
+
+        if self.link_index is not None and not self.link_index_builder.isRunning():
+            try:
+                self.link_index.save()
+            except OSError:
+                pass
 
     def keyPressEvent(self, e):
         if e.key() == Qt.Key_Alt:
@@ -300,6 +842,10 @@ class App(QMainWindow):
         super().keyPressEvent(e)
 
     def eventFilter(self, source, event):
+        if not self.startup_started and event.type() == QEvent.Paint and source is self:
+            self.profile.mark("first paint")
+            self.__start_deferred_stages()
+
         if self.app.activePopupWidget() is None and not self.show_menu_action.isChecked():
             if event.type() == QEvent.MouseButtonPress:
                 if not self.menuBar().isHidden():
@@ -309,11 +855,10 @@ class App(QMainWindow):
         return QMainWindow.eventFilter(self, source, event)
 
     @staticmethod
-    def convert_md_to_html(inp, out):
-        md = Markdown()
+    def convert_md_to_html(inp, out, fmt="fragment"):
+        exporter = HtmlExporter(create_parser("internal"))
 
         with io.open(inp, "r", encoding="utf-8") as i:
-            with io.open(out, "w", encoding="utf-8") as o:
-                data = i.read()
-                parsed = md.parse(data)
-                o.write(parsed)
+            data = i.read()
+
+        exporter.export(data, out, fmt, base_dir=os.path.dirname(os.path.abspath(inp)))
@@ -0,0 +1,148 @@
+import io
+import os
+import re
+import threading
+
+from urllib.parse import quote
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QSize, QStandardPaths, Qt
+from PyQt5.QtGui import QImageReader
+
+from pymarkview.export import HtmlExporter, hash_file, resolve_asset
+
+
+class ThumbnailCache:
+    SCHEME = "pmv-asset"
+
+    IMAGE_SUFFIXES = (".jpeg", ".jpg", ".png", ".gif", ".bmp", ".webp")
+
+    # Opening and closing link tags, or an image tag
+    LINK_OR_IMG = re.compile(r"<(?P<close>/?)a\b[^>]*>|(?P<img><img\b[^>]*>)", re.IGNORECASE)
+
+    MIME_TYPES = {
+        b"\x89PNG": b"image/png",
+        b"\xff\xd8\xff": b"image/jpeg",
+        b"GIF8": b"image/gif",
+        b"BM": b"image/bmp",
+        b"RIFF": b"image/webp",
+    }
+
+    def __init__(self, max_width: int = 800, cache_dir: str = None):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation), "pymarkview", "thumbnails"
+            )
+
+        self.max_width = max_width
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # (path, mtime_ns, size) -> content digest
+        self._digests = {}
+
+    def thumbnail_url(self, path: str) -> str:
+        return "{scheme}:thumb?w={width}&path={path}".format(
+            scheme=self.SCHEME, width=self.max_width, path=quote(path, safe="")
+        )
+
+    def original_url(self, path: str) -> str:
+        return "{scheme}:original?path={path}".format(scheme=self.SCHEME, path=quote(path, safe=""))
+
+    def rewrite(self, html: str, base_dir: str) -> str:
+        """ Point local image sources of rendered HTML at cached thumbnails, linked to the original images """
+        out = []
+        pos = 0
+        in_link = False
+
+        for match in self.LINK_OR_IMG.finditer(html):
+            tag = match.group("img")
+            if tag is None:
+                in_link = not match.group("close")
+                continue
+
+            src = HtmlExporter.IMG_SRC.match(tag)
+            path = resolve_asset(src.group(3), base_dir) if src else None
+            if not path or not path.lower().endswith(self.IMAGE_SUFFIXES):
+                continue
+
+            quote_char = src.group(2)
+            tag = tag[:src.start(3)] + self.thumbnail_url(path) + tag[src.end(3):]
+            # Links cannot be nested, images that are links already keep their target
+            if not in_link:
+                tag = "<a href={q}{url}{q}>{tag}</a>".format(q=quote_char, url=self.original_url(path), tag=tag)
+
+            out += (html[pos:match.start()], tag)
+            pos = match.end()
+
+        if not out:
+            return html
+
+        out.append(html[pos:])
+        return "".join(out)
+
+    def thumbnail(self, path: str, width: int = None):
+        """ Return (mime type, data) of a downscaled image, generating it only on a cache miss """
+        width = width or self.max_width
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            digest = self._digests.get(key)
+
+        if digest is None:
+            digest = hash_file(path)
+            if digest is not None:
+                with self._lock:
+                    self._digests[key] = digest
+
+        # Without a digest of the file the thumbnail is generated but not cached
+        thumb_path = None
+        if digest is not None:
+            thumb_path = os.path.join(self.cache_dir, "{digest}_{width}".format(digest=digest, width=width))
+
+            if os.path.exists(thumb_path):
+                return self.__read(thumb_path)
+
+        reader = QImageReader(path)
+        size = reader.size()
+
+        # Small and animated images are served as they are
+        if not size.isValid() or size.width() <= width or (reader.supportsAnimation() and reader.imageCount() > 1):
+            return self.original(path)
+
+        reader.setScaledSize(size.scaled(QSize(width, size.height()), Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return self.original(path)
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "PNG" if image.hasAlphaChannel() else "JPEG", 85)
+        buffer.close()
+        data = bytes(data)
+
+        if thumb_path is not None:
+            tmp_path = "{path}.{id}.tmp".format(path=thumb_path, id=threading.get_ident())
+            with io.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, thumb_path)
+
+        return self.__mime_type(data), data
+
+    def original(self, path: str):
+        return self.__read(path)
+
+    def __read(self, path):
+        with io.open(path, "rb") as f:
+            data = f.read()
+
+        return self.__mime_type(data), data
+
+    def __mime_type(self, data):
+        for magic, mime_type in self.MIME_TYPES.items():
+            if data.startswith(magic):
+                return mime_type
+
+        return b"application/octet-stream"
@@ -0,0 +1,74 @@
+import re
+
+
+LIST_MARKER = re.compile(r"^(\s*)([*+-]|\d+\.)\s+")
+INDENTATION = re.compile(r"^\s*")
+
+
+def indent(lines: list, width: int) -> list:
+    prefix = " " * width
+    return [prefix + line for line in lines]
+
+
+def unindent(lines: list, width: int) -> list:
+    result = []
+
+    for line in lines:
+        spaces = len(line) - len(line.lstrip(" "))
+        result.append(line[min(spaces, width):])
+
+    return result
+
+
+def toggle_list(lines: list, marker: str = "*") -> list:
+    """ Remove the list markers if every non-blank line has one, otherwise add them where missing """
+    content_lines = [line for line in lines if line.strip()]
+
+    if content_lines and all(LIST_MARKER.match(line) for line in content_lines):
+        return [LIST_MARKER.sub(r"\1", line, count=1) for line in lines]
+
+    result = []
+    for line in lines:
+        if line.strip() and not LIST_MARKER.match(line):
+            indentation = INDENTATION.match(line).group(0)
+            line = indentation + marker + " " + line[len(indentation):]
+        result.append(line)
+
+    return result
+
+
+def toggle_emphasis(lines: list, marker: str = "*") -> list:
+    """ Wrap the content of every non-blank line in marker, or unwrap it if all lines are wrapped """
+
+    def split(line):
+        prefix = (LIST_MARKER.match(line) or INDENTATION.match(line)).group(0)
+        return prefix, line[len(prefix):]
+
+    parts = [split(line) for line in lines]
+    contents = [content for _, content in parts if content.strip()]
+
+    unwrap = bool(contents) and all(is_wrapped(content, marker) for content in contents)
+
+    result = []
+    for (prefix, content), line in zip(parts, lines):
+        if not content.strip():
+            result.append(line)
+        elif unwrap:
+            result.append(prefix + content[len(marker):-len(marker)])
+        else:
+            result.append(prefix + marker + content + marker)
+
+    return result
+
+
+def is_wrapped(text: str, marker: str) -> bool:
+    return len(text) >= 2 * len(marker) and text.startswith(marker) and text.endswith(marker)
+
+
+def insert_column(lines: list, column: int, text: str) -> list:
+    """ Insert text at column in every line, padding short lines with spaces """
+    return [line[:column].ljust(column) + text + line[column:] for line in lines]
+
+
+def delete_column(lines: list, column: int, count: int) -> list:
+    return [line[:column] + line[column + count:] for line in lines]
@@ -0,0 +1,278 @@
+import base64
+import hashlib
+import html
+import io
+import mimetypes
+import multiprocessing
+import os
+import re
+import shutil
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pymarkview.markdown import create_parser
+from pymarkview.resources.defaults import document_template, mathjax, stylesheet
+from pymarkview.util import iter_files
+
+
+class HtmlExporter:
+    FORMATS = ("html", "fragment")
+
+    SUFFIXES = (".md", ".txt")
+
+    ASSET_DIR = "assets"
+
+    IMG_SRC = re.compile(r"""(<img\b[^>]*?\bsrc=)(['"])(.*?)\2""", re.IGNORECASE)
+    PMV_HREF = re.compile(r"""(<a\b[^>]*?\bhref=)(['"])pmv://(.*?)\2""", re.IGNORECASE)
+
+    def __init__(self, md, max_workers=None, executor=None):
+        self.md = md
+        self.max_workers = max_workers
+        self.executor = executor
+
+    def export(self, text: str, out_path: str, fmt: str = "html", base_dir: str = ".", include_mathjax=False) -> None:
+        if fmt == "html":
+            title = os.path.splitext(os.path.basename(out_path))[0]
+            out = self.render_document(text, title, base_dir, include_mathjax)
+        elif fmt == "fragment":
+            out = self.md(text)
+        else:
+            raise ExportError("Unknown export format '{fmt}'".format(fmt=fmt))
+
+        with io.open(out_path, "w", encoding="utf-8") as f:
+            f.write(out)
+
+    def render_document(self, text: str, title: str = "", base_dir: str = ".", include_mathjax=False) -> str:
+        body = self.inline_assets(self.md(text), base_dir)
+        return self.wrap_document(body, title, include_mathjax)
+
+    @staticmethod
+    def wrap_document(body: str, title: str = "", include_mathjax=False, base_url: str = None) -> str:
+        head = stylesheet + (mathjax if include_mathjax else "")
+        if base_url:
+            head = "<base href='{url}'>".format(url=html.escape(base_url)) + head
+
+        return document_template.format(title=html.escape(title), head=head, body=body)
+
+    def inline_assets(self, body: str, base_dir: str) -> str:
+        """ Replace local image sources with base64 data URIs, reading the files concurrently """
+        paths = {}
+        for match in self.IMG_SRC.finditer(body):
+            path = resolve_asset(match.group(3), base_dir)
+            if path:
+                paths[match.group(3)] = path
+
+        if not paths:
+            return body
+
+        unique_paths = sorted(set(paths.values()))
+        if self.executor is not None:
+            loaded = dict(zip(unique_paths, self.executor.map(load_asset, unique_paths)))
+        else:
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                loaded = dict(zip(unique_paths, pool.map(load_asset, unique_paths)))
+
+        # Identical content behind different paths shares one data URI
+        uris = {}
+        uri_by_digest = {}
+        for path, asset in loaded.items():
+            if asset is not None:
+                digest, uri = asset
+                uris[path] = uri_by_digest.setdefault(digest, uri)
+
+        def repl(match):
+            uri = uris.get(paths.get(match.group(3)))
+            if uri is None:
+                return match.group(0)
+            return match.group(1) + match.group(2) + uri + match.group(2)
+
+        return self.IMG_SRC.sub(repl, body)
+
+    def export_site(self, root: str, out_dir: str, parser_name: str, highlight: bool = False) -> int:
+        """ Render every note below root into a static site in out_dir """
+        root = os.path.abspath(root)
+        out_dir = os.path.abspath(out_dir)
+
+        sources = [path for path, _ in iter_files(root, self.SUFFIXES)
+                   if not path.startswith(out_dir + os.sep)]
+
+        with worker_pool(self.max_workers) as pool:
+            bodies = list(pool.map(render_file, [parser_name] * len(sources), sources, [highlight] * len(sources),
+                                   chunksize=16))
+
+        # Resolve all referenced assets and copy each distinct content once
+        page_assets = []
+        for source, body in zip(sources, bodies):
+            base_dir = os.path.dirname(source)
+            page_assets.append({src: resolve_asset(src, base_dir) for _, _, src in self.IMG_SRC.findall(body)})
+
+        unique_paths = sorted({path for assets in page_assets for path in assets.values() if path})
+
+        asset_dir = os.path.join(out_dir, self.ASSET_DIR)
+        os.makedirs(asset_dir, exist_ok=True)
+
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            digests = dict(zip(unique_paths, pool.map(hash_file, unique_paths)))
+
+            targets = {}
+            copies = {}
+            for path, digest in digests.items():
+                if digest is not None:
+                    target = os.path.join(asset_dir, digest + os.path.splitext(path)[1].lower())
+                    targets[path] = target
+                    copies.setdefault(target, path)
+
+            list(pool.map(shutil.copyfile, copies.values(), copies.keys()))
+
+            pages = []
+            for source, body, assets in zip(sources, bodies, page_assets):
+                page_path = os.path.join(out_dir, self.__page_name(os.path.relpath(source, root)))
+                page_dir = os.path.dirname(page_path)
+
+                body = self.IMG_SRC.sub(
+                    lambda m: self.__relative_src(m, targets.get(assets.get(m.group(3))), page_dir), body
+                )
+                body = self.PMV_HREF.sub(
+                    lambda m: m.group(1) + m.group(2) + self.__page_name(m.group(3)) + m.group(2), body
+                )
+
+                title = os.path.splitext(os.path.basename(source))[0]
+                pages.append((page_path, self.wrap_document(body, title)))
+
+            if not any(path == os.path.join(out_dir, "index.html") for path, _ in pages):
+                pages.append((os.path.join(out_dir, "index.html"), self.__site_index(root, sources)))
+
+            list(pool.map(write_page, *zip(*pages)))
+
+        return len(sources)
+
+    def __site_index(self, root, sources):
+        items = "".join("<li><a href='{href}'>{name}</a></li>".format(
+            href=html.escape(self.__page_name(os.path.relpath(source, root)).replace(os.sep, "/")),
+            name=html.escape(os.path.relpath(source, root))
+        ) for source in sorted(sources))
+
+        return self.wrap_document("<ul>{items}</ul>".format(items=items), os.path.basename(root))
+
+    def __page_name(self, path):
+        base, ext = os.path.splitext(path)
+        return base + ".html" if ext.lower() in self.SUFFIXES else path
+
+    @staticmethod
+    def __relative_src(match, target, page_dir):
+        if target is None:
+            return match.group(0)
+
+        src = os.path.relpath(target, page_dir).replace(os.sep, "/")
+        return match.group(1) + match.group(2) + src + match.group(2)
+
+
+class SiteExporter(QThread):
+    export_finished = pyqtSignal(int, str)
+    export_failed = pyqtSignal(str)
+
+    def __init__(self, root, out_dir, parser_name, highlight=False, *args):
+        super().__init__(*args)
+
+        self._root = root
+        self._out_dir = out_dir
+        self._parser_name = parser_name
+        self._highlight = highlight
+
+    def run(self):
+        exporter = HtmlExporter(create_parser(self._parser_name, self._highlight))
+
+        try:
+            count = exporter.export_site(self._root, self._out_dir, self._parser_name, self._highlight)
+        except Exception as e:
+            self.export_failed.emit(str(e))
+        else:
+            self.export_finished.emit(count, self._out_dir)
+
+
+class ExportError(Exception):
+
+    def __init__(self, message):
+        super().__init__(message)
+
+
+_parsers = {}
+
+
+def worker_pool(max_workers: int = None) -> ProcessPoolExecutor:
+    """ Process pool for render_file, workers are spawned since forking a process running Qt threads is unsafe """
+    return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def render_file(parser_name: str, path: str, highlight: bool = False) -> str:
+    """ Render a Markdown file, parsers are cached per worker process """
+    key = (parser_name, highlight)
+    if key not in _parsers:
+        _parsers[key] = create_parser(parser_name, highlight)
+
+    with io.open(path, "r", encoding="utf-8", errors="replace") as f:
+        return _parsers[key](f.read())
+
+
+def render_document_file(parser_name: str, path: str, out_path: str, highlight: bool = False) -> str:
+    """ Render a Markdown file into a standalone document at out_path, relative links resolve next to the source """
+    body = render_file(parser_name, path, highlight)
+
+    title = os.path.splitext(os.path.basename(path))[0]
+    base_url = Path(os.path.dirname(os.path.abspath(path))).as_uri() + "/"
+    write_page(out_path, HtmlExporter.wrap_document(body, title, base_url=base_url))
+
+    return out_path
+
+
+def resolve_asset(src: str, base_dir: str):
+    url = urlparse(src)
+
+    if url.scheme == "file":
+        path = url2pathname(url.path)
+    elif url.scheme and len(url.scheme) > 1:
+        # http(s), data and other remote sources; single letters are Windows drives
+        return None
+    else:
+        path = os.path.join(base_dir, unquote(src))
+
+    path = os.path.abspath(path)
+    return path if os.path.isfile(path) else None
+
+
+def load_asset(path: str):
+    try:
+        with io.open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    uri = "data:{mime};base64,{data}".format(mime=mime_type, data=base64.b64encode(data).decode("ascii"))
+
+    return hashlib.sha1(data).hexdigest(), uri
+
+
+def hash_file(path: str):
+    digest = hashlib.sha1()
+
+    try:
+        with io.open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+def write_page(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(content)
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class FileWriter(QObject):
+    file_written = pyqtSignal(str, object)
+    write_failed = pyqtSignal(str, object, str)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+
+        # path -> (text, token), newer requests replace pending ones
+        self._pending = OrderedDict()
+        self._busy = False
+        self._cond = threading.Condition()
+
+        self._thread = threading.Thread(target=self.__run, name="FileWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, text: str, token=None) -> None:
+        with self._cond:
+            self._pending.pop(path, None)
+            self._pending[path] = (text, token)
+            self._cond.notify_all()
+
+    def is_pending(self, path: str) -> bool:
+        with self._cond:
+            return path in self._pending
+
+    def flush(self, timeout: float = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def __run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                path, (text, token) = self._pending.popitem(last=False)
+                self._busy = True
+
+            try:
+                self.write_atomic(path, text)
+            except OSError as e:
+                self.write_failed.emit(path, token, str(e))
+            else:
+                self.file_written.emit(path, token)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    @staticmethod
+    def write_atomic(path: str, data) -> None:
+        """ Write text or bytes to a temporary file, fsync it and rename it over path """
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".{name}.".format(name=name), suffix=".tmp", dir=directory)
+
+        try:
+            if isinstance(data, bytes):
+                f = io.open(fd, "wb")
+            else:
+                f = io.open(fd, "w", encoding="utf-8")
+
+            with f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except OSError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
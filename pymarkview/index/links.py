@@ -0,0 +1,216 @@
+import io
+import json
+import os
+import re
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pymarkview.util import iter_files
+
+
+class LinkIndex:
+    FILE = ".pmv_links.json"
+    VERSION = 1
+
+    SUFFIXES = (".md", ".txt")
+
+    WIKI_LINK = re.compile(r"\[\[(.*?)\]\]")
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+        self._lock = threading.RLock()
+        self._dirty = False
+
+        # path -> (mtime_ns, size, links)
+        self._files = {}
+        # source path -> set of target paths
+        self._outgoing = {}
+        # target path -> set of source paths (targets may not exist)
+        self._incoming = {}
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._files
+
+    def contains_path(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(self.root, self.FILE)
+
+    def resolve(self, source: str, link: str):
+        target = self.__target_path(os.path.abspath(source), link)
+
+        if target in self._files or os.path.isfile(target):
+            return target
+
+        return None
+
+    def outgoing(self, path: str) -> set:
+        return self._outgoing.get(os.path.abspath(path), set())
+
+    def backlinks(self, path: str) -> set:
+        return self._incoming.get(os.path.abspath(path), set())
+
+    def broken_links(self, path: str = None) -> dict:
+        """ Map unresolvable targets to the notes linking them """
+        with self._lock:
+            if path is not None:
+                path = os.path.abspath(path)
+                return {target: {path} for target in self._outgoing.get(path, ())
+                        if not self.__exists(target)}
+
+            return {target: set(sources) for target, sources in self._incoming.items()
+                    if not self.__exists(target)}
+
+    def build(self) -> None:
+        files = {}
+
+        for path, stat in iter_files(self.root, self.SUFFIXES):
+            cached = self._files.get(path)
+
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                files[path] = cached
+            else:
+                files[path] = (stat.st_mtime_ns, stat.st_size, self.__read_links(path))
+
+        outgoing = {}
+        incoming = {}
+
+        for path, (_, _, links) in files.items():
+            targets = {self.__target_path(path, link) for link in links}
+            outgoing[path] = targets
+
+            for target in targets:
+                incoming.setdefault(target, set()).add(path)
+
+        with self._lock:
+            self._dirty = self._dirty or files.keys() != self._files.keys() or any(
+                files[path] is not self._files.get(path) for path in files)
+            self._files = files
+            self._outgoing = outgoing
+            self._incoming = incoming
+
+    def update_file(self, path: str, text: str = None) -> None:
+        path = os.path.abspath(path)
+
+        if not self.contains_path(path) or not path.lower().endswith(self.SUFFIXES):
+            return
+
+        with self._lock:
+            self.__remove(path)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._dirty = True
+                return
+
+            links = self.__read_links(path) if text is None else self.__extract_links(text)
+            self.__add(path, (stat.st_mtime_ns, stat.st_size, links))
+            self._dirty = True
+
+    def remove_file(self, path: str) -> None:
+        with self._lock:
+            self.__remove(os.path.abspath(path))
+            self._dirty = True
+
+    def load(self) -> bool:
+        try:
+            with io.open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if state.get("version") != self.VERSION:
+            return False
+
+        files = {}
+        for rel_path, (mtime_ns, size, links) in state["files"].items():
+            files[os.path.join(self.root, rel_path)] = (mtime_ns, size, tuple(links))
+
+        with self._lock:
+            self._files = files
+
+        return True
+
+    def save(self, force: bool = False) -> None:
+        with self._lock:
+            if not (self._dirty or force):
+                return
+
+            state = {
+                "version": self.VERSION,
+                "files": {
+                    os.path.relpath(path, self.root): [mtime_ns, size, list(links)]
+                    for path, (mtime_ns, size, links) in self._files.items()
+                }
+            }
+            self._dirty = False
+
+        tmp_file = self.state_file + ".tmp"
+        with io.open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def __add(self, path, entry):
+        self._files[path] = entry
+
+        targets = {self.__target_path(path, link) for link in entry[2]}
+        self._outgoing[path] = targets
+
+        for target in targets:
+            self._incoming.setdefault(target, set()).add(path)
+
+    def __remove(self, path):
+        self._files.pop(path, None)
+
+        for target in self._outgoing.pop(path, ()):
+            sources = self._incoming.get(target)
+            if sources:
+                sources.discard(path)
+                if not sources:
+                    del self._incoming[target]
+
+    def __exists(self, target):
+        return target in self._files or os.path.isfile(target)
+
+    def __read_links(self, path):
+        try:
+            with io.open(path, "r", encoding="utf-8", errors="replace") as f:
+                return self.__extract_links(f.read())
+        except OSError:
+            return ()
+
+    def __extract_links(self, text):
+        return tuple(dict.fromkeys(self.WIKI_LINK.findall(text)))
+
+    @staticmethod
+    def __target_path(source, link):
+        return os.path.normpath(os.path.join(os.path.dirname(source), link))
+
+
+class LinkIndexBuilder(QThread):
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, index, *args):
+        super().__init__(*args)
+
+        self._index = index
+
+    def run(self):
+        self._index.load()
+        self._index.build()
+
+        try:
+            self._index.save()
+        except OSError:
+            pass
+
+        self.index_ready.emit(self._index)
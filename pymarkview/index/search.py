@@ -0,0 +1,198 @@
+import io
+import threading
+
+from array import array
+from collections import defaultdict, namedtuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pymarkview.util import iter_files
+
+
+SearchResult = namedtuple("SearchResult", ["key", "offset", "line", "snippet"])
+
+
+class SearchIndex:
+    GRAM_SIZE = 3
+
+    SNIPPET_WIDTH = 40
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+        # key -> original text
+        self._texts = {}
+        # key -> lowercased text
+        self._folded = {}
+        # key -> offset in the original text of every lowercased character, only for the texts that lowercasing
+        # changes the length of ("İ" becomes two code points)
+        self._origins = {}
+        # key -> set of trigrams
+        self._grams = {}
+        # trigram -> set of keys
+        self._postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def keys(self):
+        return list(self._texts)
+
+    def update(self, key: str, text: str, replace: bool = True) -> None:
+        folded, origins = self.__fold(text)
+        grams = self.__grams(folded)
+
+        with self._lock:
+            if key in self._texts and (not replace or self._texts[key] == text):
+                return
+
+            old_grams = self._grams.get(key, frozenset())
+
+            for gram in old_grams - grams:
+                keys = self._postings[gram]
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+            postings = self._postings
+            for gram in grams - old_grams:
+                postings[gram].add(key)
+
+            self._texts[key] = text
+            self._folded[key] = folded
+            self._grams[key] = grams
+
+            if origins is None:
+                self._origins.pop(key, None)
+            else:
+                self._origins[key] = origins
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            for gram in self._grams.pop(key, ()):
+                keys = self._postings[gram]
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+            self._texts.pop(key, None)
+            self._folded.pop(key, None)
+            self._origins.pop(key, None)
+
+    def candidates(self, query: str) -> set:
+        folded = query.lower()
+
+        with self._lock:
+            if len(folded) < self.GRAM_SIZE:
+                return set(self._texts)
+
+            postings = sorted(
+                (self._postings.get(gram, ()) for gram in self.__grams(folded)),
+                key=len
+            )
+
+            if not postings or not postings[0]:
+                return set()
+
+            keys = set(postings[0])
+            for other in postings[1:]:
+                keys.intersection_update(other)
+                if not keys:
+                    break
+
+            return keys
+
+    def search(self, query: str, limit: int = 200) -> list:
+        folded = query.lower()
+        results = []
+
+        if not folded:
+            return results
+
+        with self._lock:
+            for key in sorted(self.candidates(folded)):
+                text = self._texts[key]
+                haystack = self._folded[key]
+                origins = self._origins.get(key)
+
+                line = 1
+                line_offset = 0
+                offset = haystack.find(folded)
+
+                while offset != -1:
+                    line += haystack.count("\n", line_offset, offset)
+                    line_offset = offset
+
+                    if origins is None:
+                        start, end = offset, offset + len(folded)
+                    else:
+                        start, end = origins[offset], origins[offset + len(folded) - 1] + 1
+
+                    results.append(SearchResult(key, start, line, self.__snippet(text, start, end - start)))
+                    if len(results) >= limit:
+                        return results
+
+                    offset = haystack.find(folded, offset + len(folded))
+
+        return results
+
+    @staticmethod
+    def __fold(text):
+        """ Lowercased text and the origins of its characters, None when lowercasing keeps the offsets """
+        folded = text.lower()
+        if len(folded) == len(text):
+            return folded, None
+
+        folded = []
+        origins = array("L")
+        for offset, char in enumerate(text):
+            lower = char.lower()
+            folded.append(lower)
+            origins.extend([offset] * len(lower))
+
+        return "".join(folded), origins
+
+    def __grams(self, folded):
+        size = self.GRAM_SIZE
+        return {folded[i:i + size] for i in range(len(folded) - size + 1)}
+
+    def __snippet(self, text, offset, length):
+        start = text.rfind("\n", max(0, offset - self.SNIPPET_WIDTH), offset) + 1
+        if start == 0:
+            start = max(0, offset - self.SNIPPET_WIDTH)
+
+        end = text.find("\n", offset + length, offset + length + self.SNIPPET_WIDTH)
+        if end == -1:
+            end = offset + length + self.SNIPPET_WIDTH
+
+        return text[start:end].strip()
+
+
+class SearchIndexBuilder(QThread):
+    index_ready = pyqtSignal(object)
+
+    SUFFIXES = (".md", ".txt")
+
+    def __init__(self, index, root, *args):
+        super().__init__(*args)
+
+        self._index = index
+        self._root = root
+
+    def run(self):
+        for path, _ in iter_files(self._root, self.SUFFIXES):
+            if path in self._index:
+                continue
+
+            try:
+                with io.open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+
+            self._index.update(path, text, replace=False)
+
+        self.index_ready.emit(self._index)
@@ -0,0 +1,74 @@
+import getpass
+import json
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+
+class SingleInstance(QObject):
+    CONNECT_TIMEOUT = 500
+
+    files_received = pyqtSignal(list)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+
+        self.server_name = "pymarkview-{user}".format(user=getpass.getuser())
+        self._server = None
+        self._buffers = {}
+
+    def forward(self, files: list) -> bool:
+        """ Hand files over to a running instance, returns False if there is none """
+        socket = QLocalSocket()
+        socket.connectToServer(self.server_name)
+
+        if not socket.waitForConnected(self.CONNECT_TIMEOUT):
+            return False
+
+        socket.write((json.dumps({"files": files}) + "\n").encode("utf-8"))
+        socket.waitForBytesWritten(self.CONNECT_TIMEOUT)
+        socket.disconnectFromServer()
+
+        if socket.state() != QLocalSocket.UnconnectedState:
+            socket.waitForDisconnected(self.CONNECT_TIMEOUT)
+
+        return True
+
+    def listen(self) -> bool:
+        self._server = QLocalServer(self)
+        self._server.newConnection.connect(self.__new_connection)
+
+        if not self._server.listen(self.server_name):
+            # Left over by a crashed instance
+            QLocalServer.removeServer(self.server_name)
+            return self._server.listen(self.server_name)
+
+        return True
+
+    def __new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._buffers[socket] = b""
+
+            socket.readyRead.connect(lambda socket=socket: self.__read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.__disconnected(socket))
+
+    def __read(self, socket):
+        self._buffers[socket] += bytes(socket.readAll())
+
+        while b"\n" in self._buffers[socket]:
+            line, _, self._buffers[socket] = self._buffers[socket].partition(b"\n")
+
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+
+            self.files_received.emit([str(path) for path in message.get("files", [])])
+
+    def __disconnected(self, socket):
+        if socket.bytesAvailable():
+            self.__read(socket)
+
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
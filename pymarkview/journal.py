@@ -0,0 +1,158 @@
+import io
+import json
+import os
+
+
+class EditJournal:
+    FILE = ".pmv_journal"
+
+    OPEN = "o"
+    PATH = "p"
+    CHANGE = "c"
+    SAVED = "s"
+    CLOSE = "x"
+    TEXT = "t"
+
+    def __init__(self, path: str = FILE):
+        self._path = path
+        self._buffer = []
+        self._file = None
+        self._size = 0
+
+        self.generation = 0
+        self.suspended = False
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def record_open(self, uid: int, index: int, path: str = None) -> None:
+        self.__record([self.OPEN, uid, index, path])
+
+    def record_path(self, uid: int, path: str) -> None:
+        self.__record([self.PATH, uid, path])
+
+    def record_change(self, uid: int, position: int, removed: int, text: str) -> None:
+        self.__record([self.CHANGE, uid, position, removed, text])
+
+    def record_text(self, uid: int, text: str) -> None:
+        """ The whole text of a tab, later changes are relative to it """
+        self.__record([self.TEXT, uid, text])
+
+    def record_saved(self, uid: int) -> None:
+        self.__record([self.SAVED, uid])
+
+    def record_close(self, uid: int) -> None:
+        self.__record([self.CLOSE, uid])
+
+    def flush(self, sync: bool = True) -> None:
+        if not self._buffer:
+            return
+
+        if self._file is None:
+            self._file = io.open(self._path, "a", encoding="utf-8")
+            if self._file.tell() == 0:
+                self._file.write(json.dumps({"generation": self.generation}) + "\n")
+
+        data = "".join(json.dumps(record) + "\n" for record in self._buffer)
+        self._buffer.clear()
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def reset(self, generation: int) -> None:
+        """ Start an empty journal that applies on top of the snapshot of the given generation """
+        self.close()
+        self._buffer.clear()
+        self._size = 0
+        self.generation = generation
+
+        with io.open(self._path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": generation}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self, generation: int) -> list:
+        records = []
+
+        try:
+            with io.open(self._path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("generation") != generation:
+                    return records
+
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Torn write of the last record
+                        break
+        except (OSError, ValueError):
+            pass
+
+        return records
+
+    @classmethod
+    def replay(cls, state: dict, records: list) -> dict:
+        """ Apply journal records to a saved TabbedEditor state """
+        mapping = state["mapping"]["__mapping"]
+        tab_state = state["tab_state"]
+
+        # Qt positions count UTF-16 code units, so changes are applied to the UTF-16 text of the tabs
+        buffers = {}
+
+        for record in records:
+            kind, uid = record[0], record[1]
+
+            if kind == cls.OPEN:
+                index, path = record[2], record[3]
+                if uid not in tab_state:
+                    mapping.insert(min(index, len(mapping)), uid)
+                    tab_state[uid] = {"modified": False, "path": path, "text": ""}
+                state["mapping"]["__mapping_uid"] = max(state["mapping"]["__mapping_uid"], uid + 1)
+                continue
+
+            tab = tab_state.get(uid)
+            if tab is None:
+                continue
+
+            if kind == cls.CHANGE:
+                position, removed, text = record[2] * 2, record[3] * 2, record[4]
+                if uid not in buffers:
+                    buffers[uid] = bytearray(tab["text"].encode("utf-16-le", "surrogatepass"))
+                buffers[uid][position:position + removed] = text.encode("utf-16-le", "surrogatepass")
+                tab["modified"] = True
+            elif kind == cls.TEXT:
+                tab["text"] = record[2]
+                buffers.pop(uid, None)
+            elif kind == cls.PATH:
+                tab["path"] = record[2]
+            elif kind == cls.SAVED:
+                tab["modified"] = False
+            elif kind == cls.CLOSE:
+                mapping.remove(uid)
+                del tab_state[uid]
+                buffers.pop(uid, None)
+
+        for uid, buffer in buffers.items():
+            tab_state[uid]["text"] = buffer.decode("utf-16-le", "surrogatepass")
+
+        state["active_tab"] = min(state["active_tab"], max(len(mapping) - 1, 0))
+
+        return state
+
+    def __record(self, record):
+        if not self.suspended:
+            self._buffer.append(record)
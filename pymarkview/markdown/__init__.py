@@ -0,0 +1,32 @@
+from typing import Callable
+
+
+def create_parser(name: str, highlight: bool = False) -> Callable[[str], str]:
+    if name == "internal":
+        from pymarkview.markdown.markdown import Markdown
+        from pymarkview.markdown.highlight import highlighter
+        return Markdown(highlighter if highlight else None).parse
+    elif name == "markdown2":
+        from markdown2 import Markdown
+        extras = {"cuddled-lists": None, "code-friendly": None, "header-ids": None}
+        if highlight:
+            # markdown2 highlights fenced code itself whenever Pygments is installed
+            extras["fenced-code-blocks"] = {"noclasses": True}
+        else:
+            extras.update({"fenced-code-blocks": None, "highlightjs-lang": None})
+        return Markdown(extras=extras).convert
+    else:
+        raise Exception("No Markdown parser selected!")
+
+
+def parse(text: str):
+    """ Parse Markdown into a pymarkview.markdown.tree.Document """
+    from pymarkview.markdown.tree import Parser
+    return Parser().parse(text)
+
+
+def render_html(document, highlight: bool = False) -> str:
+    """ HTML of a tree, the preview and exports use the parser of create_parser instead """
+    from pymarkview.markdown.tree import HtmlRenderer
+    from pymarkview.markdown.highlight import highlighter
+    return HtmlRenderer(highlighter if highlight else None).render(document)
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+
+class CodeHighlighter:
+    """ Pygments highlighting of code blocks, memoized by language and content """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._lexers = {}
+        self._formatter = None
+        self._available = None
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            try:
+                from pygments.formatters import HtmlFormatter
+            except ImportError:
+                self._available = False
+            else:
+                # Inline styles, the preview and exported pages need no extra stylesheet
+                self._formatter = HtmlFormatter(nowrap=True, noclasses=True)
+                self._available = True
+
+        return self._available
+
+    def highlight(self, code: str, lang: str):
+        """ Highlighted HTML for code, None if the language is unknown or Pygments is not installed """
+        if not lang or not self.available:
+            return None
+
+        key = (lang.lower(), hashlib.sha1(code.encode("utf-8")).digest())
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+
+        lexer = self.__lexer(key[0])
+        if lexer is None:
+            return None
+
+        from pygments import highlight
+
+        html = highlight(code, lexer, self._formatter)
+        if html.endswith("\n") and not code.endswith("\n"):
+            html = html[:-1]
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = html
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return html
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __lexer(self, lang):
+        # Lexer modules are only imported when a language is first seen
+        if lang not in self._lexers:
+            from pygments.lexers import get_lexer_by_name
+            from pygments.util import ClassNotFound
+
+            try:
+                self._lexers[lang] = get_lexer_by_name(lang)
+            except ClassNotFound:
+                self._lexers[lang] = None
+
+        return self._lexers[lang]
+
+
+highlighter = CodeHighlighter()
@@ -3,8 +3,32 @@ import re
 from collections import OrderedDict
 from typing import Union, Callable
 
+from pymarkview.markdown.outline import AnchorIds
+
 
 class Markdown:
+    FENCE = re.compile(r"^\s*`{3}")
+    ATX_HEADER = re.compile(r"^ {0,3}(#+)\s(.*)")
+    SETEXT_UNDERLINE = re.compile(r"^(\={3,}|\-{3,})\s*$")
+    THEMATIC_BREAK = re.compile(r"^\s{0,3}(\*{3,}|_{3,}|-{3,})\s*$")
+    BLOCKQUOTE = re.compile(r"^\s{0,3}>\s?")
+    LIST_ITEM_LINE = re.compile(r"^(\s*)([*+-]|\d+\.)\s+")
+    TABLE_DELIMITER = re.compile(r"^ {0,3}\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+    TABLE_CELL_SEPARATOR = re.compile(r"(?<!\\)\|")
+    TASK_ITEM = re.compile(r"^\[([ xX])\]\s")
+    LIST_ITEM = re.compile(r"(?:[*+-]|\d+\.)[^\S\n]")
+    STARTS_WITH_TAG = re.compile(r"^<\/?(li|h|p|block|img|hr|ul|ol|pre|table)")
+    CODE_BLOCK = re.compile(r"(?s)\n`{3}([\S]+)?\n(.*?)\n`{3}")
+    CODE_SPAN = re.compile(r"\`(.*?)\`")
+
+    # Stands in for rendered code while the other rules run, the code is put back last
+    STASH_PLACEHOLDER = "\x02{index}\x03"
+    STASHED = re.compile("\x02(\\d+)\x03")
+
+    # Indexed by header level
+    HEADER_OPEN = ["<h{level} id='".format(level=level) for level in range(7)]
+    HEADER_CLOSE = ["</h{level}>".format(level=level) for level in range(7)]
+
     class RuleSetContainer:
         def __init__(self):
             self._rules = OrderedDict()
@@ -12,15 +36,20 @@ class Markdown:
         def __call__(self):
             return self._rules.items()
 
-        def add_rule(self, rule: str, repl: Union[str, Callable[[str], str]]):
-            print(type(repl))
+        def add_rule(self, rule: str, repl: Union[str, Callable[[re.Match, list], None]]):
+            """ repl is a substitution template or a handler writing the HTML of a match into a buffer """
             key = re.compile(rule)
             self._rules[key] = repl
 
-    def __init__(self):
+        def add_pass(self, function: Callable[[str], str]):
+            """ Block pass over the whole text, run in order with the rules """
+            self._rules[function] = None
+
+    def __init__(self, highlighter=None):
+        self._anchor_ids = AnchorIds()
+        self._highlighter = highlighter
+
         self.rules_cont = Markdown.RuleSetContainer()
-        self.rules_cont.add_rule(r"(?m)^ {0,3}(#+)\s(.*)", self._html_header)
-        self.rules_cont.add_rule(r"([^\n]+)\n(\={3,}|\-{3,})", self._html_header_alt)
         self.rules_cont.add_rule(r"\n\s{0,3}(\*{3,}|\_{3,}|\-{3,})\n", "<hr>")
         self.rules_cont.add_rule(r"\[\!\[(.*?)\]\((.*?)\)\]\((.*?)\)", r"<a href='\3'><img src='\2' alt='\1'/></a>")
         self.rules_cont.add_rule(r"\!\[([^\[]+)\]\(([^\)]+)\)", r"<img src='\2' alt='\1'>")
@@ -28,99 +57,284 @@ class Markdown:
         self.rules_cont.add_rule(r"(\*\*|__)(.*?)\1", r"<strong>\2</strong>")
         self.rules_cont.add_rule(r"(\*|_)(.*?)\1", r"<em>\2</em>")
         self.rules_cont.add_rule(r"(\~\~)(.*?)\1", r"<del>\2</del>")
-        self.rules_cont.add_rule(r"(?s)\n`{3}([\S]+)?\n(.*?)\n`{3}", self._html_pre)
         # self.rules_cont.add_rule(r"(?m)^((?:(?:[ ]{4}|\t).*(\n|$))+)", r"<pre>\1</pre>")
-        self.rules_cont.add_rule(r"\`(.*?)\`", self._html_code)
-        self.rules_cont.add_rule(r"(?sm)(^(?:[*+-]|\d+\.)\s(.*?)(?:\n{2,}))", self._html_list)
+        self.rules_cont.add_pass(self._html_lists)
         self.rules_cont.add_rule(r"(?s)\n\>\s(.*?)(?:$|\n{2,})", self._html_blockquote)
         self.rules_cont.add_rule(r"\<(http.*?)\>", r"<a href='\1'>\1</a>")
         self.rules_cont.add_rule(r"\[\[(.*?)\]\]", r"<a href='pmv://\1'>📁\1</a>")
         self.rules_cont.add_rule(r"(?s)(.*?[^\:\-\,])(?:$|\n{2,})", self._html_parag)
 
-    def parse(self, text: str) -> str:
-        text = "\n{}\n\n".format(text)
+    def parse(self, text: str, anchor_ids: AnchorIds = None) -> str:
+        """ anchor_ids continues the heading ids of the previous parts of a document """
+        text = "\n{}\n\n".format(text.replace("\x02", ""))
+        self._anchor_ids = AnchorIds() if anchor_ids is None else anchor_ids
+        self._stash = []
+
+        # Tables go first, before the header pass sees their delimiter rows as underlines
+        text = self._html_tables(text)
+        text = self._html_headers(text)
+
+        # Code is rendered before the inline rules can rewrite it
+        text = self._render_matches(self.CODE_BLOCK, self._html_pre, text)
+        text = self._render_matches(self.CODE_SPAN, self._html_code, text)
 
         for rule, repl in self.rules_cont():
-            text = re.sub(rule, repl, text)
+            if repl is None:
+                text = rule(text)
+            elif callable(repl):
+                text = self._render_matches(rule, repl, text)
+            else:
+                text = rule.sub(repl, text)
+
+        text = self._unstash(text)
+        self._stash = []
 
         return text
 
-    def _html_header(self, match_obj) -> str:
-        level = min(match_obj.group(1).count('#'), 6)
-        text = match_obj.group(2)
-        return "<h{level}>{text}</h{level}>".format(level=level, text=text)
+    def _render_matches(self, rule, handler, text: str) -> str:
+        """ Copy text into the output buffer, letting handler write the HTML of each match """
+        out = []
+        append = out.append
+        pos = 0
 
-    def _html_header_alt(self, match_obj) -> str:
-        level = 1 if match_obj.group(2)[0] == "=" else 2
-        text = match_obj.group(1)
-        return "<h{level} class='alt'>{text}</h{level}>".format(level=level, text=text)
+        for match_obj in rule.finditer(text):
+            append(text[pos:match_obj.start()])
+            handler(match_obj, out)
+            pos = match_obj.end()
+
+        if not out:
+            return text
+
+        append(text[pos:])
+
+        return "".join(out)
+
+    def _stash_html(self, html_text: str) -> str:
+        self._stash.append(html_text)
+        return self.STASH_PLACEHOLDER.format(index=len(self._stash) - 1)
+
+    def _unstash(self, text: str) -> str:
+        return self.STASHED.sub(lambda match: self._stash[int(match.group(1))], text)
+
+    def _html_tables(self, text: str) -> str:
+        """ Convert pipe tables in a single pass over the lines, leaving fenced code alone """
+        lines = text.split("\n")
+        out = []
+        in_fence = False
+
+        number = 0
+        count = len(lines)
+        while number < count:
+            line = lines[number]
+
+            if self.FENCE.match(line):
+                in_fence = not in_fence
+            elif (not in_fence and "|" in line and number + 1 < count and "|" in lines[number + 1] and
+                  self.TABLE_DELIMITER.match(lines[number + 1]) and not self.ATX_HEADER.match(line)):
+                header = self._table_cells(line)
+                aligns = self._table_aligns(lines[number + 1])
+
+                if len(header) == len(aligns):
+                    number += 2
+                    rows = []
+                    while number < count and "|" in lines[number] and lines[number].strip():
+                        rows.append(self._table_cells(lines[number]))
+                        number += 1
+
+                    self._html_table(header, aligns, rows, out)
+                    out.append("")
+                    continue
+
+            out.append(line)
+            number += 1
+
+        return "\n".join(out)
+
+    def _table_cells(self, line: str) -> list:
+        line = line.strip()
+        if line.startswith("|"):
+            line = line[1:]
+        if line.endswith("|") and not line.endswith("\\|"):
+            line = line[:-1]
+
+        return [cell.strip().replace("\\|", "|") for cell in self.TABLE_CELL_SEPARATOR.split(line)]
+
+    def _table_aligns(self, line: str) -> list:
+        aligns = []
+
+        for cell in self._table_cells(line):
+            if cell.startswith(":") and cell.endswith(":"):
+                aligns.append(" style='text-align: center'")
+            elif cell.endswith(":"):
+                aligns.append(" style='text-align: right'")
+            elif cell.startswith(":"):
+                aligns.append(" style='text-align: left'")
+            else:
+                aligns.append("")
 
-    def _html_code(self, match_obj) -> str:
-        text = html.escape(match_obj.group(1))
+        return aligns
 
-        return "<code>{text}</code>".format(text=text)
+    def _html_table(self, header: list, aligns: list, rows: list, out: list) -> None:
+        """ One line per row, so the line based rules after this pass stay linear """
+        columns = len(aligns)
 
-    def _html_pre(self, match_obj) -> str:
+        def html_row(cells, tag):
+            cells = (cells + [""] * columns)[:columns]
+            return "<tr>{cells}</tr>".format(cells="".join(
+                "<{tag}{align}>{text}</{tag}>".format(tag=tag, align=align, text=text)
+                for align, text in zip(aligns, cells)
+            ))
+
+        out.append("<table><thead>" + html_row(header, "th") + "</thead><tbody>")
+        out.extend(html_row(row, "td") for row in rows)
+        out.append("</tbody></table>")
+
+    def _html_headers(self, text: str) -> str:
+        """ ATX and setext headers in one pass over the lines, so their ids are numbered in document order """
+        out = []
+        in_fence = False
+
+        # Mirrors the block order of pymarkview.markdown.tree.Parser, an underline only counts below paragraph text
+        paragraph = False
+        in_list = False
+
+        for line in text.split("\n"):
+            if self.FENCE.match(line):
+                in_fence = not in_fence
+                paragraph = in_list = False
+            elif in_fence:
+                pass
+            elif not line.strip():
+                paragraph = in_list = False
+            elif self.ATX_HEADER.match(line):
+                match_obj = self.ATX_HEADER.match(line)
+                out.append(self._html_header(min(len(match_obj.group(1)), 6), match_obj.group(2), "'>"))
+                paragraph = in_list = False
+                continue
+            elif paragraph and self.SETEXT_UNDERLINE.match(line):
+                level = 1 if line[0] == "=" else 2
+                out.append(self._html_header(level, out.pop(), "' class='alt'>"))
+                paragraph = False
+                continue
+            elif self.THEMATIC_BREAK.match(line) or self.BLOCKQUOTE.match(line):
+                paragraph = in_list = False
+            elif self.LIST_ITEM_LINE.match(line):
+                paragraph = False
+                in_list = True
+            elif not in_list:
+                paragraph = True
+
+            out.append(line)
+
+        return "\n".join(out)
+
+    def _html_header(self, level: int, text: str, open_end: str) -> str:
+        anchor = self._anchor_ids(text.strip())
+        return "".join((self.HEADER_OPEN[level], anchor, open_end, text, self.HEADER_CLOSE[level]))
+
+    def _html_code(self, match_obj, out: list) -> None:
+        out.append(self._stash_html("<code>" + html.escape(match_obj.group(1)) + "</code>"))
+
+    def _html_pre(self, match_obj, out: list) -> None:
         lang = match_obj.group(1)
-        text = html.escape(match_obj.group(2))
+        text = None
+
+        if self._highlighter is not None:
+            text = self._highlighter.highlight(match_obj.group(2), lang)
+
+        if text is None:
+            text = html.escape(match_obj.group(2))
+
+        if lang:
+            out += ("<pre lang='", html.escape(lang), "'>", self._stash_html(text), "</pre>")
+        else:
+            out += ("<pre>", self._stash_html(text), "</pre>")
 
-        return "<pre lang='{lang}'>{text}</pre>".format(lang=lang, text=text)
+    def _html_lists(self, text: str) -> str:
+        """ A list runs from a line starting with an item up to the next blank line, scanning each line once """
+        lines = text.split("\n")
+        out = []
 
-    def _html_list(self, match_obj) -> str:
+        # HTML of the lists that run into the next line
+        html = []
+
+        number = 0
+        count = len(lines)
+        while number < count:
+            line = lines[number]
+            item = self.LIST_ITEM.match(line)
+
+            end = number
+            if item:
+                while end < count and lines[end]:
+                    end += 1
+
+            # Lists are closed by a blank line, which is swallowed together with the blank lines after it
+            if not item or end + 1 >= count:
+                html.append(line)
+                out.append("".join(html))
+                html = []
+                number += 1
+                continue
+
+            self._html_list(line[0], "\n".join([line[item.end():]] + lines[number + 1:end]), html)
+
+            number = end + 1
+            while number < count and not lines[number]:
+                number += 1
+
+        if html:
+            out.append("".join(html))
+
+        return "\n".join(out)
+
+    def _html_list(self, marker: str, body: str, out: list) -> None:
         def outer_tags(ch: str):
             return ("<ol>", "</ol>") if ch.isdigit() else ("<ul>", "</ul>")
 
-        lines = (match_obj.group(1)[0] + " " + match_obj.group(2)).split("\n")
+        lines = (marker + " " + body).split("\n")
 
-        virt_list = {}
+        # (level, text, type) per line
+        items = []
 
-        for number, line in enumerate(lines):
-            level = (len(line) - len(line.lstrip())) // 2
+        for line in lines:
+            stripped = line.lstrip()
+            level = (len(line) - len(stripped)) // 2
             text = line.strip().partition(" ")[2]
-            virt_list.update(
-                {
-                    number: {
-                        "level": level,
-                        "text": text,
-                        "type": (line.lstrip() + "*")[0]
-                    }
-                }
-            )
 
-        res = outer_tags(match_obj.group(1)[0])[0]
+            task = self.TASK_ITEM.match(text)
+            if task:
+                checked = " checked" if task.group(1) != " " else ""
+                text = "<input type='checkbox' disabled" + checked + "> " + text[task.end():]
+
+            items.append((level, text, (stripped + "*")[0]))
 
-        for number in range(len(lines)):
-            current = virt_list.get(number)
-            successor = virt_list.get(number + 1, None)
+        append = out.append
+        append(outer_tags(marker)[0])
 
-            res += "<li>{text}</li>".format(text=current["text"])
+        for number, (level, text, item_type) in enumerate(items):
+            out += ("<li>", text, "</li>")
 
-            if successor:
-                level_delta = successor["level"] - current["level"]
+            if number + 1 < len(items):
+                successor_level, _, successor_type = items[number + 1]
+                level_delta = successor_level - level
 
                 if level_delta > 0:
-                    res += outer_tags(successor["type"])[0]
+                    append(outer_tags(successor_type)[0])
                 elif level_delta < 0:
-                    res += outer_tags(current["type"])[1] * abs(level_delta)
-
-            if not successor and current["level"] > 0:
-                res += outer_tags(current["type"])[1]
+                    append(outer_tags(item_type)[1] * -level_delta)
+            elif level > 0:
+                append(outer_tags(item_type)[1])
 
-        res += outer_tags(match_obj.group(1)[0])[1]
+        append(outer_tags(marker)[1])
 
-        return res
-
-    def _html_parag(self, match_obj) -> str:
+    def _html_parag(self, match_obj, out: list) -> None:
         text = match_obj.group(1)
 
-        starts_with_tag = re.compile(r"^<\/?(li|h|p|block|img|hr|ul|ol|pre)")
-
-        if starts_with_tag.match(text):
-            return "\n{text}\n".format(text=text)
+        if self.STARTS_WITH_TAG.match(text):
+            out += ("\n", text, "\n")
         else:
-            return "\n<p>{text}</p>\n".format(text=text)
-
-    def _html_blockquote(self, match_obj) -> str:
-        text = match_obj.group(1).replace(">", "<br>")
+            out += ("\n<p>", text, "</p>\n")
 
-        return "\n<blockquote>{text}</blockquote>".format(text=text)
+    def _html_blockquote(self, match_obj, out: list) -> None:
+        out += ("\n<blockquote>", match_obj.group(1).replace(">", "<br>"), "</blockquote>")
@@ -0,0 +1,174 @@
+import re
+import unicodedata
+
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+
+
+Heading = namedtuple("Heading", ["level", "text", "line", "anchor"])
+
+
+_slug_strip = re.compile(r"[^\w\s-]")
+_slug_hyphenate = re.compile(r"[-\s]+")
+
+
+def slugify(text: str) -> str:
+    """ Anchor id for a heading, compatible with the header-ids extra of markdown2 """
+    text = unicodedata.normalize("NFKD", text).encode("utf-8", "ignore").decode()
+    text = _slug_strip.sub("", text).strip().lower()
+    return _slug_hyphenate.sub("-", text)
+
+
+class AnchorIds:
+    """ Unique anchor ids in document order, repeated slugs get a -2, -3, ... suffix """
+
+    def __init__(self):
+        self._counts = Counter()
+
+        # (slug, count before) of every id handed out, so the ids of a rendered part can be replayed
+        self.log = []
+
+    def __call__(self, text: str) -> str:
+        anchor = slugify(text)
+        self.log.append((anchor, self._counts[anchor]))
+
+        self._counts[anchor] += 1
+        if not anchor or self._counts[anchor] > 1:
+            anchor += "-{count}".format(count=self._counts[anchor])
+
+        return anchor
+
+    def replay(self, log: list) -> bool:
+        """ Hand out the ids of log again, returns False if they would be numbered differently from here """
+        seen = Counter()
+        for anchor, count in log:
+            if self._counts[anchor] + seen[anchor] != count:
+                return False
+            seen[anchor] += 1
+
+        self._counts.update(seen)
+        self.log.extend(log)
+        return True
+
+
+class Outline:
+    """ Headings of a document parsed as a tree, kept up to date by reparsing only the blocks that changed """
+
+    FENCE = re.compile(r"^\s*`{3}")
+
+    def __init__(self, text: str = ""):
+        self._lines = []
+
+        # Sorted source lines of headings and fence markers, parallel to _entries
+        self._heading_lines = []
+        self._entries = []
+        self._fence_lines = []
+
+        self._headings = None
+
+        self.update(text)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def headings(self) -> list:
+        if self._headings is None:
+            anchor_ids = AnchorIds()
+            self._headings = [Heading(level, text, line, anchor_ids(text))
+                              for line, (level, text) in zip(self._heading_lines, self._entries)]
+
+        return self._headings
+
+    def heading_at(self, line: int) -> int:
+        """ Index of the heading whose section contains line, -1 before the first heading """
+        return bisect_right(self._heading_lines, line) - 1
+
+    def update(self, text: str) -> bool:
+        """ Diff text against the previous version, returns True if headings were added, removed or renamed """
+        lines = text.split("\n")
+        old = self._lines
+
+        start = 0
+        common = min(len(old), len(lines))
+        while start < common and old[start] == lines[start]:
+            start += 1
+
+        end_old = len(old)
+        end_new = len(lines)
+        while end_old > start and end_new > start and old[end_old - 1] == lines[end_new - 1]:
+            end_old -= 1
+            end_new -= 1
+
+        if start == end_old == end_new:
+            return False
+
+        return self.replace_lines(start, end_old, lines[start:end_new])
+
+    def replace_lines(self, start: int, end: int, new_lines: list) -> bool:
+        """ Replace lines [start, end) with new_lines and rescan the affected headings """
+        old_lines = self._lines[start:end]
+        self._lines[start:end] = new_lines
+        self._headings = None
+
+        # Opening or closing a fence changes the meaning of everything below it
+        if any(self.FENCE.match(line) for line in old_lines) or any(self.FENCE.match(line) for line in new_lines):
+            old_entries = self._entries
+            self.__rescan()
+            return old_entries != self._entries
+
+        delta = len(new_lines) - (end - start)
+
+        # Blank lines and fences end every block, so headings beyond them cannot change
+        first = self.__block_start(start)
+        last = self.__block_end(start + len(new_lines))
+        lo = bisect_left(self._heading_lines, first)
+        hi = bisect_left(self._heading_lines, last - delta)
+
+        removed = self._entries[lo:hi]
+        found_lines, found_entries = self.__scan(first, last)
+
+        tail = [line + delta for line in self._heading_lines[hi:]]
+        self._heading_lines[lo:] = found_lines + tail
+        self._entries[lo:hi] = found_entries
+
+        fence_index = bisect_left(self._fence_lines, end)
+        self._fence_lines[fence_index:] = [line + delta for line in self._fence_lines[fence_index:]]
+
+        return removed != found_entries
+
+    def __in_fence(self, line):
+        return bisect_left(self._fence_lines, line) % 2 == 1
+
+    def __block_start(self, line):
+        if self.__in_fence(line):
+            return self._fence_lines[bisect_left(self._fence_lines, line) - 1]
+
+        while line > 0 and self._lines[line - 1].strip() and not self.FENCE.match(self._lines[line - 1]):
+            line -= 1
+
+        return line
+
+    def __block_end(self, line):
+        while line < len(self._lines) and self._lines[line].strip() and not self.FENCE.match(self._lines[line]):
+            line += 1
+
+        return line
+
+    def __rescan(self):
+        self._fence_lines = [number for number, line in enumerate(self._lines) if self.FENCE.match(line)]
+        self._heading_lines, self._entries = self.__scan(0, len(self._lines))
+
+    def __scan(self, start, end):
+        """ Headings of lines [start, end), which begin and end on block boundaries """
+        # The tree module imports this one
+        from pymarkview.markdown.tree import NodeType, Parser
+
+        document = Parser().parse("\n".join(self._lines[start:end]))
+        found_lines = []
+        found_entries = []
+
+        for node in document.find(NodeType.HEADING):
+            found_lines.append(start + document.line_of(node.start))
+            found_entries.append((node.level, node.content.strip()))
+
+        return found_lines, found_entries
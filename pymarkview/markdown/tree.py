@@ -0,0 +1,779 @@
+import html
+import re
+import sys
+import struct
+import zlib
+
+from array import array
+from bisect import bisect_right
+
+from pymarkview.markdown.markdown import Markdown
+from pymarkview.markdown.outline import AnchorIds, Heading
+
+
+class NodeType:
+    DOCUMENT = 0
+    HEADING = 1
+    PARAGRAPH = 2
+    CODE_BLOCK = 3
+    BLOCKQUOTE = 4
+    LIST = 5
+    LIST_ITEM = 6
+    TABLE = 7
+    TABLE_ROW = 8
+    TABLE_CELL = 9
+    THEMATIC_BREAK = 10
+    TEXT = 11
+    LINE_BREAK = 12
+    EMPHASIS = 13
+    STRONG = 14
+    STRIKETHROUGH = 15
+    CODE = 16
+    LINK = 17
+    IMAGE = 18
+    WIKI_LINK = 19
+
+    NAMES = [
+        "document", "heading", "paragraph", "code_block", "blockquote", "list", "list_item", "table", "table_row",
+        "table_cell", "thematic_break", "text", "line_break", "emphasis", "strong", "strikethrough", "code", "link",
+        "image", "wiki_link"
+    ]
+
+
+# Meaning of the value of a node, by node type:
+#   HEADING     level, SETEXT is set for underlined headings
+#   LIST        1 if ordered
+#   LIST_ITEM   TASK_OPEN or TASK_DONE for task list items
+#   TABLE       number of columns
+#   TABLE_ROW   1 for the header row
+#   TABLE_CELL  one of ALIGNMENTS
+# The attribute is an index into the string table, the language of a code block and the URL of a link or image.
+SETEXT = 0x10
+TASK_OPEN = 1
+TASK_DONE = 2
+ALIGNMENTS = (None, "left", "center", "right")
+
+
+class Node:
+    """ View of one node of a Document, nodes themselves are rows of the document arrays """
+
+    __slots__ = ("document", "index")
+
+    def __init__(self, document, index):
+        self.document = document
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and other.document is self.document and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.document), self.index))
+
+    def __repr__(self):
+        return "<Node {type} {start}:{end}>".format(type=self.type_name, start=self.start, end=self.end)
+
+    @property
+    def type(self):
+        return self.document.types[self.index]
+
+    @property
+    def type_name(self):
+        return NodeType.NAMES[self.type]
+
+    @property
+    def parent(self):
+        parent = self.document.parents[self.index]
+        return Node(self.document, parent) if parent >= 0 else None
+
+    @property
+    def children(self):
+        return [Node(self.document, index) for index in self.document.child_indices(self.index)]
+
+    @property
+    def start(self):
+        return self.document.starts[self.index]
+
+    @property
+    def end(self):
+        return self.document.ends[self.index]
+
+    @property
+    def source(self):
+        """ Source text of the node including its markup """
+        return self.document.text[self.start:self.end]
+
+    @property
+    def content(self):
+        """ Source text of the content, e.g. the text of a heading or the code of a code block """
+        return self.document.text[self.document.content_starts[self.index]:self.document.content_ends[self.index]]
+
+    @property
+    def value(self):
+        return self.document.values[self.index]
+
+    @property
+    def attribute(self):
+        attribute = self.document.attributes[self.index]
+        return self.document.strings[attribute] if attribute >= 0 else None
+
+    @property
+    def level(self):
+        return self.value & ~SETEXT
+
+
+class Document:
+    """ Syntax tree of a Markdown text, nodes are stored in pre-order in parallel arrays with source offsets """
+
+    MAGIC = b"PMVA"
+    VERSION = 1
+
+    # magic, version, flags, node count, text bytes, string count
+    HEADER = struct.Struct("<4sBBIII")
+    COMPRESSED = 1
+
+    INT_ARRAYS = ("parents", "sizes", "starts", "ends", "content_starts", "content_ends", "values", "attributes")
+
+    __slots__ = ("text", "types", "strings", "_line_starts") + INT_ARRAYS
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.types = array("B")
+        self.strings = []
+
+        # Number of nodes in the subtree of each node, so children can be skipped over
+        self.sizes = array("I")
+        self.parents = array("i")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.content_starts = array("I")
+        self.content_ends = array("I")
+        self.values = array("i")
+        self.attributes = array("i")
+
+        self._line_starts = None
+
+    def __len__(self):
+        return len(self.types)
+
+    @property
+    def root(self):
+        return Node(self, 0)
+
+    def node(self, index: int) -> Node:
+        return Node(self, index)
+
+    def child_indices(self, index: int):
+        child = index + 1
+        end = index + self.sizes[index]
+
+        while child < end:
+            yield child
+            child += self.sizes[child]
+
+    def walk(self):
+        """ All nodes in document order """
+        return (Node(self, index) for index in range(len(self.types)))
+
+    def find(self, node_type: int):
+        return (Node(self, index) for index, found in enumerate(self.types) if found == node_type)
+
+    def line_of(self, offset: int) -> int:
+        if self._line_starts is None:
+            self._line_starts = [0] + [match.end() for match in re.finditer("\n", self.text)]
+
+        return bisect_right(self._line_starts, offset) - 1
+
+    def headings(self) -> list:
+        """ Headings in the form of pymarkview.markdown.outline """
+        anchor_ids = AnchorIds()
+        headings = []
+
+        for node in self.find(NodeType.HEADING):
+            text = node.content.strip()
+            headings.append(Heading(node.level, text, self.line_of(node.start), anchor_ids(text)))
+
+        return headings
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        text = self.text.encode("utf-8", "surrogatepass")
+        strings = [string.encode("utf-8", "surrogatepass") for string in self.strings]
+        lengths = array("I", (len(string) for string in strings))
+
+        arrays = [getattr(self, name) for name in self.INT_ARRAYS] + [lengths]
+        if sys.byteorder == "big":
+            arrays = [array(values.typecode, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+
+        payload = b"".join([self.types.tobytes()] + [values.tobytes() for values in arrays] + [text] + strings)
+
+        flags = 0
+        if compress:
+            payload = zlib.compress(payload, 1)
+            flags |= self.COMPRESSED
+
+        return self.HEADER.pack(self.MAGIC, self.VERSION, flags, len(self.types), len(text), len(strings)) + payload
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Document":
+        magic, version, flags, count, text_size, string_count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise TreeError("Not a serialized Markdown tree of version {version}".format(version=cls.VERSION))
+
+        payload = memoryview(data)[cls.HEADER.size:]
+        if flags & cls.COMPRESSED:
+            payload = memoryview(zlib.decompress(payload))
+
+        document = cls()
+        document.types.frombytes(payload[:count])
+        pos = count
+
+        lengths = array("I")
+        for values in [getattr(document, name) for name in cls.INT_ARRAYS] + [lengths]:
+            size = (string_count if values is lengths else count) * values.itemsize
+            values.frombytes(payload[pos:pos + size])
+            if sys.byteorder == "big":
+                values.byteswap()
+            pos += size
+
+        document.text = bytes(payload[pos:pos + text_size]).decode("utf-8", "surrogatepass")
+        pos += text_size
+
+        for length in lengths:
+            document.strings.append(bytes(payload[pos:pos + length]).decode("utf-8", "surrogatepass"))
+            pos += length
+
+        return document
+
+
+# The tree is authoritative for document structure, the outline is built from it. The HTML of the preview and of
+# exports comes from pymarkview.markdown.markdown, whose output differs from HtmlRenderer.
+class Parser:
+    """ Parse Markdown into a Document, covering the syntax of the internal parser """
+
+    FENCE = Markdown.FENCE
+    ATX_HEADER = Markdown.ATX_HEADER
+    SETEXT_UNDERLINE = Markdown.SETEXT_UNDERLINE
+    THEMATIC_BREAK = Markdown.THEMATIC_BREAK
+    LIST_ITEM = Markdown.LIST_ITEM_LINE
+    BLOCKQUOTE = Markdown.BLOCKQUOTE
+    TASK_ITEM = re.compile(r"\[([ xX])\]\s")
+
+    INLINE = re.compile(r"""
+        (?P<code>(?P<code_ticks>`+)(?P<code_text>.+?)(?P=code_ticks))
+        |(?P<wiki_link>\[\[(?P<wiki_text>[^\]]+)\]\])
+        |(?P<image>!\[(?P<image_alt>[^\]]*)\]\((?P<image_src>[^)\s]+)\))
+        |(?P<link>\[(?P<link_label>(?:!\[[^\]]*\]\([^)]*\)|[^\]])+)\]\((?P<link_href>[^)\s]+)\))
+        |(?P<autolink><(?P<autolink_url>https?://[^>\s]+)>)
+        |(?P<strong>(?P<strong_marker>\*\*|__)(?=\S)(?P<strong_text>.+?)(?<=\S)(?P=strong_marker))
+        |(?P<strikethrough>~~(?=\S)(?P<strikethrough_text>.+?)(?<=\S)~~)
+        |(?P<emphasis>(?P<emphasis_marker>[*_])(?=\S)(?P<emphasis_text>.+?)(?<=\S)(?P=emphasis_marker))
+    """, re.VERBOSE)
+
+    CONTAINERS = {
+        "strong": (NodeType.STRONG, "strong_text"),
+        "strikethrough": (NodeType.STRIKETHROUGH, "strikethrough_text"),
+        "emphasis": (NodeType.EMPHASIS, "emphasis_text"),
+    }
+
+    def parse(self, text: str) -> Document:
+        self._document = document = Document(text)
+        self._string_ids = {}
+        self._stack = []
+
+        self._lines = text.split("\n")
+        self._line_starts = []
+        offset = 0
+        for line in self._lines:
+            self._line_starts.append(offset)
+            offset += len(line) + 1
+
+        self._paragraph = []
+        self._lists = []
+        self._list_end = 0
+
+        self._open(NodeType.DOCUMENT, 0)
+        self._parse_blocks()
+        self._close(len(text))
+
+        self._document = None
+        return document
+
+    def _string(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self._document.strings)
+            self._document.strings.append(string)
+
+        return string_id
+
+    def _open(self, node_type, start, content_start=0, content_end=0, value=0, attribute=-1) -> int:
+        document = self._document
+        index = len(document.types)
+
+        document.types.append(node_type)
+        document.parents.append(self._stack[-1] if self._stack else -1)
+        document.sizes.append(1)
+        document.starts.append(start)
+        document.ends.append(start)
+        document.content_starts.append(content_start)
+        document.content_ends.append(content_end)
+        document.values.append(value)
+        document.attributes.append(attribute)
+
+        self._stack.append(index)
+        return index
+
+    def _close(self, end) -> None:
+        index = self._stack.pop()
+        self._document.sizes[index] = len(self._document.types) - index
+        self._document.ends[index] = end
+
+    def _leaf(self, node_type, start, end, content_start=None, content_end=None, value=0, attribute=-1) -> None:
+        self._open(node_type, start, start if content_start is None else content_start,
+                   end if content_end is None else content_end, value, attribute)
+        self._close(end)
+
+    def _line_end(self, number) -> int:
+        return self._line_starts[number] + len(self._lines[number])
+
+    def _parse_blocks(self):
+        lines = self._lines
+        count = len(lines)
+        number = 0
+
+        while number < count:
+            line = lines[number]
+            start = self._line_starts[number]
+
+            if not line.strip():
+                self._flush_paragraph()
+                self._close_lists()
+                number += 1
+            elif self.FENCE.match(line):
+                self._flush_paragraph()
+                self._close_lists()
+                number = self._parse_code_block(number)
+            elif self.ATX_HEADER.match(line):
+                self._flush_paragraph()
+                self._close_lists()
+
+                match = self.ATX_HEADER.match(line)
+                level = min(len(match.group(1)), 6)
+                self._open(NodeType.HEADING, start, start + match.start(2), start + match.end(2), level)
+                self._parse_inline(start + match.start(2), start + match.end(2))
+                self._close(self._line_end(number))
+                number += 1
+            elif self._paragraph and self.SETEXT_UNDERLINE.match(line):
+                # The line above the underline becomes the heading
+                title = self._paragraph.pop()
+                self._flush_paragraph()
+
+                level = (1 if line[0] == "=" else 2) | SETEXT
+                title_start = self._line_starts[title]
+                self._open(NodeType.HEADING, title_start, title_start, self._line_end(title), level)
+                self._parse_inline(title_start, self._line_end(title))
+                self._close(self._line_end(number))
+                number += 1
+            elif self.THEMATIC_BREAK.match(line):
+                self._flush_paragraph()
+                self._close_lists()
+                self._leaf(NodeType.THEMATIC_BREAK, start, self._line_end(number))
+                number += 1
+            elif self._is_table(number):
+                self._flush_paragraph()
+                self._close_lists()
+                number = self._parse_table(number)
+            elif self.BLOCKQUOTE.match(line):
+                self._flush_paragraph()
+                self._close_lists()
+                number = self._parse_blockquote(number)
+            elif self.LIST_ITEM.match(line):
+                self._flush_paragraph()
+                self._parse_list_item(number)
+                number += 1
+            elif self._lists:
+                # Continuation line of the current list item
+                content_start = start + len(line) - len(line.lstrip())
+                self._leaf(NodeType.LINE_BREAK, content_start, content_start)
+                self._parse_inline(content_start, self._line_end(number))
+                self._list_end = self._line_end(number)
+                number += 1
+            else:
+                self._paragraph.append(number)
+                number += 1
+
+        self._flush_paragraph()
+        self._close_lists()
+
+    def _flush_paragraph(self):
+        if not self._paragraph:
+            return
+
+        first, last = self._paragraph[0], self._paragraph[-1]
+        self._open(NodeType.PARAGRAPH, self._line_starts[first], self._line_starts[first], self._line_end(last))
+        self._parse_lines(self._paragraph)
+        self._close(self._line_end(last))
+
+        self._paragraph = []
+
+    def _parse_lines(self, numbers, prefix=None):
+        """ Inline content of several lines separated by line breaks, without the prefix of each line """
+        for position, number in enumerate(numbers):
+            line = self._lines[number]
+            skip = prefix.match(line).end() if prefix else len(line) - len(line.lstrip())
+            content_start = self._line_starts[number] + skip
+
+            if position:
+                self._leaf(NodeType.LINE_BREAK, content_start, content_start)
+            self._parse_inline(content_start, self._line_end(number))
+
+    def _parse_code_block(self, number) -> int:
+        lines = self._lines
+        info = lines[number].strip()[3:].split()
+        attribute = self._string(info[0]) if info else -1
+
+        end = number + 1
+        while end < len(lines) and not self.FENCE.match(lines[end]):
+            end += 1
+
+        content_start = self._line_starts[number + 1] if number + 1 < len(lines) else self._line_end(number)
+        content_end = max(self._line_starts[end] - 1, content_start) if end < len(lines) else len(self._document.text)
+        block_end = self._line_end(end) if end < len(lines) else len(self._document.text)
+
+        self._leaf(NodeType.CODE_BLOCK, self._line_starts[number], block_end, content_start, content_end,
+                   attribute=attribute)
+
+        return end + 1
+
+    def _parse_blockquote(self, number) -> int:
+        numbers = []
+        while number < len(self._lines) and self.BLOCKQUOTE.match(self._lines[number]):
+            numbers.append(number)
+            number += 1
+
+        start = self._line_starts[numbers[0]]
+        end = self._line_end(numbers[-1])
+
+        self._open(NodeType.BLOCKQUOTE, start, start, end)
+        self._open(NodeType.PARAGRAPH, start, start, end)
+        self._parse_lines(numbers, self.BLOCKQUOTE)
+        self._close(end)
+        self._close(end)
+
+        return number
+
+    def _parse_list_item(self, number):
+        line = self._lines[number]
+        start = self._line_starts[number]
+        match = self.LIST_ITEM.match(line)
+
+        level = len(match.group(1)) // 2
+        ordered = int(match.group(2)[0].isdigit())
+
+        # Close deeper lists, and the previous item of this level
+        while self._lists and self._lists[-1][0] > level:
+            self._close_list()
+
+        if self._lists and self._lists[-1][0] == level:
+            self._close(self._list_end)
+            if self._lists[-1][1] != ordered:
+                self._close_list(close_item=False)
+
+        if not self._lists or self._lists[-1][0] < level:
+            self._open(NodeType.LIST, start, value=ordered)
+            self._lists.append((level, ordered))
+
+        content_start = start + match.end()
+        value = 0
+        task = self.TASK_ITEM.match(line, match.end())
+        if task:
+            value = TASK_OPEN if task.group(1) == " " else TASK_DONE
+            content_start = start + task.end()
+
+        self._open(NodeType.LIST_ITEM, start, content_start, self._line_end(number), value)
+        self._parse_inline(content_start, self._line_end(number))
+        self._list_end = self._line_end(number)
+
+    def _close_list(self, close_item=True):
+        if close_item:
+            self._close(self._list_end)
+        self._close(self._list_end)
+        self._lists.pop()
+
+    def _close_lists(self):
+        while self._lists:
+            self._close_list()
+
+    def _is_table(self, number) -> bool:
+        lines = self._lines
+        return ("|" in lines[number] and number + 1 < len(lines) and "|" in lines[number + 1] and
+                bool(Markdown.TABLE_DELIMITER.match(lines[number + 1])) and
+                len(self._cell_spans(number)) == len(self._cell_spans(number + 1)))
+
+    def _cell_spans(self, number) -> list:
+        """ Source spans of the stripped cells of a table row """
+        line = self._lines[number]
+        start = self._line_starts[number]
+
+        left = len(line) - len(line.lstrip())
+        right = len(line.rstrip())
+        if line.startswith("|", left):
+            left += 1
+        if line.endswith("|", 0, right) and not line.endswith("\\|", 0, right):
+            right -= 1
+
+        spans = []
+        cell_start = left
+        for separator in Markdown.TABLE_CELL_SEPARATOR.finditer(line, left, right):
+            spans.append((cell_start, separator.start()))
+            cell_start = separator.end()
+        spans.append((cell_start, right))
+
+        result = []
+        for cell_start, cell_end in spans:
+            cell = line[cell_start:cell_end]
+            cell_start += len(cell) - len(cell.lstrip())
+            cell_end = max(cell_start, cell_start + len(cell.strip()))
+            result.append((start + cell_start, start + cell_end))
+
+        return result
+
+    def _parse_table(self, number) -> int:
+        text = self._document.text
+        aligns = []
+        for cell_start, cell_end in self._cell_spans(number + 1):
+            cell = text[cell_start:cell_end]
+            if cell.startswith(":") and cell.endswith(":"):
+                aligns.append(2)
+            elif cell.endswith(":"):
+                aligns.append(3)
+            elif cell.startswith(":"):
+                aligns.append(1)
+            else:
+                aligns.append(0)
+
+        rows = [number]
+        end = number + 2
+        while end < len(self._lines) and "|" in self._lines[end] and self._lines[end].strip():
+            rows.append(end)
+            end += 1
+
+        self._open(NodeType.TABLE, self._line_starts[number], value=len(aligns))
+
+        for row in rows:
+            self._open(NodeType.TABLE_ROW, self._line_starts[row], value=int(row == number))
+
+            for column, (cell_start, cell_end) in enumerate(self._cell_spans(row)):
+                align = aligns[column] if column < len(aligns) else 0
+                self._open(NodeType.TABLE_CELL, cell_start, cell_start, cell_end, align)
+                self._parse_inline(cell_start, cell_end)
+                self._close(cell_end)
+
+            self._close(self._line_end(row))
+
+        self._close(self._line_end(rows[-1]))
+
+        return end
+
+    def _parse_inline(self, start, end):
+        pos = start
+
+        for match in self.INLINE.finditer(self._document.text, start, end):
+            if match.start() > pos:
+                self._leaf(NodeType.TEXT, pos, match.start())
+
+            kind = match.lastgroup
+            if kind in self.CONTAINERS:
+                node_type, group = self.CONTAINERS[kind]
+                self._open(node_type, match.start(), match.start(group), match.end(group))
+                self._parse_inline(match.start(group), match.end(group))
+                self._close(match.end())
+            elif kind == "code":
+                self._leaf(NodeType.CODE, match.start(), match.end(), match.start("code_text"), match.end("code_text"))
+            elif kind == "wiki_link":
+                self._leaf(NodeType.WIKI_LINK, match.start(), match.end(),
+                           match.start("wiki_text"), match.end("wiki_text"))
+            elif kind == "image":
+                self._leaf(NodeType.IMAGE, match.start(), match.end(), match.start("image_alt"),
+                           match.end("image_alt"), attribute=self._string(match.group("image_src")))
+            elif kind == "link":
+                self._open(NodeType.LINK, match.start(), match.start("link_label"), match.end("link_label"),
+                           attribute=self._string(match.group("link_href")))
+                self._parse_inline(match.start("link_label"), match.end("link_label"))
+                self._close(match.end())
+            elif kind == "autolink":
+                url_start, url_end = match.start("autolink_url"), match.end("autolink_url")
+                self._open(NodeType.LINK, match.start(), url_start, url_end,
+                           attribute=self._string(match.group("autolink_url")))
+                self._leaf(NodeType.TEXT, url_start, url_end)
+                self._close(match.end())
+
+            pos = match.end()
+
+        if end > pos:
+            self._leaf(NodeType.TEXT, pos, end)
+
+
+class HtmlRenderer:
+    """ Render a Document to HTML in the style of the internal parser """
+
+    ALIGN_STYLES = ["", " style='text-align: left'", " style='text-align: center'", " style='text-align: right'"]
+
+    # Inline containers by node type, opening and closing tag
+    TAGS = {
+        NodeType.PARAGRAPH: ("<p>", "</p>\n"),
+        NodeType.EMPHASIS: ("<em>", "</em>"),
+        NodeType.STRONG: ("<strong>", "</strong>"),
+        NodeType.STRIKETHROUGH: ("<del>", "</del>"),
+        NodeType.BLOCKQUOTE: ("<blockquote>", "</blockquote>\n"),
+    }
+
+    def __init__(self, highlighter=None):
+        self._highlighter = highlighter
+
+        self._handlers = {
+            NodeType.DOCUMENT: self._render_children,
+            NodeType.HEADING: self._html_heading,
+            NodeType.CODE_BLOCK: self._html_code_block,
+            NodeType.LIST: self._html_list,
+            NodeType.LIST_ITEM: self._html_list_item,
+            NodeType.TABLE: self._html_table,
+            NodeType.THEMATIC_BREAK: lambda document, index, out: out.append("<hr>\n"),
+            NodeType.TEXT: self._html_text,
+            NodeType.LINE_BREAK: self._html_line_break,
+            NodeType.CODE: self._html_code,
+            NodeType.LINK: self._html_link,
+            NodeType.IMAGE: self._html_image,
+            NodeType.WIKI_LINK: self._html_wiki_link,
+        }
+
+    def render(self, document: Document) -> str:
+        self._anchor_ids = AnchorIds()
+
+        out = []
+        self._render(document, 0, out)
+        return "".join(out)
+
+    def _render(self, document, index, out):
+        node_type = document.types[index]
+
+        if node_type in self.TAGS:
+            open_tag, close_tag = self.TAGS[node_type]
+            out.append(open_tag)
+            self._render_children(document, index, out)
+            out.append(close_tag)
+        else:
+            self._handlers[node_type](document, index, out)
+
+    def _render_children(self, document, index, out):
+        for child in document.child_indices(index):
+            self._render(document, child, out)
+
+    @staticmethod
+    def _content(document, index):
+        return document.text[document.content_starts[index]:document.content_ends[index]]
+
+    @staticmethod
+    def _attribute(document, index, quote=True):
+        return html.escape(document.strings[document.attributes[index]], quote)
+
+    def _html_heading(self, document, index, out):
+        value = document.values[index]
+        level = value & ~SETEXT
+
+        out += ("<h{level} id='".format(level=level), self._anchor_ids(self._content(document, index).strip()),
+                "' class='alt'>" if value & SETEXT else "'>")
+        self._render_children(document, index, out)
+        out.append("</h{level}>\n".format(level=level))
+
+    def _html_code_block(self, document, index, out):
+        code = self._content(document, index)
+        lang = document.strings[document.attributes[index]] if document.attributes[index] >= 0 else None
+
+        text = None
+        if self._highlighter is not None:
+            text = self._highlighter.highlight(code, lang)
+        if text is None:
+            text = html.escape(code)
+
+        if lang:
+            out += ("<pre lang='", html.escape(lang), "'>", text, "</pre>\n")
+        else:
+            out += ("<pre>", text, "</pre>\n")
+
+    def _html_list(self, document, index, out):
+        tag = "ol" if document.values[index] else "ul"
+
+        out.append("<{tag}>".format(tag=tag))
+        self._render_children(document, index, out)
+        out.append("</{tag}>\n".format(tag=tag))
+
+    def _html_list_item(self, document, index, out):
+        out.append("<li>")
+
+        task = document.values[index]
+        if task:
+            out.append("<input type='checkbox' disabled checked> " if task == TASK_DONE else
+                       "<input type='checkbox' disabled> ")
+
+        self._render_children(document, index, out)
+        out.append("</li>")
+
+    def _html_table(self, document, index, out):
+        columns = document.values[index]
+        out.append("<table>")
+
+        for row in document.child_indices(index):
+            header = document.values[row]
+            tag = "th" if header else "td"
+
+            if header:
+                out.append("<thead>")
+
+            out.append("<tr>")
+            cells = list(document.child_indices(row))[:columns]
+            for cell in cells:
+                out.append("<{tag}{align}>".format(tag=tag, align=self.ALIGN_STYLES[document.values[cell]]))
+                self._render_children(document, cell, out)
+                out.append("</{tag}>".format(tag=tag))
+            out.append("<{tag}></{tag}>".format(tag=tag) * (columns - len(cells)))
+            out.append("</tr>")
+
+            if header:
+                out.append("</thead><tbody>")
+
+        out.append("</tbody></table>\n")
+
+    def _html_text(self, document, index, out):
+        text = document.text[document.starts[index]:document.ends[index]]
+        if document.types[document.parents[index]] == NodeType.TABLE_CELL:
+            text = text.replace("\\|", "|")
+
+        out.append(text)
+
+    def _html_line_break(self, document, index, out):
+        in_quote = document.types[document.parents[document.parents[index]]] == NodeType.BLOCKQUOTE
+        out.append("<br>" if in_quote else "\n")
+
+    def _html_code(self, document, index, out):
+        out += ("<code>", html.escape(self._content(document, index)), "</code>")
+
+    def _html_link(self, document, index, out):
+        out += ("<a href='", self._attribute(document, index), "'>")
+        self._render_children(document, index, out)
+        out.append("</a>")
+
+    def _html_image(self, document, index, out):
+        out += ("<img src='", self._attribute(document, index), "' alt='",
+                html.escape(self._content(document, index)), "'>")
+
+    def _html_wiki_link(self, document, index, out):
+        target = self._content(document, index)
+        out += ("<a href='pmv://", html.escape(target), "'>📁", target, "</a>")
+
+
+class TreeError(Exception):
+
+    def __init__(self, message):
+        super().__init__(message)
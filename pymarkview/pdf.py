@@ -0,0 +1,167 @@
+import os
+import tempfile
+import time
+
+from collections import deque
+
+from PyQt5.QtCore import QMarginsF, QObject, QUrl, pyqtSignal
+from PyQt5.QtGui import QPageLayout, QPageSize
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile, QWebEngineSettings
+
+from pymarkview.export import HtmlExporter, render_document_file, worker_pool
+from pymarkview.util import iter_files
+
+
+class PdfExporter(QObject):
+    """ Print notes to PDF with a fixed pool of reused pages, rendering the Markdown ahead in worker processes """
+
+    # Rendered documents kept ready per page, so pages never wait for the workers
+    PREFETCH = 4
+
+    document_exported = pyqtSignal(str, bool)
+    finished = pyqtSignal(int, int, float)
+
+    # Emitted from the worker pool threads
+    document_rendered = pyqtSignal(object, object)
+
+    def __init__(self, root, out_dir, parser_name, highlight=False, pages=4, max_workers=None, *args):
+        super().__init__(*args)
+
+        self._root = os.path.abspath(root)
+        self._out_dir = os.path.abspath(out_dir)
+        self._parser_name = parser_name
+        self._highlight = highlight
+        self._max_workers = max_workers
+
+        self._layout = QPageLayout(QPageSize(QPageSize.A4), QPageLayout.Portrait, QMarginsF(15, 15, 15, 15))
+
+        # Off the record, nothing of the pages is written to disk
+        self._profile = QWebEngineProfile(self)
+        self._pages = [self.__create_page() for _ in range(pages)]
+        self._idle = list(self._pages)
+
+        # Jobs are (source, html_path, pdf_path) and move from pending to rendering, ready and printing
+        self._pending = deque()
+        self._rendering = 0
+        self._ready = deque()
+        self._printing = {}
+        self._loading = set()
+
+        self._exported = 0
+        self._failed = 0
+        self._started = None
+
+        self._pool = None
+        self._tmp_dir = None
+
+        self.document_rendered.connect(self.__handle_rendered)
+
+    def start(self):
+        if os.path.isfile(self._root):
+            base_dir = os.path.dirname(self._root)
+            sources = [self._root]
+        else:
+            base_dir = self._root
+            sources = sorted(path for path, _ in iter_files(self._root, HtmlExporter.SUFFIXES)
+                             if not path.startswith(self._out_dir + os.sep))
+
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix="pymarkview-pdf-")
+        self._pool = worker_pool(self._max_workers)
+        self._started = time.perf_counter()
+
+        for index, source in enumerate(sources):
+            html_path = os.path.join(self._tmp_dir.name, "{index}.html".format(index=index))
+            pdf_path = os.path.join(self._out_dir, os.path.splitext(os.path.relpath(source, base_dir))[0] + ".pdf")
+            self._pending.append((source, html_path, pdf_path))
+
+        self.__submit()
+        self.__finish_if_done()
+
+    def __create_page(self):
+        page = QWebEnginePage(self._profile, self)
+        page.settings().setAttribute(QWebEngineSettings.JavascriptEnabled, False)
+
+        page.loadFinished.connect(lambda ok, page=page: self.__handle_loaded(page, ok))
+        page.pdfPrintingFinished.connect(lambda path, success, page=page: self.__handle_printed(page, success))
+
+        return page
+
+    def __submit(self):
+        # Bounded, so the rendered documents do not pile up ahead of the pages
+        while self._pending and self._rendering + len(self._ready) < len(self._pages) * self.PREFETCH:
+            job = self._pending.popleft()
+            source, html_path, _ = job
+
+            self._rendering += 1
+            future = self._pool.submit(render_document_file, self._parser_name, source, html_path, self._highlight)
+            future.add_done_callback(lambda future, job=job: self.document_rendered.emit(job, future.exception()))
+
+    def __handle_rendered(self, job, error):
+        self._rendering -= 1
+
+        if error is None:
+            self._ready.append(job)
+            self.__dispatch()
+        else:
+            self.__complete(job, False)
+
+        self.__submit()
+
+    def __dispatch(self):
+        while self._idle and self._ready:
+            page = self._idle.pop()
+            job = self._ready.popleft()
+
+            self._printing[page] = job
+            self._loading.add(page)
+            page.load(QUrl.fromLocalFile(job[1]))
+
+    def __handle_loaded(self, page, ok):
+        if page not in self._loading:
+            return
+
+        self._loading.discard(page)
+
+        if not ok:
+            self.__release_page(page, False)
+            return
+
+        pdf_path = self._printing[page][2]
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        page.printToPdf(pdf_path, self._layout)
+
+    def __handle_printed(self, page, success):
+        self.__release_page(page, success)
+
+    def __release_page(self, page, success):
+        job = self._printing.pop(page)
+
+        try:
+            os.remove(job[1])
+        except OSError:
+            pass
+
+        self._idle.append(page)
+        self.__complete(job, success)
+
+        self.__dispatch()
+        self.__submit()
+
+    def __complete(self, job, success):
+        if success:
+            self._exported += 1
+        else:
+            self._failed += 1
+
+        self.document_exported.emit(job[0], success)
+        self.__finish_if_done()
+
+    def __finish_if_done(self):
+        if self._pending or self._rendering or self._ready or self._printing or self._pool is None:
+            return
+
+        self._pool.shutdown()
+        self._pool = None
+        self._tmp_dir.cleanup()
+
+        self.finished.emit(self._exported, self._failed, time.perf_counter() - self._started)
@@ -0,0 +1,204 @@
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from pymarkview.assets import ThumbnailCache
+from pymarkview.markdown import create_parser
+from pymarkview.markdown.outline import AnchorIds
+
+
+def split_chunks(text: str, chunk_size: int) -> list:
+    """ Split text at blank lines outside of fenced code into chunks of at least chunk_size characters """
+    chunks = []
+    start = 0
+    pos = 0
+    in_fence = False
+
+    for line in text.splitlines(keepends=True):
+        pos += len(line)
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        elif not stripped and not in_fence and pos - start >= chunk_size:
+            chunks.append(text[start:pos])
+            start = pos
+
+    if start < len(text) or not chunks:
+        chunks.append(text[start:])
+
+    return chunks
+
+
+class RenderService:
+    """ Parsers, render cache and worker pool shared by all windows """
+
+    # Characters of source and HTML kept in the render cache
+    CACHE_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, settings, max_workers=None):
+        self.settings = settings
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pymarkview")
+        self.thumbnail_cache = ThumbnailCache(settings.preview_image_width)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_size = 0
+
+    def parser(self, name: str = None, highlight: bool = None):
+        key = (name or self.settings.md_parser, self.settings.code_highlighting if highlight is None else highlight)
+
+        # Parser instances are not guaranteed to be thread-safe
+        parsers = self._local.__dict__.setdefault("parsers", {})
+        if key not in parsers:
+            parsers[key] = create_parser(*key)
+
+        return parsers[key]
+
+    def render(self, text: str, parser_name: str = None, anchor_ids: AnchorIds = None) -> str:
+        """ anchor_ids continues the heading ids of the previous parts of a document """
+        key = (parser_name or self.settings.md_parser, self.settings.code_highlighting, text)
+        if anchor_ids is None:
+            anchor_ids = AnchorIds()
+
+        with self._lock:
+            entry = self._cache.get(key)
+
+        # A cached part is only valid if the headings before it number its ids the same way
+        if entry is not None and anchor_ids.replay(entry[1]):
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                self.hits += 1
+            return entry[0]
+
+        start = len(anchor_ids.log)
+        if key[0] == "internal":
+            html = self.parser(key[0], key[1])(text, anchor_ids)
+        else:
+            # markdown2 numbers the ids of each part on its own
+            html = self.parser(key[0], key[1])(text)
+
+        with self._lock:
+            self.misses += 1
+
+            if key in self._cache:
+                self._cache_size -= len(text) + len(self._cache[key][0])
+            self._cache[key] = (html, anchor_ids.log[start:])
+            self._cache_size += len(text) + len(html)
+
+            while self._cache_size > self.CACHE_SIZE and len(self._cache) > 1:
+                (_, _, old_text), (old_html, _) = self._cache.popitem(last=False)
+                self._cache_size -= len(old_text) + len(old_html)
+
+        return html
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_size = 0
+
+
+class ProgressiveRenderer(QObject):
+    CHUNK_SIZE = 4096
+
+    # Smaller documents are rendered in one go
+    PROGRESSIVE_THRESHOLD = 64 * 1024
+
+    started = pyqtSignal(str)
+    chunk_ready = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, settings, *args):
+        super().__init__(*args)
+
+        self.md = None
+
+        self._settings = settings
+        self._chunks = []
+        self._done = 0
+        self._total = 0
+
+        # Heading ids are numbered across the chunks of one document
+        self._anchor_ids = None
+
+        self._tick_tmr = QTimer(self)
+        self._tick_tmr.setSingleShot(True)
+        self._tick_tmr.timeout.connect(self.__tick)
+
+    @property
+    def is_rendering(self) -> bool:
+        return bool(self._chunks)
+
+    def render(self, text: str) -> None:
+        self.cancel()
+
+        threshold = self.PROGRESSIVE_THRESHOLD
+        if self._settings.render_budget_bytes:
+            threshold = min(threshold, self._settings.render_budget_bytes)
+
+        if len(text) <= threshold:
+            self.started.emit(self.md(text))
+            self.finished.emit(False)
+            return
+
+        self._chunks = split_chunks(text, self.CHUNK_SIZE)
+        self._chunks.reverse()
+        self._done = 0
+        self._total = len(text)
+        self._anchor_ids = AnchorIds()
+
+        self.started.emit(self.__render_budget())
+        self.__continue()
+
+    def cancel(self) -> None:
+        self._tick_tmr.stop()
+        self._chunks = []
+
+    def __tick(self):
+        self.chunk_ready.emit(self.__render_budget())
+        self.__continue()
+
+    def __continue(self):
+        self.progress.emit(self._done, self._total)
+
+        if self._chunks:
+            self._tick_tmr.start(0)
+        else:
+            self.finished.emit(True)
+
+    def __render_budget(self):
+        budget_s = self._settings.render_budget_ms / 1000
+        budget_bytes = self._settings.render_budget_bytes
+
+        start = time.perf_counter()
+        rendered = 0
+        parts = []
+
+        # At least one chunk per tick, so rendering always progresses. Stop
+        # early when another chunk of average cost would exceed the budget.
+        while self._chunks:
+            chunk = self._chunks.pop()
+            parts.append(self.md(chunk, anchor_ids=self._anchor_ids))
+            rendered += len(chunk)
+
+            next_size = len(self._chunks[-1]) if self._chunks else 0
+            if budget_bytes and rendered + next_size > budget_bytes:
+                break
+
+            elapsed = time.perf_counter() - start
+            if budget_s and elapsed + elapsed / len(parts) > budget_s:
+                break
+
+        self._done += rendered
+
+        return "".join(parts)
@@ -75,3 +75,16 @@ img {
 '''
 
 mathjax = '''<script async type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.2/MathJax.js?config=TeX-MML-AM_CHTML"></script>'''
+
+document_template = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{head}
+</head>
+<body>
+{body}
+</body>
+</html>
+'''
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import html
+import io
+import mimetypes
+import os
+import threading
+
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from pymarkview.export import HtmlExporter
+
+
+class PreviewServer:
+    SUFFIXES = (".md", ".txt")
+
+    EVENTS_PATH = "/__events"
+
+    POLL_INTERVAL = 0.5
+    CACHE_SIZE = 256
+
+    RELOAD_SCRIPT = '''<script>
+new EventSource("{path}?page=" + encodeURIComponent(location.pathname)).onmessage = function (e) {{
+    if (e.data === location.pathname) location.reload();
+}};
+</script>
+'''
+
+    REASONS = {
+        200: "OK",
+        304: "Not Modified",
+        400: "Bad Request",
+        403: "Forbidden",
+        404: "Not Found",
+        405: "Method Not Allowed"
+    }
+
+    def __init__(self, root: str, create_md, host: str = "127.0.0.1", port: int = 8000, cache_size: int = CACHE_SIZE):
+        self.root = os.path.abspath(root)
+        self.create_md = create_md
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+
+        self.hits = 0
+        self.misses = 0
+
+        # path -> (mtime_ns, size, etag, body), least recently used first
+        self._pages = OrderedDict()
+        # path -> event queues of the browsers showing it, None for those that do not say which page
+        self._subscribers = {}
+        # path -> (mtime_ns, size) of the subscribed pages, None while missing
+        self._watched = {}
+        self._server = None
+        self._watch_task = None
+
+        # Pages are rendered in executor threads, each with its own parser
+        self._local = threading.local()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._watch_task = asyncio.ensure_future(self.__watch())
+        return self._server
+
+    async def stop(self):
+        self._watch_task.cancel()
+        for queues in self._subscribers.values():
+            for queue in queues:
+                queue.put_nowait(None)
+
+        self._server.close()
+        await self._server.wait_closed()
+
+    def serve_forever(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        loop.run_until_complete(self.start())
+        print("Serving {root} on http://{host}:{port}/".format(root=self.root, host=self.host, port=self.port))
+
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+    async def __handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.__respond(writer, 400, b"Bad Request")
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                url = urlparse(target)
+                url_path = unquote(url.path)
+
+                if method not in ("GET", "HEAD"):
+                    # The request body is not read, so the connection cannot be used for another request
+                    await self.__respond(writer, 405, b"Method Not Allowed", {"Connection": "close"})
+                    break
+                elif url_path == self.EVENTS_PATH:
+                    await self.__events(writer, parse_qs(url.query).get("page", [""])[0])
+                    break
+                else:
+                    await self.__serve(writer, url_path, headers, method == "HEAD")
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def __serve(self, writer, url_path, headers, head_only):
+        path = self.__local_path(url_path)
+
+        if path is None:
+            await self.__respond(writer, 403, b"Forbidden")
+            return
+
+        try:
+            if os.path.isdir(path):
+                etag, body, content_type = self.__listing(path, url_path)
+            elif path.lower().endswith(self.SUFFIXES):
+                etag, body = await self.__page(path)
+                content_type = "text/html; charset=utf-8"
+            else:
+                etag, body = await asyncio.get_event_loop().run_in_executor(None, self.__static, path)
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        except OSError:
+            await self.__respond(writer, 404, b"Not Found")
+            return
+
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            await self.__respond(writer, 304, b"", {"ETag": etag})
+            return
+
+        await self.__respond(writer, 200, body, {
+            "Content-Type": content_type,
+            "ETag": etag,
+            "Cache-Control": "no-cache"
+        }, head_only)
+
+    def __local_path(self, url_path):
+        """ File system path of url_path, None if it is outside the root """
+        path = os.path.abspath(os.path.join(self.root, url_path.lstrip("/")))
+
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+
+        return path
+
+    async def __page(self, path):
+        stat = os.stat(path)
+        cached = self._pages.get(path)
+
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self._pages.move_to_end(path)
+            self.hits += 1
+            return cached[2], cached[3]
+
+        self.misses += 1
+        body = await asyncio.get_event_loop().run_in_executor(None, self.__render, path)
+        etag = self.__etag(body)
+
+        self._pages[path] = (stat.st_mtime_ns, stat.st_size, etag, body)
+        self._pages.move_to_end(path)
+        while len(self._pages) > self.cache_size:
+            self._pages.popitem(last=False)
+
+        return etag, body
+
+    def __render(self, path):
+        with io.open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+
+        body = self.__parser()(text) + self.RELOAD_SCRIPT.format(path=self.EVENTS_PATH)
+        title = os.path.basename(path)
+
+        return HtmlExporter.wrap_document(body, title).encode("utf-8")
+
+    def __parser(self):
+        """ Parser instances are not guaranteed to be thread-safe """
+        if not hasattr(self._local, "md"):
+            self._local.md = self.create_md()
+
+        return self._local.md
+
+    def __static(self, path):
+        with io.open(path, "rb") as f:
+            body = f.read()
+
+        return self.__etag(body), body
+
+    def __listing(self, path, url_path):
+        base = url_path.rstrip("/") + "/"
+        entries = []
+
+        for entry in sorted(os.scandir(path), key=lambda entry: (not entry.is_dir(), entry.name.lower())):
+            if entry.name.startswith("."):
+                continue
+
+            if entry.is_dir():
+                name = entry.name + "/"
+            elif entry.name.lower().endswith(self.SUFFIXES):
+                name = entry.name
+            else:
+                continue
+
+            entries.append("<li><a href='{href}'>{name}</a></li>".format(
+                href=html.escape(quote(base + name)), name=html.escape(name)))
+
+        body = HtmlExporter.wrap_document("<ul>{entries}</ul>".format(entries="".join(entries)), base)
+        body = body.encode("utf-8")
+
+        return self.__etag(body), body, "text/html; charset=utf-8"
+
+    async def __events(self, writer, page):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+
+        queue = asyncio.Queue()
+        path = self.__local_path(unquote(page))
+
+        if path is not None and path not in self._watched:
+            # Changes since the page was rendered count as well
+            cached = self._pages.get(path)
+            self._watched[path] = cached[:2] if cached else self.__file_version(path)
+
+        self._subscribers.setdefault(path, set()).add(queue)
+
+        try:
+            await writer.drain()
+
+            while True:
+                url_path = await queue.get()
+                if url_path is None:
+                    break
+
+                writer.write("data: {path}\n\n".format(path=url_path).encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            queues = self._subscribers[path]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[path]
+                self._watched.pop(path, None)
+
+    async def __watch(self):
+        """ Poll the pages shown in connected browsers for changes and push reloads to them """
+        while True:
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+            for path, version in list(self._watched.items()):
+                current = self.__file_version(path)
+                if current == version:
+                    continue
+
+                self._watched[path] = current
+                self._pages.pop(path, None)
+
+                url_path = "/" + os.path.relpath(path, self.root).replace(os.sep, "/")
+                for queue in self._subscribers[path]:
+                    queue.put_nowait(quote(url_path))
+
+    @staticmethod
+    def __file_version(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    async def __respond(self, writer, status, body, headers=None, head_only=False):
+        lines = ["HTTP/1.1 {status} {reason}".format(status=status, reason=self.REASONS[status])]
+
+        for name, value in (headers or {}).items():
+            lines.append("{name}: {value}".format(name=name, value=value))
+        lines.append("Content-Length: {length}".format(length=len(body)))
+
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only:
+            writer.write(body)
+
+        await writer.drain()
+
+    @staticmethod
+    def __etag(body):
+        return '"{digest}"'.format(digest=hashlib.sha1(body).hexdigest())
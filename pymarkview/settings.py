@@ -3,10 +3,17 @@ import json
 
 from pathlib import Path
 
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
 
-class Settings:
+from pymarkview.file_writer import FileWriter
+
+
+class Settings(QObject):
     FILE = "settings.json"
 
+    SAVE_DELAY = 500
+    RELOAD_DELAY = 100
+
     DEFAULTS = {
         "font_family": "Consolas",
         "font_size": 12,
@@ -14,21 +21,169 @@ class Settings:
         "word_wrap": True,
         "show_menu": True,
         "md_parser": "markdown2",
-        "mathjax": True
+        "mathjax": True,
+        "vault_root": "",
+        "preview_image_width": 800,
+        "render_budget_ms": 30,
+        "render_budget_bytes": 0,
+        "single_instance": True,
+        "code_highlighting": True,
+        "tab_memory_budget_mb": 256,
+        "undo_memory_budget_mb": 64
     }
 
-    def __init__(self):
+    # key -> (type, validator)
+    SCHEMA = {
+        "font_family": (str, lambda value: len(value) > 0),
+        "font_size": (int, lambda value: 1 <= value <= 200),
+        "tab_width": (int, lambda value: 1 <= value <= 16),
+        "word_wrap": (bool, None),
+        "show_menu": (bool, None),
+        "md_parser": (str, lambda value: value in ("internal", "markdown2")),
+        "mathjax": (bool, None),
+        "vault_root": (str, None),
+        "preview_image_width": (int, lambda value: 16 <= value <= 10000),
+        "render_budget_ms": (int, lambda value: value >= 0),
+        "render_budget_bytes": (int, lambda value: value >= 0),
+        "single_instance": (bool, None),
+        "code_highlighting": (bool, None),
+        "tab_memory_budget_mb": (int, lambda value: value >= 0),
+        "undo_memory_budget_mb": (int, lambda value: value >= 0)
+    }
+
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, watch=True, *args):
+        super().__init__(*args)
+
+        self._values = {}
+        self._last_written = None
+
+        # handle -> (key, callback)
+        self._subscriptions = {}
+        self._next_handle = 0
+        self.changed.connect(self.__notify)
+
+        self._writer = FileWriter(self)
+
+        self._save_tmr = QTimer(self)
+        self._save_tmr.setSingleShot(True)
+        self._save_tmr.timeout.connect(self.__save_settings)
+
+        self._reload_tmr = QTimer(self)
+        self._reload_tmr.setSingleShot(True)
+        self._reload_tmr.timeout.connect(self.reload)
+
+        for key, value in self.DEFAULTS.items():
+            self.__apply(key, value, notify=False)
+
         self.__load_settings()
+        self._writer.flush()
+
+        self._watcher = None
+        if watch:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.fileChanged.connect(self.__file_changed)
+            self.__watch()
+
+    def __getattr__(self, key: str):
+        if key.startswith("_"):
+            raise AttributeError(key)
 
-    def __getattr__(self, key: str) -> str:
-        return self.DEFAULTS.get(key, None)
+        return None
 
-    def get(self, key: str) -> str:
-        return self.DEFAULTS.get(key, None)
+    def get(self, key: str):
+        return self._values.get(key, None)
 
     def set(self, key: str, value) -> None:
-        self.DEFAULTS[key] = value
-        self.__save_settings()
+        self.validate(key, value)
+
+        if self.__apply(key, value):
+            self._save_tmr.start(self.SAVE_DELAY)
+
+    def subscribe(self, key: str, callback, receiver: QObject = None) -> int:
+        """ Call callback with the new value whenever key changes, until unsubscribed or receiver is destroyed """
+        self._next_handle += 1
+        handle = self._next_handle
+        self._subscriptions[handle] = (key, callback)
+
+        if receiver is not None:
+            receiver.destroyed.connect(lambda: self.unsubscribe(handle))
+
+        return handle
+
+    def unsubscribe(self, handle: int) -> None:
+        self._subscriptions.pop(handle, None)
+
+    @classmethod
+    def validate(cls, key: str, value) -> None:
+        if key not in cls.SCHEMA:
+            raise SettingsError("Unknown setting '{key}'".format(key=key))
+
+        value_type, validator = cls.SCHEMA[key]
+
+        # bool is a subclass of int, but not a valid font size
+        if not isinstance(value, value_type) or (value_type is not bool and isinstance(value, bool)):
+            raise SettingsError("Setting '{key}' must be of type {type}".format(key=key, type=value_type.__name__))
+
+        if validator and not validator(value):
+            raise SettingsError("Invalid value {value!r} for setting '{key}'".format(value=value, key=key))
+
+    def flush(self) -> None:
+        if self._save_tmr.isActive():
+            self._save_tmr.stop()
+            self.__save_settings()
+
+        self._writer.flush()
+
+    def reload(self) -> None:
+        try:
+            with io.open(self.FILE, "r", encoding="utf-8") as f:
+                data = f.read()
+        except OSError:
+            return
+
+        if data == self._last_written:
+            return
+
+        try:
+            user_settings = json.loads(data)
+        except ValueError:
+            print("Cannot read settings! Keeping current values.")
+            return
+
+        # Keys removed from the file fall back to their defaults
+        for key in self.__apply_user_settings(user_settings):
+            self.__apply(key, self.DEFAULTS[key])
+
+    def __apply(self, key, value, notify=True):
+        if key in self._values and self._values[key] == value:
+            return False
+
+        self._values[key] = value
+        setattr(self, key, value)
+
+        if notify:
+            self.changed.emit(key, value)
+
+        return True
+
+    def __notify(self, key, value):
+        for subscribed_key, callback in list(self._subscriptions.values()):
+            if subscribed_key == key:
+                callback(value)
+
+    def __apply_user_settings(self, user_settings):
+        for key, value in user_settings.items():
+            try:
+                self.validate(key, value)
+            except SettingsError as e:
+                print("{error}. Skipping.".format(error=e))
+                continue
+
+            self.__apply(key, value)
+
+        return [key for key in self.DEFAULTS if key not in user_settings]
 
     def __load_settings(self) -> None:
         if not Path(self.FILE).exists():
@@ -41,24 +196,29 @@ class Settings:
             except json.decoder.JSONDecodeError:
                 raise SettingsError("Cannot read settings!")
 
-            for key, value in user_settings.items():
-                if key in self.DEFAULTS:
-                    self.DEFAULTS[key] = value
-                else:
-                    print("Found unknown setting '{key}'. Skipping.".format(key=key))
+        missing_keys = self.__apply_user_settings(user_settings)
 
-            user_settings_stale = False
-            for key, value in self.DEFAULTS.items():
-                if key not in user_settings:
-                    print("Adding new setting '{key}'.".format(key=key))
-                    user_settings_stale = True
+        for key in missing_keys:
+            print("Adding new setting '{key}'.".format(key=key))
 
-            if user_settings_stale:
-                self.__save_settings()
+        if missing_keys:
+            self.__save_settings()
 
     def __save_settings(self) -> None:
-        with io.open(self.FILE, "w", encoding="utf-8") as f:
-            json.dump(self.DEFAULTS, f, indent=4, sort_keys=True)
+        self._last_written = json.dumps(self._values, indent=4, sort_keys=True)
+        self._writer.write(self.FILE, self._last_written)
+
+    def __watch(self):
+        if self._watcher is not None and Path(self.FILE).exists() and self.FILE not in self._watcher.files():
+            self._watcher.addPath(self.FILE)
+
+    def __file_changed(self, path):
+        # Atomic replacements drop the path from the watcher
+        self.__watch()
+        if not self._watcher.files():
+            QTimer.singleShot(self.RELOAD_DELAY, self.__watch)
+
+        self._reload_tmr.start(self.RELOAD_DELAY)
 
 
 class SettingsError(Exception):
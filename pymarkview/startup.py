@@ -0,0 +1,26 @@
+import time
+
+
+class StartupProfile:
+    """ Wall clock time of the startup phases, reported when the last phase is done """
+
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.phases = []
+
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, now - self._start))
+        self._last = now
+
+    def report(self) -> None:
+        if not self.enabled:
+            return
+
+        print("Startup profile:")
+        for phase, duration, elapsed in self.phases:
+            print("  {phase:<20} {duration:8.1f} ms  (at {elapsed:.1f} ms)".format(
+                phase=phase, duration=duration * 1000, elapsed=elapsed * 1000))
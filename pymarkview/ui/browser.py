@@ -1,8 +1,78 @@
+import json
 import webbrowser
 
+from urllib.parse import parse_qs, urlparse
+
 from PyQt5.QtCore import *
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlSchemeHandler
 from PyQt5.QtWebEngineWidgets import *
 
+from pymarkview.assets import ThumbnailCache
+
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    asset_loaded = pyqtSignal(int, bytes, bytes)
+    asset_failed = pyqtSignal(int)
+
+    def __init__(self, cache, executor, *args):
+        super().__init__(*args)
+
+        self._cache = cache
+        self._pool = executor
+        self._jobs = {}
+        self._job_id = 0
+
+        self.asset_loaded.connect(self.__reply)
+        self.asset_failed.connect(self.__fail)
+
+    def requestStarted(self, job):
+        url = urlparse(job.requestUrl().toString(QUrl.FullyEncoded))
+        query = parse_qs(url.query)
+        path = query.get("path", [""])[0]
+
+        if url.path not in ("thumb", "original") or not path.lower().endswith(ThumbnailCache.IMAGE_SUFFIXES):
+            job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+            return
+
+        # Thumbnail widths are whole numbers, 0 or none stands for the default width
+        width = query.get("w", [""])[0] or "0"
+        if url.path == "thumb" and not width.isdecimal():
+            job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+            return
+
+        self._job_id += 1
+        job_id = self._job_id
+        self._jobs[job_id] = job
+        job.destroyed.connect(lambda: self._jobs.pop(job_id, None))
+
+        self._pool.submit(self.__load, job_id, path, int(width) if url.path == "thumb" else None)
+
+    def __load(self, job_id, path, width):
+        try:
+            if width is None:
+                mime_type, data = self._cache.original(path)
+            else:
+                mime_type, data = self._cache.thumbnail(path, width)
+        except OSError:
+            self.asset_failed.emit(job_id)
+        else:
+            self.asset_loaded.emit(job_id, mime_type, data)
+
+    def __reply(self, job_id, mime_type, data):
+        job = self._jobs.pop(job_id, None)
+
+        if job is not None:
+            buffer = QBuffer(job)
+            buffer.setData(data)
+            job.reply(mime_type, buffer)
+
+    def __fail(self, job_id):
+        job = self._jobs.pop(job_id, None)
+
+        if job is not None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+
 class WebEnginePage(QWebEnginePage):
     def acceptNavigationRequest(self, url, navtype, mainframe):
         return False
@@ -12,18 +82,55 @@ class Browser(QWebEngineView):
 
     pmv_link_clicked = pyqtSignal(str)
 
-    def __init__(self):
+    asset_handler = None
+
+    def __init__(self, thumbnail_cache=None, executor=None):
         self.view = QWebEngineView.__init__(self)
         self.setPage(WebEnginePage(self))
+
+        if thumbnail_cache is not None and Browser.asset_handler is None:
+            Browser.asset_handler = AssetSchemeHandler(thumbnail_cache, executor, QCoreApplication.instance())
+            self.page().profile().installUrlSchemeHandler(ThumbnailCache.SCHEME.encode(), Browser.asset_handler)
+
         self.page().acceptNavigationRequest = self.handle_link_click
         self.settings().setAttribute(QWebEngineSettings.JavascriptEnabled, True)
         self.settings().setAttribute(QWebEngineSettings.FocusOnNavigationEnabled, False)
         self.loadStarted.connect(self.handle_load_started)
         self.loadFinished.connect(self.handle_load_finished)
 
+        self._loading = False
+        self._pending_html = []
+
     def load_html(self, html):
+        # setHtml loads asynchronously, chunks appended before loadStarted belong to the new page
+        self._loading = True
+        self._pending_html = []
         self.setHtml(html)
 
+    def append_html(self, html):
+        if self._loading:
+            self._pending_html.append(html)
+            return
+
+        # Keep restoring the scroll position while the document is still growing
+        self.page().runJavaScript(
+            "document.body.insertAdjacentHTML('beforeend', {html});"
+            "if (window.scrollY < {y}) window.scrollTo({x}, {y});".format(
+                html=json.dumps(html), x=self.scroll_position.x(), y=self.scroll_position.y()
+            )
+        )
+
+    def scroll_to_anchor(self, anchor, index=-1):
+        """ Scroll to the heading with the given id, falling back to the index-th heading """
+        self.page().runJavaScript(
+            "var heading = document.getElementById({anchor}) || "
+            "document.querySelectorAll('h1, h2, h3, h4, h5, h6')[{index}];"
+            "if (heading) heading.scrollIntoView();".format(anchor=json.dumps(anchor), index=index)
+        )
+
+    def typeset_math(self):
+        self.page().runJavaScript("if (window.MathJax) MathJax.Hub.Queue(['Typeset', MathJax.Hub]);")
+
     def load_url(self, url):
         self.setUrl(QUrl(url))
 
@@ -31,17 +138,29 @@ class Browser(QWebEngineView):
         self.settings().setAttribute(QWebEngineSettings.JavascriptEnabled, state)
 
     def handle_load_started(self):
+        self._loading = True
         self.scroll_position = self.page().scrollPosition()
 
     def handle_load_finished(self):
+        self._loading = False
         self.page().runJavaScript(
             f"window.scrollTo({self.scroll_position.x()}, {self.scroll_position.y()});"
         )
 
+        if self._pending_html:
+            pending_html = "".join(self._pending_html)
+            self._pending_html = []
+            self.append_html(pending_html)
+
     def handle_link_click(self, url, navtype, mainframe):
         url = url.toString()
 
-        if not url.startswith(self.PMV_LINK_PREFIX):
+        if url.startswith(ThumbnailCache.SCHEME + ":"):
+            # Thumbnails link to their original image, which opens in the default viewer
+            path = parse_qs(urlparse(url).query).get("path", [""])[0]
+            if path:
+                webbrowser.open(QUrl.fromLocalFile(path).toString())
+        elif not url.startswith(self.PMV_LINK_PREFIX):
             webbrowser.open(url)
         else:
             self.pmv_link_clicked.emit(url[len(self.PMV_LINK_PREFIX):])
@@ -5,6 +5,8 @@ from PyQt5.QtGui import *
 from urllib.parse import urlparse
 from urllib.request import url2pathname
 
+from pymarkview import bulk_edit
+
 
 class LineNumberEditor(QFrame):
     def __init__(self, settings, *args):
@@ -52,7 +54,7 @@ class LineNumberEditor(QFrame):
             QWidget.paintEvent(self, event)
 
     class Editor(QPlainTextEdit):
-        document_dropped = pyqtSignal(str)
+        documents_dropped = pyqtSignal(list)
 
         def __init__(self, settings):
             self.settings = settings
@@ -67,8 +69,18 @@ class LineNumberEditor(QFrame):
             self.font.setPointSize(self.settings.font_size)
             self.setFont(self.font)
 
+            self.settings.changed.connect(self.setting_changed)
+
             self.cursorPositionChanged.connect(self.highlight)
 
+        def setting_changed(self, key, value):
+            if key == "font_family":
+                self.font.setFamily(value)
+                self.setFont(self.font)
+            elif key == "font_size":
+                self.font.setPointSize(value)
+                self.setFont(self.font)
+
         def numberbar_paint(self, number_bar, event):
             font_metrics = self.fontMetrics()
 
@@ -87,7 +99,7 @@ class LineNumberEditor(QFrame):
                 painter.setFont(self.font)
                 painter.setPen(QColor(155, 155, 155))
 
-                paint_rect = QRect(0, block_top, number_bar.width(), font_metrics.height())
+                paint_rect = QRect(0, int(block_top), number_bar.width(), font_metrics.height())
                 painter.drawText(paint_rect, Qt.AlignRight, str(line_count))
 
                 block = block.next()
@@ -114,38 +126,97 @@ class LineNumberEditor(QFrame):
                 if e.key() == Qt.Key_Tab:
                     handle_func = self.indent
 
-                cursor = self.textCursor()
-                if cursor.hasSelection():
-                    start = cursor.blockNumber()
-                    cursor.setPosition(cursor.selectionEnd())
-                    diff = cursor.blockNumber() - start
-
-                    for n in range(diff + 1):
-                        handle_func(cursor, True)
-                        cursor.movePosition(QTextCursor.Up)
-                else:
-                    handle_func(cursor, False)
-
+                handle_func(self.textCursor().hasSelection())
                 return
 
             QPlainTextEdit.keyPressEvent(self, e)
 
-        def indent(self, cursor, is_block):
+        def indent(self, is_block=True):
             if is_block:
-                cursor.movePosition(QTextCursor.StartOfLine)
+                self.edit_lines(lambda lines: bulk_edit.indent(lines, self.settings.tab_width))
+            else:
+                self.textCursor().insertText(" " * self.settings.tab_width)
+
+        def unindent(self, is_block=True):
+            self.edit_lines(lambda lines: bulk_edit.unindent(lines, self.settings.tab_width))
 
-            cursor.insertText(" " * self.settings.tab_width)
+        def toggle_list(self):
+            self.edit_lines(bulk_edit.toggle_list)
 
-        def unindent(self, cursor, is_block):
-            cursor.movePosition(QTextCursor.StartOfLine)
+        def toggle_emphasis(self, marker="*"):
+            cursor = self.textCursor()
+            start_block = self.document().findBlock(cursor.selectionStart())
 
-            curr_line = cursor.block().text()
+            if start_block.contains(cursor.selectionEnd()) and cursor.hasSelection():
+                # Within a line only the selected text is wrapped
+                text = cursor.selectedText()
+                if bulk_edit.is_wrapped(text, marker):
+                    text = text[len(marker):-len(marker)]
+                else:
+                    text = marker + text + marker
 
-            for char in curr_line[:self.settings.tab_width]:
-                if char != " ":
+                self.replace_selection(cursor, text)
+            else:
+                self.edit_lines(lambda lines: bulk_edit.toggle_emphasis(lines, marker))
+
+        def insert_column(self, text):
+            """ Insert text in every selected line at the column of the selection start """
+            column = self.__selection_column()
+            self.edit_lines(lambda lines: bulk_edit.insert_column(lines, column, text))
+
+        def delete_column(self, count=1):
+            """ Delete count characters in every selected line at the column of the selection start """
+            column = self.__selection_column()
+            self.edit_lines(lambda lines: bulk_edit.delete_column(lines, column, count))
+
+        def edit_lines(self, transform):
+            """ Replace the lines touched by the selection with transform(lines) as a single undo step """
+            cursor = self.textCursor()
+            document = self.document()
+
+            start_block = document.findBlock(cursor.selectionStart())
+            end_block = document.findBlock(cursor.selectionEnd())
+
+            # A selection ending at the start of a line does not include that line
+            if end_block != start_block and cursor.selectionEnd() == end_block.position():
+                end_block = end_block.previous()
+
+            lines = []
+            block = start_block
+            while True:
+                lines.append(block.text())
+                if block == end_block:
                     break
+                block = block.next()
 
-                cursor.deleteChar()
+            new_lines = transform(lines)
+            if new_lines == lines:
+                return
+
+            edit_cursor = QTextCursor(document)
+            edit_cursor.setPosition(start_block.position())
+            edit_cursor.setPosition(end_block.position() + end_block.length() - 1, QTextCursor.KeepAnchor)
+
+            self.replace_selection(edit_cursor, "\n".join(new_lines), cursor.hasSelection())
+
+        def replace_selection(self, cursor, text, select=True):
+            """ Replace the selection of cursor with text in one edit block, then select the result """
+            start = cursor.selectionStart()
+
+            cursor.beginEditBlock()
+            cursor.insertText(text)
+            cursor.endEditBlock()
+
+            end = cursor.position()
+            cursor.setPosition(start)
+            if select:
+                cursor.setPosition(end, QTextCursor.KeepAnchor)
+
+            self.setTextCursor(cursor)
+
+        def __selection_column(self):
+            cursor = self.textCursor()
+            return cursor.selectionStart() - self.document().findBlock(cursor.selectionStart()).position()
 
         def dragEnterEvent(self, e):
             if e.mimeData().hasUrls():
@@ -154,14 +225,19 @@ class LineNumberEditor(QFrame):
                 e.ignore()
 
         def dropEvent(self, e):
-            url = e.mimeData().urls()[0].toString()
+            documents = []
+
+            for url in e.mimeData().urls():
+                url = url.toString()
+
+                if url.lower().endswith((".jpeg", ".jpg", ".png", ".gif")):
+                    self.textCursor().insertText("![blank]({url})".format(url=url))
 
-            if url.lower().endswith((".jpeg", ".jpg", ".png", ".gif")):
-                self.textCursor().insertText("![blank]({url})".format(url=url))
+                if url.lower().endswith((".txt", ".md")):
+                    documents.append(url2pathname(urlparse(url).path))
 
-            if url.lower().endswith((".txt", ".md")):
-                path = url2pathname(urlparse(url).path)
-                self.document_dropped.emit(path)
+            if documents:
+                self.documents_dropped.emit(documents)
 
             # Construct dummy event in order to fire cleanup procedure in parent method
             mimeData = QMimeData()
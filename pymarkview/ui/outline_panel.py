@@ -0,0 +1,56 @@
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget
+
+
+class OutlinePanel(QWidget):
+    heading_activated = pyqtSignal(int)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+
+        self._items = []
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.itemActivated.connect(self.__item_activated)
+        self.tree.itemClicked.connect(self.__item_activated)
+
+        vbox = QVBoxLayout(self)
+        vbox.setContentsMargins(0, 0, 0, 0)
+        vbox.addWidget(self.tree)
+
+    def set_headings(self, headings):
+        """ Rebuild the tree, nesting each heading below the closest preceding heading of a higher level """
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        self._items = []
+
+        # (level, item) of the open parents
+        stack = []
+        for index, heading in enumerate(headings):
+            while stack and stack[-1][0] >= heading.level:
+                stack.pop()
+
+            item = QTreeWidgetItem([heading.text])
+            item.setData(0, Qt.UserRole, index)
+
+            if stack:
+                stack[-1][1].addChild(item)
+            else:
+                self.tree.addTopLevelItem(item)
+
+            stack.append((heading.level, item))
+            self._items.append(item)
+
+        self.tree.expandAll()
+        self.tree.setUpdatesEnabled(True)
+
+    def set_current(self, index):
+        if 0 <= index < len(self._items):
+            self.tree.setCurrentItem(self._items[index])
+            self.tree.scrollToItem(self._items[index])
+        else:
+            self.tree.clearSelection()
+
+    def __item_activated(self, item, column=0):
+        self.heading_activated.emit(item.data(0, Qt.UserRole))
@@ -0,0 +1,11 @@
+from PyQt5.QtWebEngineCore import QWebEngineUrlScheme
+
+from pymarkview.assets import ThumbnailCache
+
+
+def register_url_schemes():
+    """ Must be called before the QApplication is created, without loading the web engine widgets """
+    scheme = QWebEngineUrlScheme(ThumbnailCache.SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
@@ -0,0 +1,84 @@
+import os
+import time
+
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout, QWidget
+
+
+class SearchPanel(QWidget):
+    result_activated = pyqtSignal(str, int)
+
+    def __init__(self, index, *args):
+        super().__init__(*args)
+
+        self._index = index
+        self._root = None
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Search open tabs and notes...")
+        self.query_edit.setClearButtonEnabled(True)
+        self.query_edit.textChanged.connect(self.run_query)
+        self.query_edit.returnPressed.connect(self.activate_first)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self.__item_activated)
+
+        self.status_label = QLabel()
+
+        vbox = QVBoxLayout(self)
+        vbox.setContentsMargins(0, 0, 0, 0)
+        vbox.addWidget(self.query_edit)
+        vbox.addWidget(self.result_list)
+        vbox.addWidget(self.status_label)
+
+    def set_root(self, root):
+        self._root = root
+
+    def focus_query(self):
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def run_query(self, query=None):
+        if query is None:
+            query = self.query_edit.text()
+
+        self.result_list.clear()
+
+        if not query:
+            self.status_label.clear()
+            return
+
+        start = time.perf_counter()
+        results = self._index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        for result in results:
+            item = QListWidgetItem("{name}:{line}  {snippet}".format(
+                name=self.__display_name(result.key),
+                line=result.line,
+                snippet=result.snippet
+            ))
+            item.setData(Qt.UserRole, (result.key, result.offset))
+            item.setToolTip(result.key)
+            self.result_list.addItem(item)
+
+        self.status_label.setText("{count} results in {ms:.1f} ms ({docs} documents)".format(
+            count=len(results), ms=elapsed, docs=len(self._index)
+        ))
+
+    def activate_first(self):
+        if self.result_list.count():
+            self.__item_activated(self.result_list.item(0))
+
+    def __item_activated(self, item):
+        key, offset = item.data(Qt.UserRole)
+        self.result_activated.emit(key, offset)
+
+    def __display_name(self, key):
+        if self._root and os.path.isabs(key):
+            try:
+                return os.path.relpath(key, self._root)
+            except ValueError:
+                pass
+
+        return os.path.basename(key)
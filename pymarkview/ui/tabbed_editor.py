@@ -1,14 +1,23 @@
 import io
 import pickle
+import time
+import zlib
 
-from PyQt5.QtCore import pyqtSignal
+from collections import Counter, OrderedDict
+
+from PyQt5.QtCore import QTimer, pyqtSignal
 from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtWidgets import QTabWidget
+from PyQt5.QtWidgets import QVBoxLayout
+from PyQt5.QtWidgets import QWidget
 
+from pymarkview.file_writer import FileWriter
+from pymarkview.journal import EditJournal
 from pymarkview.resources.defaults import welcome_text
-from pymarkview.util import resource_path
+from pymarkview.undo import UndoBudget
+from pymarkview.util import read_text, resource_path
 
 from pathlib import Path
 
@@ -19,28 +28,89 @@ class TabbedEditor(QTabWidget):
     tab_changed = pyqtSignal()
     tab_title_changed = pyqtSignal(str)
     file_saved = pyqtSignal(str)
+    save_failed = pyqtSignal(str, str)
+    open_failed = pyqtSignal(str, str)
+
+    # Emitted from the executor threads
+    file_read = pyqtSignal(object, object, object)
+    text_read = pyqtSignal(str, object)
 
     STATE_FILE = ".saved_state"
 
+    JOURNAL_FLUSH_INTERVAL = 1000
+    JOURNAL_COMPACT_SIZE = 1024 * 1024
+    JOURNAL_COMPACT_INTERVAL = 300
+
     DEFAULT_TAB_NAME = "untitled"
 
-    def __init__(self, parent, editor_widget, settings, *args):
+    # Estimated cost of a live editor: UTF-16 text, block and layout data per line and the
+    # widgets themselves, fitted to resident memory in benchmarks/bench_hibernation.py
+    EDITOR_BYTES_PER_CHAR = 2
+    EDITOR_BYTES_PER_BLOCK = 128
+    EDITOR_OVERHEAD = 64 * 1024
+
+    def __init__(self, parent, editor_widget, settings, persistent=True, executor=None, *args):
         super().__init__(*args)
         self.__set_style()
 
         self._parent = parent
         self._editor_widget = editor_widget
         self._settings = settings
+        self._persistent = persistent
+        self._executor = executor
 
         self._editor_state = {}
         self._tab_state = {}
         self._mapping = self.TabIndexMapping()
 
-        self.__load_state()
+        # Hibernated tabs have no editor, only compressed text, cursor and scroll position
+        self._hibernated = {}
+        # Tabs of the saved state whose text is not loaded yet, see restore_pending_tabs
+        self._pending = set()
+        # Tab uids by last activation, least recent first
+        self._activation = OrderedDict()
+        # Edit counters that survive hibernation, used to match finished writes
+        self._revisions = Counter()
+        # Paths being read by open_files
+        self._reading = set()
+        # Undo stacks of all editors share one memory budget
+        self._undo = UndoBudget(self._settings.undo_memory_budget_mb * 1024 * 1024)
+        # Uid of the editor whose document is being rebuilt, which is not an edit
+        self._compacting = None
+
+        self._undo_tmr = QTimer(self)
+        self._undo_tmr.setSingleShot(True)
+        self._undo_tmr.timeout.connect(self.__enforce_undo_budget)
+
+        # Handler invocations by name, one "text_change" per keystroke
+        self.handler_calls = Counter()
+
+        self._writer = FileWriter(self)
+        self._writer.file_written.connect(self.__handle_file_written)
+        self._writer.write_failed.connect(self.__handle_write_failed)
+
+        self.file_read.connect(self.__handle_file_read)
+
+        self._journal = EditJournal()
+        self._last_compaction = time.monotonic()
+
+        self._journal_tmr = QTimer(self)
+        self._journal_tmr.timeout.connect(self.__flush_journal)
+
+        if self._persistent:
+            self.__load_state()
+            self._journal_tmr.start(self.JOURNAL_FLUSH_INTERVAL)
+        else:
+            # Only the primary window keeps a state file and journal
+            self._journal.suspended = True
+            self.new_tab()
 
         self.tabCloseRequested.connect(self.close_tab)
         self.currentChanged.connect(self.__tab_changed)
 
+        self._settings.subscribe("tab_memory_budget_mb", lambda value: self.__enforce_memory_budget(), self)
+        self._settings.subscribe("undo_memory_budget_mb", self.__set_undo_budget, self)
+
     @property
     def current_editor(self):
         return self._editor_state.get(self._mapping.get_uid(self.currentIndex()))
@@ -49,6 +119,22 @@ class TabbedEditor(QTabWidget):
     def current_tab_state(self):
         return self._tab_state.get(self._mapping.get_uid(self.currentIndex()))
 
+    @property
+    def uids(self):
+        return list(self._mapping.mapping)
+
+    def get_uid(self, tab_index=None):
+        if tab_index is None:
+            tab_index = self.currentIndex()
+
+        return self._mapping.get_uid(tab_index)
+
+    def get_index(self, uid):
+        return self._mapping.get_index(uid)
+
+    def show_tab(self, uid):
+        self.setCurrentIndex(self._mapping.get_index(uid))
+
     def __get_tab_state(self, tab_index=None):
         if tab_index is not None:
             return self._tab_state.get(self._mapping.get_uid(tab_index))
@@ -71,6 +157,10 @@ class TabbedEditor(QTabWidget):
         }})
 
         self._editor_state.update({uid: editor_obj})
+        self._activation[uid] = None
+
+        self.__connect_editor(uid)
+        self._journal.record_open(uid, tab_index)
 
     def __update_tab_state(self, attrib_dict, tab_index=None):
         if tab_index is None:
@@ -78,16 +168,21 @@ class TabbedEditor(QTabWidget):
 
         uid = self._mapping.get_uid(tab_index)
 
-        if self._tab_state.get(uid):
-            update_tab_title = False
+        state = self._tab_state.get(uid)
+        if state:
+            # Only transitions of path or modified reach the journal and the title
+            changed = {attrib for attrib, value in attrib_dict.items()
+                       if attrib in ("path", "modified") and state.get(attrib) != value}
+
+            state.update(attrib_dict)
 
-            for attrib, value in attrib_dict.items():
-                self._tab_state.get(uid)[attrib] = value
-                if attrib in ("path", "modified"):
-                    update_tab_title = True
+            if "path" in changed:
+                self._journal.record_path(uid, attrib_dict["path"])
+            if "modified" in changed and attrib_dict["modified"] is False:
+                self._journal.record_saved(uid)
 
-            if update_tab_title:
-                self.__update_tab_title()
+            if changed:
+                self.__update_tab_title(tab_index)
 
     def __get_path(self, tab_index=None):
         state = self.__get_tab_state(tab_index)
@@ -101,21 +196,24 @@ class TabbedEditor(QTabWidget):
         else:
             return self.DEFAULT_TAB_NAME
 
+    def get_path(self, tab_index=None):
+        return self.__get_path(tab_index)
+
     def get_filename(self):
         return self.tabText(self.currentIndex())
 
     def new_tab(self, append=False):
-        new_ln_editor = self._editor_widget(self._settings)
+        page = self.EditorPage()
+        editor = self.__create_editor(page)
+
         if append:
-            tab_index = self.addTab(new_ln_editor, self.DEFAULT_TAB_NAME)
+            tab_index = self.addTab(page, self.DEFAULT_TAB_NAME)
         else:
-            tab_index = self.insertTab(self.currentIndex() + 1, new_ln_editor, self.DEFAULT_TAB_NAME)
+            tab_index = self.insertTab(self.currentIndex() + 1, page, self.DEFAULT_TAB_NAME)
 
-        self.__new_state(tab_index, new_ln_editor.editor)
+        self.__new_state(tab_index, editor)
 
-        if len(self._editor_state) == 1:
-            self.__connect_tab_signals(tab_index)
-        else:
+        if len(self._editor_state) > 1:
             self.setCurrentIndex(tab_index)
 
         return tab_index
@@ -123,9 +221,13 @@ class TabbedEditor(QTabWidget):
     def close_tab(self, tab_index):
         state = self.__get_tab_state(tab_index)
         if state["modified"]:
+            # The dialog and the save refer to the current tab
+            self.setCurrentIndex(tab_index)
+
             res = self.__show_save_dialog()
             if res == QMessageBox.Yes:
-                if not self.save_file():
+                # Written before the tab and its text are gone, so a failed write keeps the tab open
+                if not self.save_file(sync=True):
                     return False
             elif res == QMessageBox.Cancel:
                 return False
@@ -133,36 +235,159 @@ class TabbedEditor(QTabWidget):
         if len(self._editor_state) == 1:
             self.new_tab()
 
+        # Update the mapping first, removing the current tab activates another one
+        page = self.widget(tab_index)
+        uid = self._mapping.remove(tab_index)
         self.removeTab(tab_index)
+        page.deleteLater()
 
-        uid = self._mapping.remove(tab_index)
+        self._journal.record_close(uid)
         self._tab_state.pop(uid)
         self._editor_state.pop(uid)
+        self._hibernated.pop(uid, None)
+        self._pending.discard(uid)
+        self._activation.pop(uid, None)
+        self._revisions.pop(uid, None)
+        self._undo.forget(uid)
 
         self.tab_changed.emit()
 
     def set_text(self, text, tab_index=None):
+        if tab_index is not None:
+            self.__wake(self._mapping.get_uid(tab_index))
+
         editor = self.__get_editor_state(tab_index)
 
         if editor:
             editor.setPlainText(text)
 
+            # Setting the text clears the undo stack
+            self._undo.forget(self.get_uid(tab_index))
+
     def get_text(self, tab_index=None):
         editor = self.__get_editor_state(tab_index)
 
         if editor:
             return editor.toPlainText()
 
+        uid = self.get_uid(tab_index)
+        if uid in self._pending:
+            self.__restore_tab(uid)
+
+        if uid in self._hibernated:
+            return zlib.decompress(self._hibernated[uid]["text"]).decode("utf-8", "surrogatepass")
+
     def open_file(self, path, pmv_file=False):
         if path:
             return self.__open_file_helper(path, pmv_file)
         else:
-            filename, _ = QFileDialog.getOpenFileName(self._parent,
-                "Open Markdown text file", "", "Text Files (*.txt;*.md);;All Files (*)")
-            if filename:
-                return self.__open_file_helper(filename)
+            filenames, _ = QFileDialog.getOpenFileNames(self._parent,
+                "Open Markdown text files", "", "Text Files (*.txt;*.md);;All Files (*)")
+            self.open_files(filenames)
+
+            return bool(filenames)
+
+    def open_files(self, paths):
+        """ Read files in the executor, each tab appears in the order of paths as soon as its file is read """
+        batch = []
+        for path in paths:
+            uid = self.find_path(path)
+            if uid is not None:
+                if not batch:
+                    self.show_tab(uid)
+            elif path not in self._reading and path not in batch:
+                batch.append(path)
+
+        # Uids of the opened tabs by position in the batch, the first tab to appear is activated
+        uids = [None] * len(batch)
+        for position, path in enumerate(batch):
+            job = (uids, position, path)
+            self._reading.add(path)
+
+            if self._executor is None:
+                self.__read_file(job)
             else:
-                return False
+                self._executor.submit(self.__read_file, job)
+
+    def __read_file(self, job):
+        """ Read and compress the text in the executor, the GUI thread only adds the hibernated tab """
+        try:
+            text, _ = read_text(job[2])
+        except OSError as e:
+            self.file_read.emit(job, None, e)
+        else:
+            self.file_read.emit(job, zlib.compress(text.encode("utf-8", "surrogatepass")), None)
+
+    def read_file_text(self, path):
+        """ Read a file in the executor without opening it, text_read gets its text or None if it cannot be read """
+        if self._executor is None:
+            self.__read_file_text(path)
+        else:
+            self._executor.submit(self.__read_file_text, path)
+
+    def __read_file_text(self, path):
+        try:
+            text, _ = read_text(path)
+        except OSError:
+            text = None
+
+        self.text_read.emit(path, text)
+
+    def __handle_file_read(self, job, data, error):
+        uids, position, path = job
+        self._reading.discard(path)
+
+        if error is not None:
+            self.open_failed.emit(path, str(error))
+            return
+
+        if self.find_path(path) is not None:
+            return
+
+        # Before the first later file of the batch that is open already
+        tab_index = self.count()
+        for uid in uids[position + 1:]:
+            if uid in self._mapping.mapping:
+                tab_index = self._mapping.get_index(uid)
+                break
+
+        activate = not any(uids)
+        uids[position] = self.__add_hibernated_tab(tab_index, path, data)
+
+        if activate:
+            self.setCurrentIndex(tab_index)
+
+        self.__enforce_memory_budget()
+
+    def __add_hibernated_tab(self, tab_index, path, data):
+        """ Tab without an editor for compressed text, the editor is created when the tab is activated """
+        tab_index = self.insertTab(tab_index, self.EditorPage(), self.DEFAULT_TAB_NAME)
+        uid = self._mapping.add(tab_index)
+
+        self._tab_state[uid] = {"modified": False, "path": path, "text": ""}
+        self._editor_state[uid] = None
+        self._hibernated[uid] = {
+            "text": data,
+            "cursor": (0, 0),
+            "scroll": (0, 0)
+        }
+        self._activation[uid] = None
+        self._activation.move_to_end(uid, last=False)
+
+        # Edits are journaled relative to the text read from disk
+        self._journal.record_open(uid, tab_index, path)
+        self._journal.record_text(uid, zlib.decompress(data).decode("utf-8", "surrogatepass"))
+        self.__update_tab_title(tab_index)
+
+        return uid
+
+    def find_path(self, path):
+        """ Uid of the tab with the given path, None if it is not open """
+        for uid, attrib_dict in self._tab_state.items():
+            if attrib_dict["path"] and Path(attrib_dict["path"]) == Path(path):
+                return uid
+
+        return None
 
     def __open_file_helper(self, path, pmv_file=False):
         assert path, "No file name provided!"
@@ -174,111 +399,316 @@ class TabbedEditor(QTabWidget):
 
             path = str(Path(self.__get_path()).parent.joinpath(path))
 
-        for uid, attrib_dict in self._tab_state.items():
-            if attrib_dict["path"]:
-                if Path(attrib_dict["path"]) == Path(path):
-                    self.setCurrentIndex(self._mapping.get_index(uid))
-                    return False
+        uid = self.find_path(path)
+        if uid is not None:
+            self.setCurrentIndex(self._mapping.get_index(uid))
+            return False
 
         if Path(path).exists():
-            with io.open(path, "r", encoding="utf-8", errors="replace") as f:
-                data = f.read()
+            data, _ = read_text(path)
 
             tab_index = self.new_tab(append=True)
             self.set_text(data, tab_index)
             self.__update_tab_state({"path": path, "modified": False})
+            self.__enforce_memory_budget()
 
             return True
         else:
             return False
 
-    def save_file(self):
+    def save_file(self, sync=False):
         state = self.current_tab_state
         path = state["path"]
 
         if path:
-            with io.open(path, "w", encoding="utf-8") as f:
-                f.write(self.get_text())
-
-            self.file_saved.emit(path)
-            self.__update_tab_state({"modified": False})
-            return True
+            return self.__write_file(path, sync)
         else:
-            return self.save_as_file()
+            return self.save_as_file(sync)
 
-    def save_as_file(self):
+    def save_as_file(self, sync=False):
         path, sel_filter = QFileDialog.getSaveFileName(self._parent, "Save as...", "", "Markdown File (*.md);;Text File (*.txt)")
         if path:
-            with io.open(path, "w", encoding="utf-8") as f:
-                f.write(self.get_text())
+            # The tab takes the path once the file is written
+            return self.__write_file(path, sync, True)
 
-            self.file_saved.emit(path)
-            self.__update_tab_state({"path": path, "modified": False})
+        return False
+
+    def flush(self, timeout=None):
+        return self._writer.flush(timeout)
 
+    def __write_file(self, path, sync=False, save_as=False):
+        """ Queue the write, or with sync write it now and return whether it succeeded """
+        uid = self._mapping.get_uid(self.currentIndex())
+
+        if not sync:
+            self._writer.write(path, self.get_text(), (uid, self._revisions[uid], save_as))
             return True
 
-        return False
+        # Queued writes go first, so they cannot overwrite this one
+        self._writer.flush()
+
+        try:
+            FileWriter.write_atomic(path, self.get_text())
+        except OSError as e:
+            self.save_failed.emit(path, str(e))
+            return False
+
+        self.__update_tab_state({"path": path, "modified": False})
+        self.file_saved.emit(path)
+
+        return True
+
+    def __handle_file_written(self, path, token):
+        uid, revision, save_as = token
+
+        if uid in self._mapping.mapping:
+            tab_index = self._mapping.get_index(uid)
+
+            if save_as:
+                self.__update_tab_state({"path": path}, tab_index)
+
+            if self.__get_path(tab_index) == path and self._revisions[uid] == revision:
+                self.__update_tab_state({"modified": False}, tab_index)
+
+        self.file_saved.emit(path)
+
+    def __handle_write_failed(self, path, token, message):
+        self.save_failed.emit(path, message)
 
     def load_instructions(self):
         tab_index = self.new_tab()
         self.set_text(welcome_text, tab_index)
         self.__update_tab_state({"modified": False}, tab_index)
 
-    def __handle_text_change(self):
-        self.__update_tab_state({"modified": True})
+    def __handle_text_change(self, uid):
+        self.handler_calls["text_change"] += 1
+
+        if uid not in self._mapping.mapping or uid == self._compacting:
+            return
 
-        self.text_changed.emit()
+        self._revisions[uid] += 1
 
-    def __connect_tab_signals(self, tab_index):
-        self.__get_editor_state(tab_index).textChanged.connect(self.__handle_text_change)
-        self.__get_editor_state(tab_index).document_dropped.connect(self.open_file)
+        self.__update_tab_state({"modified": True}, self._mapping.get_index(uid))
+
+        if uid == self.get_uid():
+            self.text_changed.emit()
 
     def __tab_changed(self, tab_index):
-        self.__connect_tab_signals(tab_index)
+        # The first tab becomes current before it is mapped
+        if 0 <= tab_index < len(self._mapping.mapping):
+            uid = self._mapping.get_uid(tab_index)
+
+            self.__wake(uid)
+            self._activation[uid] = None
+            self._activation.move_to_end(uid)
+
+            self.__enforce_memory_budget()
+
+            # The history of the tab left behind may be dropped now that it is no longer being edited
+            if self._undo.over_budget():
+                self._undo_tmr.start(0)
+
         self.tab_changed.emit()
 
+    def memory_usage(self):
+        """ Estimated bytes held by live editors, hibernated tabs and undo stacks """
+        editor_bytes = sum(self.__estimate_editor_memory(editor)
+                           for editor in self._editor_state.values() if editor is not None)
+        hibernated_bytes = sum(len(hibernated["text"]) for hibernated in self._hibernated.values())
+
+        return {
+            "editors": sum(1 for editor in self._editor_state.values() if editor is not None),
+            "editor_bytes": editor_bytes,
+            "hibernated": len(self._hibernated),
+            "hibernated_bytes": hibernated_bytes,
+            "pending": len(self._pending),
+            "undo_bytes": self._undo.total,
+            "undo_budget": self._undo.budget,
+            "undo_evicted": self._undo.evicted
+        }
+
+    def is_hibernated(self, uid):
+        return uid in self._hibernated or uid in self._pending
+
+    def restore_pending_tabs(self):
+        """ Load the text of the background tabs of the saved state, their editors are created on activation """
+        for uid in list(self._pending):
+            self.__restore_tab(uid)
+
+    def __estimate_editor_memory(self, editor):
+        document = editor.document()
+        return (document.characterCount() * self.EDITOR_BYTES_PER_CHAR +
+                document.blockCount() * self.EDITOR_BYTES_PER_BLOCK + self.EDITOR_OVERHEAD)
+
+    def __enforce_memory_budget(self):
+        budget = self._settings.tab_memory_budget_mb * 1024 * 1024
+        if not budget or not self.count():
+            return
+
+        usage = {uid: self.__estimate_editor_memory(editor)
+                 for uid, editor in self._editor_state.items() if editor is not None}
+        total = sum(usage.values())
+
+        current_uid = self.get_uid()
+        for uid in list(self._activation):
+            if total <= budget:
+                break
+
+            # Tabs with unsaved changes keep their undo history
+            if uid == current_uid or uid not in usage or self._tab_state[uid]["modified"]:
+                continue
+
+            self.__hibernate(uid)
+            total -= usage[uid]
+
+    def __set_undo_budget(self, value):
+        self._undo.budget = value * 1024 * 1024
+        self.__enforce_undo_budget()
+
+    def __enforce_undo_budget(self):
+        """ Drop the undo history of the tabs edited least recently, the current tab is never compacted mid-edit """
+        for uid in self._undo.evict(self.get_uid() if self.count() else None):
+            if self._editor_state.get(uid) is not None:
+                self.__compact(uid)
+
+    def __compact(self, uid):
+        """ Rebuild the document of an editor, the only way to free its undo stack and the text it still references """
+        editor = self._editor_state[uid]
+        cursor, scroll = self.__get_view(editor)
+
+        self._compacting = uid
+        try:
+            editor.setPlainText(editor.toPlainText())
+        finally:
+            self._compacting = None
+
+        self.__set_view(editor, cursor, scroll)
+
+    @staticmethod
+    def __get_view(editor):
+        cursor = editor.textCursor()
+        return (cursor.anchor(), cursor.position()), (editor.horizontalScrollBar().value(),
+                                                      editor.verticalScrollBar().value())
+
+    @staticmethod
+    def __set_view(editor, cursor, scroll):
+        last_position = editor.document().characterCount() - 1
+        anchor, position = cursor
+
+        text_cursor = editor.textCursor()
+        text_cursor.setPosition(min(anchor, last_position))
+        text_cursor.setPosition(min(position, last_position), QTextCursor.KeepAnchor)
+        editor.setTextCursor(text_cursor)
+
+        horizontal, vertical = scroll
+        editor.horizontalScrollBar().setValue(horizontal)
+        editor.verticalScrollBar().setValue(vertical)
+
+    def __create_editor(self, page):
+        new_ln_editor = self._editor_widget(self._settings)
+        page.set_editor_widget(new_ln_editor)
+
+        return new_ln_editor.editor
+
+    def __hibernate(self, uid):
+        """ Release the editor of a background tab, keeping its text, cursor and scroll position """
+        editor = self._editor_state[uid]
+        cursor, scroll = self.__get_view(editor)
+
+        self._hibernated[uid] = {
+            "text": zlib.compress(editor.toPlainText().encode("utf-8", "surrogatepass")),
+            "cursor": cursor,
+            "scroll": scroll
+        }
+
+        self._editor_state[uid] = None
+        self._undo.forget(uid)
+        self.widget(self._mapping.get_index(uid)).release_editor_widget()
+
+    def __wake(self, uid):
+        if uid in self._pending:
+            self.__restore_tab(uid)
+
+        hibernated = self._hibernated.pop(uid, None)
+        if hibernated is None:
+            return
+
+        editor = self.__create_editor(self.widget(self._mapping.get_index(uid)))
+        editor.setPlainText(zlib.decompress(hibernated["text"]).decode("utf-8", "surrogatepass"))
+        self.__set_view(editor, hibernated["cursor"], hibernated["scroll"])
+
+        # Connected after the text is restored, so waking up is not an edit
+        self._editor_state[uid] = editor
+        self.__connect_editor(uid)
+
+    def __restore_tab(self, uid):
+        self._pending.discard(uid)
+
+        tab_state = self._tab_state[uid]
+        text, modified = tab_state["text"], tab_state["modified"]
+
+        path = tab_state["path"]
+        if path and not modified:
+            if Path(path).exists():
+                text, _ = read_text(path)
+            else:
+                modified = True
+
+        # Edits from now on are relative to the text on disk, not to the one of the snapshot
+        if text != tab_state["text"]:
+            tab_state["text"] = text
+            self._journal.record_text(uid, text)
+
+        self._hibernated[uid] = {
+            "text": zlib.compress(text.encode("utf-8", "surrogatepass")),
+            "cursor": (0, 0),
+            "scroll": (0, 0)
+        }
+
+        self.__update_tab_state({"modified": modified}, self._mapping.get_index(uid))
+
     def __load_state(self):
+        state = None
         if Path(self.STATE_FILE).exists():
             with io.open(self.STATE_FILE, "rb") as f:
                 state = pickle.load(f)
 
+        # Replay edits recorded after the last snapshot, e.g. after a crash
+        generation = state.get("journal_generation", 0) if state else 0
+        records = self._journal.read(generation)
+        if records:
+            if state is None:
+                state = {
+                    "active_tab": 0,
+                    "active_line": 0,
+                    "mapping": self.TabIndexMapping().export_mapping(),
+                    "tab_state": {}
+                }
+            state = EditJournal.replay(state, records)
+
+        self._journal.generation = generation
+        self._journal.suspended = True
+
+        if state and state["mapping"]["__mapping"]:
             self._mapping.import_mapping(state["mapping"])
 
-            for uid in self._mapping.mapping:
-                new_ln_editor = self._editor_widget(self._settings)
-                tab_index = self.addTab(new_ln_editor, self.DEFAULT_TAB_NAME)
-
-                self._editor_state.update({uid: new_ln_editor.editor})
-
-                self.__connect_tab_signals(tab_index)
-
             self._tab_state = state["tab_state"]
 
-            for uid, tab_state in self._tab_state.copy().items():
-                tab_index = self._mapping.get_index(uid)
-                self.setCurrentIndex(tab_index)
-                if tab_state["modified"]:
-                    self.set_text(tab_state["text"], tab_index)
-                    self._tab_state[uid]["modified"] = True
-                else:
-                    path = tab_state["path"]
-                    if path:
-                        if Path(path).exists():
-                            with io.open(path, "r", encoding="utf-8") as f:
-                                data = f.read()
-                            self.set_text(data, tab_index)
-                            self._tab_state[uid]["modified"] = False
-                        else:
-                            self.set_text(tab_state["text"], tab_index)
-                            self._tab_state[uid]["modified"] = True
-                    else:
-                        self.set_text(tab_state["text"], tab_index)
-                        self._tab_state[uid]["modified"] = False
-
-                self.__update_tab_title(self._mapping.get_index(uid))
+            # Only the active tab gets an editor now, the others are loaded later or when activated
+            for uid in self._mapping.mapping:
+                self._editor_state.update({uid: None})
+                self._activation[uid] = None
+                self._pending.add(uid)
+
+                tab_index = self.addTab(self.EditorPage(), self.DEFAULT_TAB_NAME)
+                self.__update_tab_title(tab_index)
 
             self.setCurrentIndex(state["active_tab"])
 
+            uid = self.get_uid()
+            self.__wake(uid)
+            self._activation.move_to_end(uid)
+
             current_editor = self.current_editor
             current_editor.moveCursor(QTextCursor.End)
             cursor = QTextCursor(current_editor.document().findBlockByLineNumber(state["active_line"]))
@@ -286,21 +716,81 @@ class TabbedEditor(QTabWidget):
         else:
             self.load_instructions()
 
+        self._journal.suspended = False
+        self.save_state()
+
+        self.__enforce_memory_budget()
+
+    def has_unsaved_changes(self):
+        return any(state["modified"] for state in self._tab_state.values())
+
     def save_state(self):
+        self._writer.flush()
+
+        if not self._persistent:
+            return
+
         for tab_index in range(self.count()):
-            self.__update_tab_state({"text": self.get_text(tab_index)}, tab_index)
+            # Pending tabs still hold the text they were saved with
+            if self.get_uid(tab_index) not in self._pending:
+                self.__update_tab_state({"text": self.get_text(tab_index)}, tab_index)
 
         state = {
             "active_tab": self.currentIndex(),
             "active_line": self.current_editor.textCursor().blockNumber(),
             "mapping": self._mapping.export_mapping(),
-            "tab_state": self._tab_state
+            "tab_state": self._tab_state,
+            "journal_generation": self._journal.generation + 1
         }
 
-        with io.open(self.STATE_FILE, "wb") as f:
-            pickle.dump(state, f)
+        FileWriter.write_atomic(self.STATE_FILE, pickle.dumps(state))
+
+        self._journal.reset(state["journal_generation"])
+        self._last_compaction = time.monotonic()
+
+    def __connect_editor(self, uid):
+        """ Connect the signals of a new editor, exactly once for its lifetime """
+        editor = self._editor_state[uid]
+
+        editor.textChanged.connect(lambda uid=uid: self.__handle_text_change(uid))
+        editor.documents_dropped.connect(self.open_files)
+        editor.document().contentsChange.connect(
+            lambda position, removed, added, uid=uid: self.__handle_contents_change(uid, position, removed, added)
+        )
+
+    def __handle_contents_change(self, uid, position, removed, added):
+        if uid == self._compacting:
+            return
+
+        # Histories are dropped from the event loop, not in the middle of an edit
+        if self._undo.record(uid, removed, added):
+            self._undo_tmr.start(0)
+
+        if self._journal.suspended:
+            return
+
+        document = self._editor_state[uid].document()
+        end = min(position + added, document.characterCount() - 1)
+
+        text = ""
+        if end > position:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            text = cursor.selection().toPlainText()
+
+        self._journal.record_change(uid, position, removed, text)
+
+    def __flush_journal(self):
+        self._journal.flush()
+
+        if self._journal.size > self.JOURNAL_COMPACT_SIZE or (
+                self._journal.size and time.monotonic() - self._last_compaction > self.JOURNAL_COMPACT_INTERVAL):
+            self.save_state()
 
     def __update_tab_title(self, tab_index=None):
+        self.handler_calls["title_update"] += 1
+
         if tab_index is None:
             tab_index = self.currentIndex()
 
@@ -311,7 +801,9 @@ class TabbedEditor(QTabWidget):
         title += " •" if state["modified"] else ""
 
         self.setTabText(tab_index, title)
-        self.tab_title_changed.emit(title)
+
+        if tab_index == self.currentIndex():
+            self.tab_title_changed.emit(title)
 
     def __show_save_dialog(self):
         msg = QMessageBox()
@@ -338,6 +830,27 @@ class TabbedEditor(QTabWidget):
             }
         ''')
 
+    class EditorPage(QWidget):
+        """ Tab page that outlives its editor, so hibernation keeps the tab and its index """
+
+        def __init__(self, *args):
+            super().__init__(*args)
+
+            self.editor_widget = None
+
+            layout = QVBoxLayout(self)
+            layout.setSpacing(0)
+            layout.setContentsMargins(0, 0, 0, 0)
+
+        def set_editor_widget(self, widget):
+            self.editor_widget = widget
+            self.layout().addWidget(widget)
+
+        def release_editor_widget(self):
+            self.layout().removeWidget(self.editor_widget)
+            self.editor_widget.deleteLater()
+            self.editor_widget = None
+
     class TabIndexMapping:
 
         def __init__(self):
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+
+class UndoBudget:
+    """ Estimated memory of the undo history of all editors, picking the least recently edited ones over a budget """
+
+    # A document keeps the inserted and the removed text of every edit as UTF-16 in a buffer grown by doubling,
+    # next to an undo command and text fragments per edit, until it is rebuilt; consecutive typing is merged
+    # into one undo command by Qt itself. Fitted to resident memory in benchmarks/bench_undo.py
+    BYTES_PER_CHAR = 3
+    STEP_OVERHEAD = 64
+
+    def __init__(self, budget: int = 0):
+        self.budget = budget
+        self.evicted = 0
+
+        # uid -> estimated bytes, least recently edited first
+        self._sizes = OrderedDict()
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def record(self, uid: int, removed: int, added: int) -> bool:
+        """ Account for an edit, returns True if the budget is exceeded """
+        size = (removed + added) * self.BYTES_PER_CHAR + self.STEP_OVERHEAD
+
+        self._sizes[uid] = self._sizes.get(uid, 0) + size
+        self._sizes.move_to_end(uid)
+        self._total += size
+
+        return self.over_budget()
+
+    def forget(self, uid: int) -> None:
+        """ The document of uid was rebuilt or its editor released """
+        self._total -= self._sizes.pop(uid, 0)
+
+    def over_budget(self) -> bool:
+        return bool(self.budget) and self._total > self.budget
+
+    def evict(self, keep: int = None) -> list:
+        """ Uids whose history is to be dropped to get within budget, least recently edited first, never keep """
+        evicted = []
+
+        for uid in list(self._sizes):
+            if not self.over_budget():
+                break
+
+            if uid != keep:
+                self.forget(uid)
+                evicted.append(uid)
+
+        self.evicted += len(evicted)
+        return evicted
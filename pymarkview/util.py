@@ -1,3 +1,6 @@
+import codecs
+import io
+import os
 import sys
 from pathlib import Path
 
@@ -8,3 +11,62 @@ def resource_path(relative_path: str) -> str:
         return str(Path(sys._MEIPASS).joinpath(Path(relative_path).name))
     except Exception:
         return relative_path
+
+
+# Byte order marks, longest first so UTF-32 LE is not taken for UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Tried in order when there is no byte order mark, Latin-1 decodes anything
+FALLBACK_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+
+def decode_text(data: bytes) -> tuple:
+    """ Decode file contents by byte order mark or the first fallback encoding that fits, returns (text, encoding) """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return data.decode(encoding, errors="replace"), encoding
+
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+
+
+def read_text(path: str) -> tuple:
+    """ Read a text file of unknown encoding, returns (text, encoding) with universal newlines """
+    with io.open(path, "rb") as f:
+        text, encoding = decode_text(f.read())
+
+    return text.replace("\r\n", "\n").replace("\r", "\n"), encoding
+
+
+def utf16_position(text: str, offset: int) -> int:
+    """ Qt position of a code point offset in text, Qt counts UTF-16 code units """
+    return len(text[:offset].encode("utf-16-le", "surrogatepass")) // 2
+
+
+def iter_files(root: str, suffixes: tuple):
+    """ Recursively yield (path, stat) of files ending with suffixes, skipping hidden entries """
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path, suffixes)
+            elif entry.name.lower().endswith(suffixes):
+                yield entry.path, entry.stat()
+        except OSError:
+            continue
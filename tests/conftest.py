@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QCoreApplication, QEvent
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """ Settings, state and journal files are written to the working directory """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def settle(app):
+    """ Process pending events, including the deletion of released widgets """
+    app.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
@@ -0,0 +1,21 @@
+from pymarkview.app import App
+from pymarkview.render import RenderService
+from pymarkview.settings import Settings
+
+from conftest import settle
+
+
+def test_app_starts(qapp, workdir):
+    window = App(qapp, RenderService(Settings(watch=False)))
+
+    # The deferred stages start the web engine, which is not needed to bring up the editor
+    window.startup_started = True
+    settle(qapp)
+
+    assert window.isVisible()
+    assert window.tabbed_editor.count() == 1
+    assert not window.memory_label.isVisible()
+
+    window.close()
+    window.deleteLater()
+    settle(qapp)
@@ -0,0 +1,20 @@
+from PyQt5.QtGui import QImage
+
+from pymarkview import assets
+from pymarkview.assets import ThumbnailCache
+
+
+def test_thumbnail_not_cached_without_digest(qapp, tmp_path, monkeypatch):
+    path = tmp_path / "wide.png"
+    image = QImage(400, 100, QImage.Format_RGB32)
+    image.fill(0)
+    image.save(str(path))
+
+    cache = ThumbnailCache(100, str(tmp_path / "cache"))
+    monkeypatch.setattr(assets, "hash_file", lambda path: None)
+
+    mime_type, data = cache.thumbnail(str(path))
+
+    assert mime_type == b"image/jpeg"
+    assert QImage.fromData(data).width() == 100
+    assert list((tmp_path / "cache").iterdir()) == []
@@ -0,0 +1,42 @@
+import pickle
+
+from PyQt5.QtGui import QTextCursor
+
+from pymarkview.journal import EditJournal
+from pymarkview.settings import Settings
+from pymarkview.ui.editor import LineNumberEditor
+from pymarkview.ui.tabbed_editor import TabbedEditor
+
+from conftest import settle
+
+
+def recovered_state(tabbed_editor):
+    """ Saved state with the journal applied, as after a crash """
+    tabbed_editor.flush()
+    tabbed_editor._journal.flush()
+
+    with open(TabbedEditor.STATE_FILE, "rb") as f:
+        state = pickle.load(f)
+
+    return EditJournal.replay(state, tabbed_editor._journal.read(state["journal_generation"]))
+
+
+def test_replay_file_opened_in_background(qapp, workdir):
+    path = workdir / "notes.md"
+    path.write_text("line one\nline two\n", encoding="utf-8")
+
+    tabbed_editor = TabbedEditor(None, LineNumberEditor, Settings(watch=False), True)
+    tabbed_editor.open_files([str(path)])
+    settle(qapp)
+
+    uid = tabbed_editor.find_path(str(path))
+    tabbed_editor.show_tab(uid)
+
+    cursor = QTextCursor(tabbed_editor.current_editor.document())
+    cursor.setPosition(5)
+    cursor.insertText("EDIT ")
+
+    tab = recovered_state(tabbed_editor)["tab_state"][uid]
+    assert tab["text"] == "line EDIT one\nline two\n"
+    assert tab["modified"]
+    assert tab["path"] == str(path)
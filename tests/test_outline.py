@@ -0,0 +1,26 @@
+import re
+
+from pymarkview.markdown.markdown import Markdown
+from pymarkview.markdown.outline import Outline
+
+
+def preview_ids(text):
+    return re.findall(r"<h\d id='([^']*)'", Markdown().parse(text))
+
+
+def outline_ids(text):
+    return [heading.anchor for heading in Outline(text).headings()]
+
+
+def test_mixed_header_styles_numbered_in_document_order():
+    text = "# A\n\nIntro\n===\n\n# Intro\n"
+
+    assert preview_ids(text) == ["a", "intro", "intro-2"]
+    assert outline_ids(text) == preview_ids(text)
+
+
+def test_underline_below_list_item_is_not_a_header():
+    text = "- item\n---\n"
+
+    assert preview_ids(text) == []
+    assert outline_ids(text) == []
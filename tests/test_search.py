@@ -0,0 +1,21 @@
+from pymarkview.index.search import SearchIndex
+from pymarkview.util import utf16_position
+
+
+def test_offsets_point_into_the_original_text():
+    # Lowercasing makes two code points of every "İ"
+    text = "İİİ İstanbul\nfind the Needle here\n"
+    index = SearchIndex()
+    index.update("doc", text)
+
+    results = index.search("needle")
+
+    assert [(result.offset, result.line) for result in results] == [(22, 2)]
+    assert text[results[0].offset:results[0].offset + 6] == "Needle"
+    assert results[0].snippet == "find the Needle here"
+
+
+def test_utf16_position_counts_surrogate_pairs():
+    text = "😀 smile 😀 needle"
+
+    assert utf16_position(text, text.index("needle")) == text.index("needle") + 2
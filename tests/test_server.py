@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+from urllib.parse import quote
+
+from pymarkview.markdown import create_parser
+from pymarkview.server import PreviewServer
+
+
+async def read_response(reader):
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    headers = dict(line.split(": ", 1) for line in head.split("\r\n")[1:] if line)
+    body = await reader.readexactly(int(headers["Content-Length"]))
+
+    return int(head.split(" ", 2)[1]), headers, body
+
+
+def run_with_server(root, test):
+    async def main():
+        server = PreviewServer(str(root), lambda: create_parser("internal"), port=0)
+        await server.start()
+        try:
+            await asyncio.wait_for(test(server), 10)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_connection_closed_after_unsupported_method(tmp_path):
+    async def test(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"POST /note.md HTTP/1.1\r\nContent-Length: 18\r\n\r\nGET / HTTP/1.1\r\n\r\n")
+
+        status, headers, _ = await read_response(reader)
+        assert status == 405
+        assert headers["Connection"] == "close"
+        assert await reader.read() == b""
+
+        writer.close()
+        await writer.wait_closed()
+
+    run_with_server(tmp_path, test)
+
+
+def test_reload_pushed_for_subscribed_page(tmp_path):
+    path = tmp_path / "my note.md"
+    path.write_text("# Note\n", encoding="utf-8")
+
+    async def test(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        page = quote(quote("/my note.md"), safe="")
+        writer.write("GET /__events?page={page} HTTP/1.1\r\n\r\n".format(page=page).encode("latin-1"))
+        await reader.readuntil(b"\r\n\r\n")
+
+        path.write_text("# Changed note\n", encoding="utf-8")
+        os.utime(str(path), ns=(0, 0))
+
+        assert await reader.readuntil(b"\n\n") == "data: {path}\n\n".format(path=quote("/my note.md")).encode()
+
+        writer.close()
+        await writer.wait_closed()
+
+    run_with_server(tmp_path, test)
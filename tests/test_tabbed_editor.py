@@ -0,0 +1,30 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pymarkview.settings import Settings
+from pymarkview.ui.editor import LineNumberEditor
+from pymarkview.ui.tabbed_editor import TabbedEditor
+
+from conftest import settle
+
+
+def test_read_file_text_in_background(qapp, workdir):
+    path = workdir / "note.md"
+    path.write_bytes("a note\r\nwith two lines".encode("utf-8"))
+
+    with ThreadPoolExecutor(1) as executor:
+        tabbed_editor = TabbedEditor(None, LineNumberEditor, Settings(watch=False), False, executor)
+        count = tabbed_editor.count()
+
+        received = []
+        tabbed_editor.text_read.connect(lambda *args: received.append(args))
+        tabbed_editor.read_file_text(str(path))
+        tabbed_editor.read_file_text(str(workdir / "missing.md"))
+
+        deadline = time.monotonic() + 5
+        while len(received) < 2 and time.monotonic() < deadline:
+            settle(qapp)
+
+    assert sorted(received) == [(str(workdir / "missing.md"), None), (str(path), "a note\nwith two lines")]
+    assert tabbed_editor.count() == count